@@ -1,11 +1,16 @@
 import os
 import json
+import atexit
 import logging
+import sqlite3
 import threading
 import time
+from contextlib import contextmanager
 from datetime import datetime
 from flask import Flask, render_template, jsonify, request, flash, redirect, url_for
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import DeclarativeBase
 import ccxt
 
@@ -14,6 +19,20 @@ logging.basicConfig(level=logging.DEBUG,
                     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Startup phase -> seconds taken, reported by /api/status
+startup_started_at = time.perf_counter()
+startup_timings = {}
+
+@contextmanager
+def startup_phase(name):
+    """Time a startup phase and record it in startup_timings"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        startup_timings[name] = round(time.perf_counter() - start, 3)
+        logger.info(f"Startup phase {name} took {startup_timings[name]:.3f}s")
+
 # Create database base class
 class Base(DeclarativeBase):
     pass
@@ -41,23 +60,63 @@ app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 # Initialize the app with the extension
 db.init_app(app)
 
+@event.listens_for(Engine, "connect")
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Use WAL on SQLite so web workers can read while the scanner worker writes"""
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA busy_timeout=5000")
+        cursor.close()
+
 # Import modules after app creation to avoid circular imports
-from models import ArbitrageOpportunity, ExchangeConfig, TokenPair, Settings, UniswapConfig
+from models import ArbitrageOpportunity, ArbitrageCycle, ExchangeConfig, TokenPair, Settings, UniswapConfig, ScannerStatus
 from exchange_scanner import ExchangeScanner
+from price_stream import WebSocketTransport
+from opportunity_store import OpportunityStore
+
+# Price feed mode: 'poll' scans over REST every scan interval, 'stream' uses WebSocket feeds
+PRICE_FEED = os.environ.get("PRICE_FEED", "poll").lower()
+# Optional JSON WebSocket feed (e.g. a local fake server) used instead of ccxt.pro in stream mode
+PRICE_STREAM_URL = os.environ.get("PRICE_STREAM_URL")
+# Track Uniswap pool state from Swap/Mint/Burn events instead of reading slot0 every scan
+UNISWAP_EVENT_TRACKING = os.environ.get("UNISWAP_EVENT_TRACKING", "false").lower() in ("1", "true", "yes")
+# Seconds between gas fee / ETH price refreshes (0 disables the gas oracle)
+GAS_ORACLE_INTERVAL = float(os.environ.get("GAS_ORACLE_INTERVAL", "12"))
+# 'thread' runs the scanner inside the web process, 'worker' leaves it to scanner_worker.py
+SCANNER_MODE = os.environ.get("SCANNER_MODE", "thread").lower()
+# Number of processes polling exchanges in parallel (0 or 1 polls from the scan loop itself)
+SCANNER_SHARDS = int(os.environ.get("SCANNER_SHARDS", "0"))
+# Report the top K venue pairs per token pair with matrix detection (0 keeps single-best detection)
+SCANNER_TOP_K = int(os.environ.get("SCANNER_TOP_K", "0"))
+# Also look for triangular and multi-hop cycles across every quoted market
+SCANNER_CYCLES = os.environ.get("SCANNER_CYCLES", "false").lower() in ("1", "true", "yes")
+# Directory of the tick archive recording every quote the scanner sees (unset disables it)
+TICK_ARCHIVE_DIR = os.environ.get("TICK_ARCHIVE_DIR")
 
 # Initialize components
 scanner = None
+gas_oracle = None
 scan_thread = None
 stop_scan = False
+scanner_ready = threading.Event()  # Set once exchanges, markets and Uniswap are warmed up
+opportunity_store = OpportunityStore(db)
 
 def initialize_components():
-    """Initialize the main components of the arbitrage bot"""
+    """
+    Initialize the main components of the arbitrage bot
+    
+    Only the fast steps run here so the web server is ready right away; exchange
+    connections, market loads and the Uniswap RPC connection are made by
+    warm_up_scanner on the scanner thread.
+    """
     global scanner
     
     with app.app_context():
-        # Recreate the database schema
-        db.drop_all()
-        db.create_all()
+        # Create missing tables; existing data (fees, history, settings) is kept across restarts
+        with startup_phase("database"):
+            db.create_all()
+            opportunity_store.migrate()
         
         # Load settings
         settings = Settings.query.first()
@@ -109,57 +168,124 @@ def initialize_components():
         
         db.session.commit()
         
-        # Initialize scanner
-        scanner = ExchangeScanner(db)
+        # Initialize scanner; connections are deferred to warm_up_scanner
+        with startup_phase("scanner"):
+            scanner = ExchangeScanner(db, connect_uniswap=False)
+            if SCANNER_TOP_K > 0:
+                scanner.top_k_pairs = SCANNER_TOP_K
+            if SCANNER_CYCLES:
+                from cycle_detector import CurrencyGraph
+                scanner.cycle_graph = CurrencyGraph(fee_rate=scanner.order_book_fee_rate)
+            if TICK_ARCHIVE_DIR:
+                from tick_archive import TickArchive
+                scanner.tick_archive = TickArchive(TICK_ARCHIVE_DIR)
+                # Write the quotes still buffered when the process exits
+                atexit.register(scanner.tick_archive.close)
+
+def warm_up_scanner():
+    """Connect to exchanges and Uniswap, load markets and start the Uniswap helpers"""
+    global gas_oracle
+    
+    with app.app_context():
+        with startup_phase("warm_up"):
+            exchange_configs = ExchangeConfig.query.filter_by(is_active=True).all()
+            for phase, seconds in scanner.warm_up(exchange_configs).items():
+                startup_timings[f"warm_up.{phase}"] = round(seconds, 3)
+            
+            if UNISWAP_EVENT_TRACKING and scanner.uniswap:
+                # No pairs have been priced yet, so name the configured ones explicitly
+                token_pairs = TokenPair.query.filter_by(is_active=True).all()
+                scanner.uniswap.enable_event_tracking(scanner._get_symbols_to_check(token_pairs))
+            
+            # Live gas fees and ETH price for profit estimates
+            if GAS_ORACLE_INTERVAL > 0 and scanner.uniswap:
+                from gas_oracle import GasOracle
+                gas_oracle = GasOracle(scanner.uniswap, poll_interval=GAS_ORACLE_INTERVAL)
+                gas_oracle.start()
+                scanner.profit_calculator.gas_oracle = gas_oracle
+    
+    startup_timings["scanner_ready"] = round(time.perf_counter() - startup_started_at, 3)
+    scanner_ready.set()
+
+def get_scanner_status():
+    """Return the scanner heartbeat row, creating it if needed"""
+    status = ScannerStatus.query.first()
+    if not status:
+        status = ScannerStatus(paused=False)
+        db.session.add(status)
+    return status
+
+def run_scan_cycle():
+    """
+    Run one scan and save the opportunities it finds
+    
+    Returns:
+        Seconds to sleep before the next cycle
+    """
+    with app.app_context():
+        settings = Settings.query.first()
+        scan_interval = settings.scan_interval if settings else 3
+        
+        status = get_scanner_status()
+        status.pid = os.getpid()
+        status.mode = SCANNER_MODE
+        status.heartbeat_at = datetime.utcnow()
+        if status.paused:
+            db.session.commit()
+            return scan_interval
+        
+        # Get active exchange pairs
+        exchange_configs = ExchangeConfig.query.filter_by(is_active=True).all()
+        token_pairs = TokenPair.query.filter_by(is_active=True).all()
+        
+        if SCANNER_SHARDS > 1:
+            # Shard processes poll their share of (venue, symbol) pairs and detection runs here on
+            # their quotes; pairs added through /api/token_pair are rebalanced onto the shards here
+            scanner.start_shards(exchange_configs, token_pairs, SCANNER_SHARDS, poll_interval=scan_interval)
+            scanner.refresh_fees_and_uniswap(exchange_configs, token_pairs)
+            opportunities = scanner.drain_stream_opportunities()
+            cycles = scanner.find_cycle_opportunities()
+        elif PRICE_FEED == "stream":
+            # Detection runs on every stream update; here we only collect the results
+            transport = WebSocketTransport(PRICE_STREAM_URL) if PRICE_STREAM_URL else None
+            scanner.start_stream(exchange_configs, token_pairs, transport)
+            scanner.refresh_fees_and_uniswap(exchange_configs, token_pairs)
+            opportunities = scanner.drain_stream_opportunities()
+            cycles = scanner.find_cycle_opportunities()
+        else:
+            # Scan exchanges for price differences; cycles are found and priced by the scan too
+            opportunities = scanner.scan_exchanges(exchange_configs, token_pairs)
+            cycles = scanner.cycle_opportunities
+        
+        # Fees and gas (from the gas oracle when it runs) for what detection did not price itself
+        scanner.estimate_profits(opportunities)
+        
+        # Save opportunities with one INSERT and prune old ones with one DELETE
+        min_profit_threshold = settings.min_profit_threshold if settings else 0.0
+        opportunity_store.save(opportunities, min_profit_threshold, commit=False)
+        if cycles:
+            opportunity_store.save_cycles(cycles, min_profit_threshold, commit=False)
+        
+        status.last_scan_at = datetime.utcnow()
+        status.last_opportunity_count = len(opportunities)
+        db.session.commit()
+        logger.info(f"Scan complete. Found {len(opportunities)} opportunities.")
+        return scan_interval
 
 def scan_for_opportunities():
     """Background task to continuously scan for arbitrage opportunities"""
     global stop_scan
     
+    if not scanner_ready.is_set():
+        try:
+            warm_up_scanner()
+        except Exception as e:
+            logger.error(f"Error warming up scanner: {str(e)}")
+    
     while not stop_scan:
         try:
-            with app.app_context():
-                settings = Settings.query.first()
-                scan_interval = settings.scan_interval if settings else 3
-                
-                # Get active exchange pairs
-                exchange_configs = ExchangeConfig.query.filter_by(is_active=True).all()
-                token_pairs = TokenPair.query.filter_by(is_active=True).all()
-                
-                # Scan exchanges for price differences
-                opportunities = scanner.scan_exchanges(exchange_configs, token_pairs)
-                
-                # Save opportunities to database
-                for opportunity in opportunities:
-                    # Check if opportunity meets minimum threshold
-                    if opportunity.price_difference_percentage >= settings.min_profit_threshold:
-                        # Delete older opportunities to prevent database growth
-                        # Keep only the most recent 100 records
-                        count = ArbitrageOpportunity.query.count()
-                        if count > 100:
-                            old_records = ArbitrageOpportunity.query.order_by(
-                                ArbitrageOpportunity.timestamp.asc()
-                            ).limit(count - 100).all()
-                            for record in old_records:
-                                db.session.delete(record)
-                        
-                        new_opportunity = ArbitrageOpportunity(
-                            token_pair=opportunity.token_pair,
-                            buy_exchange=opportunity.buy_exchange,
-                            sell_exchange=opportunity.sell_exchange,
-                            buy_price=opportunity.buy_price,
-                            sell_price=opportunity.sell_price,
-                            price_difference=opportunity.price_difference,
-                            price_difference_percentage=opportunity.price_difference_percentage,
-                            timestamp=datetime.utcnow()
-                        )
-                        db.session.add(new_opportunity)
-                
-                db.session.commit()
-                logger.info(f"Scan complete. Found {len(opportunities)} opportunities.")
-                
-                # Sleep for the configured interval
-                time.sleep(scan_interval)
+            # Sleep for the configured interval
+            time.sleep(run_scan_cycle())
         except Exception as e:
             logger.error(f"Error in scan thread: {str(e)}")
             time.sleep(3)  # Sleep on error to prevent CPU spinning
@@ -178,16 +304,32 @@ def start_scanner():
     scan_thread.daemon = True
     scan_thread.start()
 
+def set_scanner_paused(paused):
+    """Pause or resume a scanner running in a separate worker process"""
+    status = get_scanner_status()
+    status.paused = paused
+    db.session.commit()
+    logger.info(f"Scanner worker {'paused' if paused else 'resumed'}")
+
 def stop_scanner():
     """Stop the background scanner thread"""
     global stop_scan
     logger.info("Stopping scanner thread")
     stop_scan = True
+    if scanner is not None:
+        scanner.stop_stream()
+        scanner.stop_shards()
+        if scanner.tick_archive is not None:
+            scanner.tick_archive.flush()
 
 # Initialize components when app starts
 with app.app_context():
     initialize_components()
-    start_scanner()
+    # In worker mode the scanner runs once per deployment in scanner_worker.py, not in every web worker
+    if SCANNER_MODE == "thread":
+        start_scanner()
+    startup_timings["web_ready"] = round(time.perf_counter() - startup_started_at, 3)
+    logger.info(f"Web server ready after {startup_timings['web_ready']:.3f}s")
 
 # Routes
 @app.route('/')
@@ -291,9 +433,53 @@ def api_opportunities():
         'buy_price': float(opp.buy_price),
         'sell_price': float(opp.sell_price),
         'price_difference_percentage': float(opp.price_difference_percentage),
+        'net_profit': opp.net_profit,
         'timestamp': opp.timestamp.isoformat()
     } for opp in opportunities])
 
+@app.route('/api/cycles')
+def api_cycles():
+    cycles = ArbitrageCycle.query.order_by(ArbitrageCycle.timestamp.desc()).limit(20).all()
+    return jsonify([{
+        'id': cycle.id,
+        'start_currency': cycle.start_currency,
+        'venues': cycle.venues.split(','),
+        'legs': json.loads(cycle.legs),
+        'gross_return_percentage': float(cycle.gross_return_percentage),
+        'trade_amount': cycle.trade_amount,
+        'estimated_profit': cycle.estimated_profit,
+        'estimated_profit_percentage': cycle.estimated_profit_percentage,
+        'timestamp': cycle.timestamp.isoformat()
+    } for cycle in cycles])
+
+@app.route('/api/opportunities/history')
+def api_opportunities_history():
+    """Opportunities in a time range, newest first (since/until as ISO timestamps)"""
+    try:
+        since = request.args.get('since')
+        until = request.args.get('until')
+        rows = opportunity_store.history(
+            since=datetime.fromisoformat(since) if since else None,
+            until=datetime.fromisoformat(until) if until else None,
+            token_pair=request.args.get('token_pair'),
+            limit=min(int(request.args.get('limit', 500)), 5000)
+        )
+        return jsonify([{
+            'id': row['id'],
+            'token_pair': row['token_pair'],
+            'buy_exchange': row['buy_exchange'],
+            'sell_exchange': row['sell_exchange'],
+            'buy_price': float(row['buy_price']),
+            'sell_price': float(row['sell_price']),
+            'price_difference_percentage': float(row['price_difference_percentage']),
+            'timestamp': row['timestamp'].isoformat()
+        } for row in rows])
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error getting opportunity history: {str(e)}")
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
 @app.route('/api/exchanges')
 def api_exchanges():
     """Return list of available exchanges from CCXT"""
@@ -479,14 +665,40 @@ def api_token_pair():
         logger.error(f"Error in api_token_pair: {str(e)}")
         return jsonify({'status': 'error', 'message': str(e)}), 400
 
+@app.route('/api/status')
+def api_status():
+    """Startup progress, phase timings and the scanner heartbeat"""
+    status = ScannerStatus.query.first()
+    return jsonify({
+        'status': 'success',
+        'scanner_mode': SCANNER_MODE,
+        'scanner_ready': scanner_ready.is_set(),
+        'scanner_running': scan_thread is not None and scan_thread.is_alive(),
+        'startup_timings': startup_timings,
+        'scanner_status': {
+            'pid': status.pid,
+            'mode': status.mode,
+            'paused': status.paused,
+            'heartbeat_at': status.heartbeat_at.isoformat() if status.heartbeat_at else None,
+            'last_scan_at': status.last_scan_at.isoformat() if status.last_scan_at else None,
+            'last_opportunity_count': status.last_opportunity_count
+        } if status else None
+    })
+
 @app.route('/api/scanner/start')
 def api_start_scanner():
-    start_scanner()
+    if SCANNER_MODE == "worker":
+        set_scanner_paused(False)
+    else:
+        start_scanner()
     return jsonify({'status': 'success', 'message': 'Scanner started'})
 
 @app.route('/api/scanner/stop')
 def api_stop_scanner():
-    stop_scanner()
+    if SCANNER_MODE == "worker":
+        set_scanner_paused(True)
+    else:
+        stop_scanner()
     return jsonify({'status': 'success', 'message': 'Scanner stopped'})
 
 @app.route('/api/uniswap/config', methods=['GET', 'POST'])
@@ -571,6 +783,16 @@ def api_uniswap_details(token_pair):
         if not details:
             return jsonify({"status": "error", "message": f"Could not get details for {token_pair}"}), 404
         
+        # Add the EIP-1559 fee breakdown when the gas oracle has a fresh reading
+        snapshot = gas_oracle.get_snapshot(max_age=60) if gas_oracle else None
+        if snapshot:
+            details["gas_oracle"] = {
+                "base_fee_gwei": snapshot.base_fee_gwei,
+                "priority_fee_gwei": snapshot.priority_fee_gwei,
+                "eth_price_usd": snapshot.eth_price_usd,
+                "block_number": snapshot.block_number
+            }
+        
         # Return the detailed data
         return jsonify({
             "status": "success",
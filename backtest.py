@@ -0,0 +1,294 @@
+"""
+Deterministic replay of recorded quotes through the detection and profit pipeline
+
+Quotes from a TickArchive (or a JSON-lines fixture) are fed in timestamp order
+into the IncrementalDetector used by the scanner, under a simulated clock, so a
+day of quotes replays in seconds and the same input always gives the same report.
+Every detected opportunity that the ProfitCalculator expects to be profitable is
+re-priced after each configured latency, giving a PnL curve over reaction time.
+
+    python backtest.py --archive instance/ticks --latency 0 100 500 1000
+    python backtest.py --fixture tests/fixtures/backtest_quotes.jsonl --json
+"""
+import json
+import heapq
+import argparse
+import logging
+import time
+from dataclasses import dataclass, field, asdict
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from price_stream import Quote
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_LATENCIES_MS = (0, 100, 500, 1000)
+
+@dataclass
+class SimulatedClock:
+    """Replay time in milliseconds, advanced by the quotes instead of the wall clock"""
+    now_ms: int = 0
+
+    def advance_to(self, timestamp_ms: int):
+        # Quotes from different venues can arrive slightly out of order; time never goes back
+        self.now_ms = max(self.now_ms, timestamp_ms)
+
+@dataclass
+class SimulatedTrade:
+    """An opportunity acted on after a given latency"""
+    symbol: str
+    buy_exchange: str
+    sell_exchange: str
+    latency_ms: int
+    detected_at: int
+    executed_at: int
+    detected_profit: float
+    buy_price: float = 0.0
+    sell_price: float = 0.0
+    profit: float = 0.0
+
+@dataclass
+class LatencyResult:
+    """Outcome of acting on every signal after one latency"""
+    latency_ms: int
+    trades: int = 0
+    profitable_trades: int = 0
+    pnl: float = 0.0
+
+    @property
+    def hit_rate(self) -> float:
+        return self.profitable_trades / self.trades if self.trades else 0.0
+
+    @property
+    def mean_profit(self) -> float:
+        return self.pnl / self.trades if self.trades else 0.0
+
+@dataclass
+class BacktestReport:
+    """Summary of a replay"""
+    quotes: int = 0
+    opportunities: int = 0
+    signals: int = 0
+    start_ms: int = 0
+    end_ms: int = 0
+    wall_seconds: float = 0.0
+    latency_results: List[LatencyResult] = field(default_factory=list)
+
+    @property
+    def speedup(self) -> float:
+        """Replayed time per second of wall time"""
+        return (self.end_ms - self.start_ms) / 1000 / self.wall_seconds if self.wall_seconds else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            'quotes': self.quotes,
+            'opportunities': self.opportunities,
+            'signals': self.signals,
+            'start': self.start_ms,
+            'end': self.end_ms,
+            'wall_seconds': round(self.wall_seconds, 4),
+            'speedup': round(self.speedup, 1),
+            'latency_curve': [dict(asdict(result), hit_rate=round(result.hit_rate, 4),
+                                   mean_profit=result.mean_profit)
+                              for result in self.latency_results]
+        }
+
+class ReplayEngine:
+    """
+    Replays quotes through IncrementalDetector and ProfitCalculator
+
+    A signal is raised when the detector's best opportunity for a symbol has a
+    positive estimated net profit; the same venue pair is not signalled again for
+    `cooldown_ms`. Each signal is then executed at detection time plus every
+    latency, at the buy venue's ask and the sell venue's bid as they stand at
+    that moment in the replay.
+    """
+
+    def __init__(self, profit_calculator=None, trade_amount: float = 1.0, use_flashloan: bool = False,
+                 latencies_ms: Iterable[int] = DEFAULT_LATENCIES_MS, cooldown_ms: int = 1000,
+                 min_edge_percentage: float = 0.0):
+        """
+        Args:
+            profit_calculator: ProfitCalculator used for fees and gas (defaults to a fresh one)
+            trade_amount: Trade size in base currency
+            use_flashloan: Whether trades are funded with a flashloan
+            latencies_ms: Reaction times to evaluate, in milliseconds
+            cooldown_ms: Minimum time between signals for the same symbol and venue pair
+            min_edge_percentage: Minimum gross spread before the profit is estimated
+        """
+        if profit_calculator is None:
+            from profit_calculator import ProfitCalculator  # Imported here to avoid circular imports
+            profit_calculator = ProfitCalculator()
+        self.profit_calculator = profit_calculator
+        self.trade_amount = trade_amount
+        self.use_flashloan = use_flashloan
+        self.latencies_ms = sorted(set(int(latency) for latency in latencies_ms))
+        self.cooldown_ms = cooldown_ms
+        self.min_edge_percentage = min_edge_percentage
+
+    def _estimate(self, symbol: str, buy_exchange: str, buy_price: float,
+                  sell_exchange: str, sell_price: float) -> float:
+        from exchange_scanner import OpportunityData  # Imported here to avoid circular imports
+        opportunity = OpportunityData(symbol, buy_exchange, sell_exchange, buy_price, sell_price,
+                                      sell_price - buy_price, (sell_price - buy_price) / buy_price * 100)
+        return self.profit_calculator.calculate_profit(opportunity, self.trade_amount,
+                                                       self.use_flashloan).estimated_profit
+
+    def _execute(self, detector, trade: SimulatedTrade, result: LatencyResult):
+        """Price a trade against the detector's current book and record the outcome"""
+        book = detector.books.get(trade.symbol)
+        buy_record = book.records.get(trade.buy_exchange) if book else None
+        sell_record = book.records.get(trade.sell_exchange) if book else None
+        if not buy_record or not sell_record:
+            return  # A venue dropped out before we could act
+        trade.buy_price = buy_record.get('ask') or buy_record['price']
+        trade.sell_price = sell_record.get('bid') or sell_record['price']
+        trade.profit = self._estimate(trade.symbol, trade.buy_exchange, trade.buy_price,
+                                      trade.sell_exchange, trade.sell_price)
+        result.trades += 1
+        result.pnl += trade.profit
+        if trade.profit > 0:
+            result.profitable_trades += 1
+
+    def run(self, quotes: Iterable[Quote], trades: Optional[List[SimulatedTrade]] = None) -> BacktestReport:
+        """
+        Replay quotes in the order given (TickReader.iter_quotes yields them by timestamp)
+
+        Args:
+            quotes: Quotes to replay
+            trades: Optional list that receives every simulated trade
+
+        Returns:
+            BacktestReport with a LatencyResult per latency
+        """
+        from opportunity_detector import IncrementalDetector  # Imported here to avoid circular imports
+
+        detector = IncrementalDetector()
+        clock = SimulatedClock()
+        results = {latency: LatencyResult(latency) for latency in self.latencies_ms}
+        report = BacktestReport(latency_results=list(results.values()))
+        pending: List[Tuple[int, int, SimulatedTrade]] = []  # (execute at, sequence, trade)
+        last_signal: Dict[Tuple[str, str, str], int] = {}
+        sequence = 0
+        started = time.perf_counter()
+
+        for quote in quotes:
+            timestamp = int(quote.timestamp)
+            if report.quotes == 0:
+                report.start_ms = timestamp
+                clock.now_ms = timestamp
+            # Trades due before this quote see the book as it was up to now
+            while pending and pending[0][0] < timestamp:
+                executed_at, _, trade = heapq.heappop(pending)
+                clock.advance_to(executed_at)
+                self._execute(detector, trade, results[trade.latency_ms])
+                if trades is not None:
+                    trades.append(trade)
+            clock.advance_to(timestamp)
+            report.quotes += 1
+
+            opportunity = detector.update(quote.exchange, quote.symbol, quote.to_price_record())
+            if opportunity is None or opportunity.price_difference_percentage <= self.min_edge_percentage:
+                continue
+            report.opportunities += 1
+
+            key = (opportunity.token_pair, opportunity.buy_exchange, opportunity.sell_exchange)
+            if clock.now_ms - last_signal.get(key, -self.cooldown_ms) < self.cooldown_ms:
+                continue
+            detected_profit = self._estimate(opportunity.token_pair, opportunity.buy_exchange, opportunity.buy_price,
+                                             opportunity.sell_exchange, opportunity.sell_price)
+            if detected_profit <= 0:
+                continue
+            last_signal[key] = clock.now_ms
+            report.signals += 1
+
+            for latency in self.latencies_ms:
+                trade = SimulatedTrade(opportunity.token_pair, opportunity.buy_exchange, opportunity.sell_exchange,
+                                       latency, clock.now_ms, clock.now_ms + latency, detected_profit)
+                if latency == 0:
+                    self._execute(detector, trade, results[latency])
+                    if trades is not None:
+                        trades.append(trade)
+                else:
+                    sequence += 1
+                    heapq.heappush(pending, (trade.executed_at, sequence, trade))
+
+        # Trades due after the last quote execute against the final book
+        while pending:
+            executed_at, _, trade = heapq.heappop(pending)
+            clock.advance_to(executed_at)
+            self._execute(detector, trade, results[trade.latency_ms])
+            if trades is not None:
+                trades.append(trade)
+
+        report.end_ms = clock.now_ms
+        report.wall_seconds = time.perf_counter() - started
+        return report
+
+def load_fixture(path: str) -> Iterator[Quote]:
+    """
+    Read quotes from a JSON-lines fixture, one quote per line
+
+    Each line holds Quote fields, e.g.
+    {"exchange": "binance", "symbol": "BTC/USDT", "bid": 100.0, "ask": 100.1, "timestamp": 1700000000000}
+    """
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield Quote(**json.loads(line))
+
+def _parse_time(value: Optional[str]) -> Optional[int]:
+    if not value:
+        return None
+    moment = datetime.fromisoformat(value)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return int(moment.timestamp() * 1000)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay recorded quotes through detection and profit estimation")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--archive", help="Tick archive directory (see tick_archive.py)")
+    source.add_argument("--fixture", help="JSON-lines file of quotes, in timestamp order")
+    parser.add_argument("--start", help="First quote time, ISO format (UTC if no offset)")
+    parser.add_argument("--end", help="Last quote time, ISO format (UTC if no offset)")
+    parser.add_argument("--venues", nargs="+", help="Venues to replay (default all)")
+    parser.add_argument("--symbols", nargs="+", help="Symbols to replay (default all)")
+    parser.add_argument("--latency", type=int, nargs="+", default=list(DEFAULT_LATENCIES_MS),
+                        help="Reaction times to evaluate, in milliseconds")
+    parser.add_argument("--trade-amount", type=float, default=1.0, help="Trade size in base currency")
+    parser.add_argument("--cooldown", type=int, default=1000, help="Milliseconds between signals per venue pair")
+    parser.add_argument("--flashloan", action="store_true", help="Fund trades with a flashloan")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args(argv)
+
+    if args.archive:
+        from tick_archive import TickReader  # Imported here to avoid circular imports
+        quotes = TickReader(args.archive).iter_quotes(args.venues, _parse_time(args.start),
+                                                      _parse_time(args.end), args.symbols)
+    else:
+        quotes = load_fixture(args.fixture)
+
+    engine = ReplayEngine(trade_amount=args.trade_amount, use_flashloan=args.flashloan,
+                          latencies_ms=args.latency, cooldown_ms=args.cooldown)
+    report = engine.run(quotes)
+
+    if args.json:
+        print(json.dumps(report.to_dict(), indent=2))
+        return 0
+
+    print(f"Replayed {report.quotes} quotes ({(report.end_ms - report.start_ms) / 1000:.1f}s of market time) "
+          f"in {report.wall_seconds:.2f}s, {report.speedup:.0f}x real time")
+    print(f"{report.opportunities} opportunity updates, {report.signals} signals")
+    print(f"{'latency':>10} {'trades':>8} {'hit rate':>9} {'pnl':>14} {'mean':>12}")
+    for result in report.latency_results:
+        print(f"{result.latency_ms:>8}ms {result.trades:>8} {result.hit_rate:>8.1%} "
+              f"{result.pnl:>14.4f} {result.mean_profit:>12.4f}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,530 @@
+"""
+Scan-loop benchmark against in-process fake exchanges and a fake Ethereum node
+
+Every venue is a FakeExchange serving deterministic tickers and order books with
+configurable latency, jitter and error rate, and Uniswap V3 is read through a
+FakeWeb3Provider that answers the scanner's Multicall3 batches locally. Nothing
+touches the network, so runs are repeatable and can be compared across commits.
+
+For each venue x pair count in the matrix the benchmark measures scan wall time,
+requests per scan, detection throughput and database write time. Results are
+printed as a table, or as JSON with --json; --output appends one JSON line per
+run to a file that can be tracked over time.
+
+    python benchmark.py --venues 2 5 10 --pairs 5 50 200
+    python benchmark.py --latency 50 --jitter 20 --error-rate 0.02 --json
+    python benchmark.py --output bench_output.txt
+"""
+import os
+import sys
+import json
+import math
+import time
+import random
+import asyncio
+import argparse
+import logging
+import platform
+import statistics
+import subprocess
+import tempfile
+import zlib
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import ccxt
+from eth_abi import encode as abi_encode, decode as abi_decode
+from web3 import Web3
+from web3.providers.base import BaseProvider
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Reference USD prices; symbols made of other tokens get a price derived from their name
+REFERENCE_PRICES = {'ETH': 2000.0, 'WETH': 2000.0, 'BTC': 30000.0, 'WBTC': 30000.0,
+                    'USDT': 1.0, 'USDC': 1.0, 'DAI': 1.0}
+
+# Pairs with Uniswap pools come first so every matrix cell exercises the RPC path
+ONCHAIN_SYMBOLS = ['ETH/USDT', 'BTC/USDT', 'ETH/USDC', 'BTC/USDC', 'ETH/DAI', 'BTC/DAI', 'BTC/ETH']
+
+def benchmark_symbols(count: int) -> List[str]:
+    """The first `count` symbols of the benchmark universe"""
+    symbols = ONCHAIN_SYMBOLS[:count]
+    symbols += [f"T{i:04d}/USDT" for i in range(count - len(symbols))]
+    return symbols
+
+def reference_price(symbol: str) -> float:
+    base, quote = symbol.split('/')
+    base_price = REFERENCE_PRICES.get(base) or 1 + zlib.crc32(base.encode()) % 10000 / 100
+    return base_price / REFERENCE_PRICES.get(quote, 1.0)
+
+class FakeExchange:
+    """
+    In-process stand-in for a ccxt.async_support exchange
+
+    Each venue quotes every symbol at a fixed skew from the reference price plus a
+    seeded random walk, so venues disagree by a few basis points and the scanner
+    finds opportunities. Every request sleeps for `latency` +/- `jitter` seconds and
+    fails with ccxt.NetworkError at `error_rate`.
+    """
+
+    def __init__(self, exchange_id: str, symbols: List[str], latency: float = 0.0, jitter: float = 0.0,
+                 error_rate: float = 0.0, seed: int = 0, batch_tickers: bool = True, rate_limit_ms: float = 1):
+        """
+        Args:
+            exchange_id: Venue id reported by the exchange
+            symbols: Symbols listed on the venue
+            latency: Mean response time in seconds
+            jitter: Maximum deviation from `latency` in seconds
+            error_rate: Fraction of requests that fail
+            seed: Seed of the price walk, latencies and errors
+            batch_tickers: Whether the venue supports fetch_tickers
+            rate_limit_ms: Declared milliseconds between requests, as in ccxt's rateLimit
+        """
+        self.id = exchange_id
+        self.rateLimit = rate_limit_ms
+        self.has = {'fetchTickers': batch_tickers, 'fetchTradingFees': False, 'fetchOrderBook': True}
+        self.apiKey = None
+        self.fees = {'trading': {'maker': 0.001, 'taker': 0.001}}
+        self.symbols = sorted(symbols)
+        self.markets = {symbol: {'symbol': symbol, 'maker': 0.001, 'taker': 0.001} for symbol in self.symbols}
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.request_count = 0
+        self.error_count = 0
+        self._rng = random.Random(f"{exchange_id}:{seed}")
+        self._skew = {symbol: (zlib.crc32(f"{exchange_id}|{symbol}".encode()) % 601 - 300) / 100000
+                      for symbol in self.symbols}
+        self._walk = {symbol: 0.0 for symbol in self.symbols}
+
+    async def _request(self, endpoint: str):
+        self.request_count += 1
+        delay = self.latency + self._rng.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if self.error_rate and self._rng.random() < self.error_rate:
+            self.error_count += 1
+            raise ccxt.NetworkError(f"{self.id} {endpoint} simulated network error")
+
+    def _mid(self, symbol: str) -> float:
+        self._walk[symbol] += self._rng.gauss(0, 0.0001)
+        return reference_price(symbol) * (1 + self._skew[symbol] + self._walk[symbol])
+
+    def _ticker(self, symbol: str) -> Dict[str, Any]:
+        mid = self._mid(symbol)
+        return {
+            'symbol': symbol,
+            'bid': mid * (1 - 0.00005),
+            'ask': mid * (1 + 0.00005),
+            'last': mid,
+            'quoteVolume': 1000000.0,
+            'timestamp': int(time.time() * 1000)
+        }
+
+    def _check_symbol(self, symbol: str):
+        if symbol not in self.markets:
+            raise ccxt.BadSymbol(f"{self.id} does not have market symbol {symbol}")
+
+    async def load_markets(self, reload: bool = False):
+        return self.markets
+
+    def set_markets(self, markets, currencies=None):
+        self.markets = markets
+        self.symbols = sorted(markets)
+
+    async def fetch_ticker(self, symbol: str):
+        await self._request('fetch_ticker')
+        self._check_symbol(symbol)
+        return self._ticker(symbol)
+
+    async def fetch_tickers(self, symbols: Optional[List[str]] = None):
+        if not self.has['fetchTickers']:
+            raise ccxt.NotSupported(f"{self.id} fetch_tickers() is not supported")
+        await self._request('fetch_tickers')
+        for symbol in symbols or []:
+            self._check_symbol(symbol)
+        return {symbol: self._ticker(symbol) for symbol in symbols or self.symbols}
+
+    async def fetch_order_book(self, symbol: str, limit: Optional[int] = None):
+        await self._request('fetch_order_book')
+        self._check_symbol(symbol)
+        mid = self._mid(symbol)
+        levels = limit or 20
+        return {
+            'symbol': symbol,
+            'bids': [[mid * (1 - 0.00005 * (i + 1)), 1.0 + i] for i in range(levels)],
+            'asks': [[mid * (1 + 0.00005 * (i + 1)), 1.0 + i] for i in range(levels)],
+            'timestamp': int(time.time() * 1000)
+        }
+
+    async def fetch_trading_fees(self):
+        await self._request('fetch_trading_fees')
+        return {symbol: {'maker': 0.001, 'taker': 0.001} for symbol in self.symbols}
+
+    async def close(self):
+        pass
+
+def _selector(signature: str) -> bytes:
+    return bytes(Web3.keccak(text=signature)[:4])
+
+class FakeWeb3Provider(BaseProvider):
+    """
+    Web3 provider answering the eth_calls UniswapV3Interface makes, without a node
+
+    Supports Multicall3 aggregate3 batches of factory getPool, pool slot0,
+    liquidity, fee, tickSpacing, tickBitmap and ticks, plus getBlockNumber. Pools
+    exist for the 0.05% and 0.3% tiers of every pair of known tokens and are
+    priced at REFERENCE_PRICES.
+    """
+
+    AGGREGATE3 = _selector("aggregate3((address,bool,bytes)[])")
+    GET_BLOCK_NUMBER = _selector("getBlockNumber()")
+    GET_POOL = _selector("getPool(address,address,uint24)")
+    SLOT0 = _selector("slot0()")
+    LIQUIDITY = _selector("liquidity()")
+    FEE = _selector("fee()")
+    TICK_SPACING = _selector("tickSpacing()")
+    TICK_BITMAP = _selector("tickBitmap(int16)")
+    TICKS = _selector("ticks(int24)")
+
+    POOL_FEES = {500: 10, 3000: 60}  # fee tier -> tick spacing
+
+    def __init__(self, latency: float = 0.0, block_number: int = 18000000):
+        """
+        Args:
+            latency: Seconds every RPC request takes
+            block_number: Block number reported by the node
+        """
+        super().__init__()
+        from uniswap_interface import (  # Imported here to avoid circular imports
+            TOKEN_ADDRESSES, TOKEN_DECIMALS, UNISWAP_V3_FACTORY_ADDRESS, MULTICALL3_ADDRESS
+        )
+        self.latency = latency
+        self.block_number = block_number
+        self.request_count = 0
+        self.call_count = 0
+        self.factory = UNISWAP_V3_FACTORY_ADDRESS.lower()
+        self.multicall = os.getenv("MULTICALL3_ADDRESS", MULTICALL3_ADDRESS).lower()
+
+        usd_prices = {address.lower(): REFERENCE_PRICES[token] for token, address in TOKEN_ADDRESSES.items()}
+        self.pools = {}  # (token0, token1, fee) -> pool address
+        self.pool_states = {}  # pool address -> (sqrt_price_x96, tick, liquidity, fee, tick_spacing)
+        for token0 in sorted(usd_prices):
+            for token1 in sorted(usd_prices):
+                if token0 >= token1:
+                    continue
+                # Raw token1 units per raw token0 unit
+                raw_price = usd_prices[token0] / usd_prices[token1] * 10 ** (TOKEN_DECIMALS[token1] - TOKEN_DECIMALS[token0])
+                for fee, tick_spacing in self.POOL_FEES.items():
+                    address = Web3.to_checksum_address(Web3.keccak(text=f"{token0}{token1}{fee}")[-20:])
+                    self.pools[(token0, token1, fee)] = address
+                    self.pool_states[address.lower()] = (int(math.sqrt(raw_price) * 2 ** 96),
+                                                         math.floor(math.log(raw_price, 1.0001)),
+                                                         10 ** 18 if fee == 500 else 10 ** 17, fee, tick_spacing)
+
+    def is_connected(self, show_traceback: bool = False) -> bool:
+        return True
+
+    def _call(self, target: str, data: bytes):
+        """Execute one read call; returns (success, return data)"""
+        self.call_count += 1
+        selector, args = data[:4], data[4:]
+        target = target.lower()
+        if target == self.multicall and selector == self.GET_BLOCK_NUMBER:
+            return True, abi_encode(["uint256"], [self.block_number])
+        if target == self.factory and selector == self.GET_POOL:
+            token_a, token_b, fee = abi_decode(["address", "address", "uint24"], args)
+            token0, token1 = sorted([token_a.lower(), token_b.lower()])
+            address = self.pools.get((token0, token1, fee), "0x" + "00" * 20)
+            return True, abi_encode(["address"], [address])
+
+        state = self.pool_states.get(target)
+        if state is None:
+            return False, b""
+        sqrt_price_x96, tick, liquidity, fee, tick_spacing = state
+        if selector == self.SLOT0:
+            return True, abi_encode(["uint160", "int24", "uint16", "uint16", "uint16", "uint8", "bool"],
+                                    [sqrt_price_x96, tick, 0, 1, 1, 0, True])
+        if selector == self.LIQUIDITY:
+            return True, abi_encode(["uint128"], [liquidity])
+        if selector == self.FEE:
+            return True, abi_encode(["uint24"], [fee])
+        if selector == self.TICK_SPACING:
+            return True, abi_encode(["int24"], [tick_spacing])
+        if selector == self.TICK_BITMAP:
+            return True, abi_encode(["uint256"], [0])
+        if selector == self.TICKS:
+            return True, abi_encode(["uint128", "int128", "uint256", "uint256", "int56", "uint160", "uint32", "bool"],
+                                    [0, 0, 0, 0, 0, 0, 0, False])
+        return False, b""
+
+    def _eth_call(self, transaction: Dict[str, Any]) -> str:
+        target = transaction.get('to', '')
+        data = bytes.fromhex((transaction.get('data') or transaction.get('input') or '0x')[2:])
+        if target.lower() == self.multicall and data[:4] == self.AGGREGATE3:
+            calls = abi_decode(["(address,bool,bytes)[]"], data[4:])[0]
+            results = []
+            for call_target, allow_failure, calldata in calls:
+                success, return_data = self._call(call_target, calldata)
+                if not success and not allow_failure:
+                    raise ValueError("Multicall3: call failed")
+                results.append((success, return_data))
+            return "0x" + abi_encode(["(bool,bytes)[]"], [results]).hex()
+        success, return_data = self._call(target, data)
+        if not success:
+            raise ValueError(f"execution reverted: {target}")
+        return "0x" + return_data.hex()
+
+    def make_request(self, method, params):
+        self.request_count += 1
+        if self.latency:
+            time.sleep(self.latency)
+        response = {'jsonrpc': '2.0', 'id': self.request_count}
+        try:
+            if method == 'eth_call':
+                response['result'] = self._eth_call(params[0])
+            elif method == 'eth_chainId':
+                response['result'] = '0x1'
+            elif method == 'net_version':
+                response['result'] = '1'
+            elif method == 'eth_blockNumber':
+                response['result'] = hex(self.block_number)
+            elif method == 'web3_clientVersion':
+                response['result'] = 'FakeWeb3Provider/1.0'
+            else:
+                response['error'] = {'code': -32601, 'message': f"Method {method} not supported"}
+        except Exception as e:
+            response['error'] = {'code': -32000, 'message': str(e)}
+        return response
+
+class _Pair:
+    """Minimal stand-in for a TokenPair row"""
+
+    def __init__(self, symbol: str):
+        self.base_token, self.quote_token = symbol.split('/')
+        self.is_active = True
+
+def build_scanner(venue_count: int, symbols: List[str], args):
+    """
+    Create an ExchangeScanner whose venues and Uniswap interface are fakes
+
+    Returns:
+        Tuple of (scanner, venue configs, fake exchanges, fake provider or None)
+    """
+    from exchange_scanner import ExchangeScanner  # Imported here to avoid circular imports
+    from rate_limiter import RateLimiter, LocalBucketBackend  # Imported here to avoid circular imports
+    from shard_scanner import VenueConfig  # Imported here to avoid circular imports
+
+    scanner = ExchangeScanner(db=None, connect_uniswap=False)
+    scanner.request_timeout = args.timeout
+    if args.order_book_depth:
+        scanner.order_book_depth = args.order_book_depth
+
+    fakes = []
+    for i in range(venue_count):
+        fake = FakeExchange(f"fake{i}", symbols, latency=args.latency / 1000, jitter=args.jitter / 1000,
+                            error_rate=args.error_rate, seed=args.seed, batch_tickers=not args.no_batch,
+                            rate_limit_ms=args.rate_limit)
+        # _initialize_exchange returns cached instances as they are, so the fakes are wired in here
+        scanner.async_exchange_instances[fake.id] = fake
+        scanner.rate_limiters[fake.id] = RateLimiter.for_exchange(fake, backend=LocalBucketBackend())
+        scanner.batch_ticker_support[fake.id] = fake.has['fetchTickers']
+        scanner.symbol_index.update(fake.id, fake.symbols)
+        fakes.append(fake)
+
+    provider = None
+    if not args.no_uniswap:
+        from uniswap_interface import UniswapV3Interface  # Imported here to avoid circular imports
+        from pool_registry import PoolRegistry  # Imported here to avoid circular imports
+        provider = FakeWeb3Provider(latency=args.rpc_latency / 1000)
+        scanner.uniswap = UniswapV3Interface(provider=provider, pool_registry=PoolRegistry(":memory:"))
+
+    configs = [VenueConfig(fake.id) for fake in fakes]
+    return scanner, configs, fakes, provider
+
+def _request_count(fakes, provider) -> int:
+    return sum(fake.request_count for fake in fakes) + (provider.request_count if provider else 0)
+
+def measure_scans(scanner, configs, pairs, fakes, provider, scans: int) -> Dict[str, Any]:
+    """Time full scan_exchanges calls after one warm-up scan"""
+    # The first scan loads fee schedules and resolves pools, which later scans skip
+    scanner.scan_exchanges(configs, pairs)
+
+    wall_times, opportunity_counts = [], []
+    requests_before = _request_count(fakes, provider)
+    rpc_before = provider.request_count if provider else 0
+    errors_before = sum(fake.error_count for fake in fakes)
+    opportunities = []
+    for _ in range(scans):
+        started = time.perf_counter()
+        opportunities = scanner.scan_exchanges(configs, pairs)
+        wall_times.append(time.perf_counter() - started)
+        opportunity_counts.append(len(opportunities))
+
+    wall_times_ms = sorted(seconds * 1000 for seconds in wall_times)
+    return {
+        'scan_ms': {
+            'median': round(statistics.median(wall_times_ms), 3),
+            'p95': round(wall_times_ms[min(len(wall_times_ms) - 1, int(0.95 * len(wall_times_ms)))], 3),
+            'min': round(wall_times_ms[0], 3),
+            'max': round(wall_times_ms[-1], 3)
+        },
+        'requests_per_scan': round((_request_count(fakes, provider) - requests_before) / scans, 2),
+        'rpc_requests_per_scan': round(((provider.request_count if provider else 0) - rpc_before) / scans, 2),
+        'errors_per_scan': round((sum(fake.error_count for fake in fakes) - errors_before) / scans, 2),
+        'opportunities_per_scan': round(statistics.mean(opportunity_counts), 2),
+        '_opportunities': opportunities
+    }
+
+def measure_detection(scanner, fakes, quotes_per_venue: int) -> Dict[str, Any]:
+    """Quotes per second through the incremental detector used by the stream and shard paths"""
+    from price_stream import Quote  # Imported here to avoid circular imports
+
+    quotes = []
+    for _ in range(quotes_per_venue):
+        for fake in fakes:
+            for symbol in fake.symbols:
+                ticker = fake._ticker(symbol)
+                quotes.append(Quote.from_ticker(fake.id, symbol, ticker))
+    if not quotes:
+        return {'detection_quotes_per_second': 0.0}
+
+    started = time.perf_counter()
+    for quote in quotes:
+        scanner._on_stream_update(quote)
+    elapsed = time.perf_counter() - started
+    scanner.drain_stream_opportunities()
+    return {
+        'detection_quotes': len(quotes),
+        'detection_quotes_per_second': round(len(quotes) / elapsed, 1) if elapsed else 0.0
+    }
+
+def measure_db_writes(app_module, opportunities, scans: int) -> Dict[str, Any]:
+    """Time OpportunityStore.save of one scan's opportunities, including the commit"""
+    if app_module is None or not opportunities:
+        return {'db_write_ms': None}
+    write_times = []
+    with app_module.app.app_context():
+        for _ in range(scans):
+            started = time.perf_counter()
+            app_module.opportunity_store.save(opportunities)
+            write_times.append((time.perf_counter() - started) * 1000)
+    return {'db_write_ms': round(statistics.median(write_times), 3), 'db_rows_per_write': len(opportunities)}
+
+def open_database(database_url: Optional[str], scratch_dir: str):
+    """Import the app against a scratch (or the given) database without starting a scanner"""
+    os.environ["SCANNER_MODE"] = "worker"
+    os.environ["DATABASE_URL"] = database_url or f"sqlite:///{os.path.join(scratch_dir, 'benchmark.db')}"
+    os.environ.pop("TICK_ARCHIVE_DIR", None)
+    import app as app_module  # Imported here so the environment is set before the app initializes
+    return app_module
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_benchmark(args) -> Dict[str, Any]:
+    """
+    Run every venue x pair count in the matrix
+
+    Returns:
+        Dictionary with run metadata and one result per matrix cell
+    """
+    scratch_dir = tempfile.mkdtemp(prefix="benchmark-")
+    # Market caches and the pool registry of the benchmark must not mix with real ones
+    os.environ["MARKET_CACHE_DIR"] = os.path.join(scratch_dir, "markets")
+    os.environ["POOL_REGISTRY_PATH"] = os.path.join(scratch_dir, "pools.db")
+    app_module = None if args.no_db else open_database(args.database_url, scratch_dir)
+
+    results = []
+    for venue_count in args.venues:
+        for pair_count in args.pairs:
+            symbols = benchmark_symbols(pair_count)
+            scanner, configs, fakes, provider = build_scanner(venue_count, symbols, args)
+            pairs = [_Pair(symbol) for symbol in symbols]
+            try:
+                result = {'venues': venue_count, 'pairs': pair_count}
+                result.update(measure_scans(scanner, configs, pairs, fakes, provider, args.scans))
+                opportunities = result.pop('_opportunities')
+                result.update(measure_detection(scanner, fakes, args.detection_rounds))
+                result.update(measure_db_writes(app_module, opportunities, args.scans))
+            finally:
+                scanner.close()
+                if scanner.uniswap is not None:
+                    scanner.uniswap.pool_registry.close()
+            results.append(result)
+            logger.info(f"{venue_count} venues x {pair_count} pairs: median scan {result['scan_ms']['median']:.1f}ms, "
+                        f"{result['requests_per_scan']} requests per scan")
+
+    return {
+        'commit': git_commit(),
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'config': {
+            'latency_ms': args.latency,
+            'jitter_ms': args.jitter,
+            'error_rate': args.error_rate,
+            'rpc_latency_ms': args.rpc_latency,
+            'rate_limit_ms': args.rate_limit,
+            'batch_tickers': not args.no_batch,
+            'uniswap': not args.no_uniswap,
+            'order_book_depth': args.order_book_depth,
+            'scans': args.scans,
+            'seed': args.seed
+        },
+        'results': results
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the scan loop against fake exchanges and a fake RPC node")
+    parser.add_argument("--venues", type=int, nargs="+", default=[2, 5, 10], help="Venue counts to benchmark")
+    parser.add_argument("--pairs", type=int, nargs="+", default=[5, 50, 200], help="Pair counts to benchmark")
+    parser.add_argument("--scans", type=int, default=5, help="Timed scans per matrix cell")
+    parser.add_argument("--latency", type=float, default=20.0, help="Mean exchange response time in milliseconds")
+    parser.add_argument("--jitter", type=float, default=5.0, help="Maximum deviation from the latency in milliseconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of exchange requests that fail")
+    parser.add_argument("--rpc-latency", type=float, default=20.0, help="Ethereum RPC response time in milliseconds")
+    parser.add_argument("--rate-limit", type=float, default=10.0,
+                        help="Declared milliseconds between requests per venue (ccxt rateLimit)")
+    parser.add_argument("--timeout", type=float, default=10.0, help="Per-request timeout in seconds")
+    parser.add_argument("--order-book-depth", type=int, default=None,
+                        help="Size opportunities from order books of this depth")
+    parser.add_argument("--detection-rounds", type=int, default=20,
+                        help="Quotes per venue and symbol fed through the incremental detector")
+    parser.add_argument("--no-batch", action="store_true", help="Venues without fetch_tickers")
+    parser.add_argument("--no-uniswap", action="store_true", help="Leave Uniswap out of the scan")
+    parser.add_argument("--no-db", action="store_true", help="Skip the database write benchmark")
+    parser.add_argument("--database-url", help="Database to write to (defaults to a scratch SQLite file)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of prices, latencies and errors")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+    parser.add_argument("--output", help="Append the results as one JSON line to this file")
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(args)
+
+    if args.output:
+        with open(args.output, "a") as f:
+            f.write(json.dumps(report) + "\n")
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return 0
+
+    print(f"commit {report['commit'] or 'unknown'}, latency {args.latency}+/-{args.jitter}ms, "
+          f"error rate {args.error_rate}, rpc latency {args.rpc_latency}ms")
+    print(f"{'venues':>6} {'pairs':>6} {'scan ms':>9} {'p95 ms':>9} {'req/scan':>9} {'opps':>6} "
+          f"{'detect q/s':>11} {'db write ms':>12}")
+    for result in report['results']:
+        db_write = f"{result['db_write_ms']:.2f}" if result['db_write_ms'] is not None else "-"
+        print(f"{result['venues']:>6} {result['pairs']:>6} {result['scan_ms']['median']:>9.1f} "
+              f"{result['scan_ms']['p95']:>9.1f} {result['requests_per_scan']:>9} "
+              f"{result['opportunities_per_scan']:>6} {result['detection_quotes_per_second']:>11.0f} {db_write:>12}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
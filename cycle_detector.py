@@ -0,0 +1,309 @@
+import logging
+import math
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+from dataclasses import dataclass, field
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+Node = Tuple[str, str]  # (venue, currency)
+
+@dataclass
+class CycleLeg:
+    """One conversion step of a cycle"""
+    venue: str
+    symbol: str  # Market traded, or '' for a transfer between venues
+    side: str  # 'buy', 'sell' or 'transfer'
+    price: float  # Raw market price of the symbol (1.0 for transfers)
+    from_currency: str
+    to_currency: str
+
+@dataclass
+class CycleOpportunity:
+    """A multi-hop arbitrage cycle that ends in the currency it started from"""
+    start_currency: str
+    legs: List[CycleLeg] = field(default_factory=list)
+    gross_return: float = 0.0  # Product of all conversion rates minus one, after graph fees
+    timestamp: int = 0
+    # Filled in by ProfitCalculator.calculate_cycle_profit
+    trade_amount: float = 0.0  # In the start currency
+    estimated_profit: float = 0.0
+    estimated_profit_percentage: float = 0.0
+    gas_cost_estimate: float = 0.0
+    exchange_fee_estimate: float = 0.0
+    flashloan_fee_estimate: float = 0.0
+
+    @property
+    def venues(self) -> List[str]:
+        return sorted({leg.venue for leg in self.legs})
+
+    @property
+    def is_triangular(self) -> bool:
+        return len([leg for leg in self.legs if leg.side != 'transfer']) == 3
+
+class CurrencyGraph:
+    """
+    Currency conversion graph for triangular and multi-hop arbitrage
+
+    Nodes are (venue, currency). A BASE/QUOTE ticker on a venue adds a sell edge
+    BASE -> QUOTE at the bid and a buy edge QUOTE -> BASE at 1 / ask, each weighted
+    -log(rate * (1 - fee)). The same currency on two venues is linked by transfer
+    edges, so cycles may span venues. A negative-weight cycle is a profitable loop.
+
+    Shortest-path potentials are kept between updates: lowering an edge weight only
+    re-relaxes from that edge, and any new negative cycle must run through it.
+    Raising a weight invalidates the potentials, which are then rebuilt with a full
+    SPFA pass on the next detection.
+    """
+
+    def __init__(self, fee_rate: float = 0.001, transfer_fee_rate: float = 0.0, max_legs: int = 6):
+        """
+        Args:
+            fee_rate: Taker fee rate applied to every market edge
+            transfer_fee_rate: Fee rate applied when moving a currency between venues
+            max_legs: Most market trades (transfers not counted) in a reported cycle
+        """
+        self.fee_rate = fee_rate
+        self.transfer_fee_rate = transfer_fee_rate
+        self.max_legs = max_legs
+        self.edges: Dict[Node, Dict[Node, float]] = {}  # u -> v -> weight
+        self.legs: Dict[Tuple[Node, Node], CycleLeg] = {}
+        self.dist: Dict[Node, float] = {}
+        self.pred: Dict[Node, Node] = {}
+        self._dirty = True
+        self._pending: List[List[Node]] = []
+        self._venues_by_currency: Dict[str, set] = {}
+        self.epsilon = 1e-12
+
+    def _add_node(self, node: Node):
+        if node in self.edges:
+            return
+        self.edges[node] = {}
+        self.dist[node] = 0.0
+        venue, currency = node
+        venues = self._venues_by_currency.setdefault(currency, set())
+        # Link the currency to the same currency on every other venue
+        transfer_rate = 1 - self.transfer_fee_rate
+        for other_venue in venues:
+            other = (other_venue, currency)
+            self.update_edge(node, other, transfer_rate,
+                             CycleLeg(venue, '', 'transfer', 1.0, currency, currency))
+            self.update_edge(other, node, transfer_rate,
+                             CycleLeg(other_venue, '', 'transfer', 1.0, currency, currency))
+        venues.add(venue)
+
+    def _set_edge(self, u: Node, v: Node, rate: float, leg: Optional[CycleLeg]) -> bool:
+        """Store an edge weight; returns True if the weight was lowered or the edge is new"""
+        self._add_node(u)
+        self._add_node(v)
+
+        weight = -math.log(rate)
+        old_weight = self.edges[u].get(v)
+        self.edges[u][v] = weight
+        if leg is not None:
+            self.legs[(u, v)] = leg
+
+        if old_weight is not None and weight > old_weight + self.epsilon:
+            self._dirty = True
+            return False
+        return True
+
+    def update_edge(self, u: Node, v: Node, rate: float, leg: Optional[CycleLeg] = None):
+        """
+        Set the conversion rate of an edge and check for a cycle through it
+
+        Args:
+            u: Source node
+            v: Destination node
+            rate: Amount of v received per unit of u, after fees
+            leg: Description of the conversion, used when reporting cycles
+        """
+        if rate <= 0:
+            self.remove_edge(u, v)
+            return
+        if self._set_edge(u, v, rate, leg) and not self._dirty:
+            self._relax_from(u, v)
+
+    def remove_edge(self, u: Node, v: Node):
+        """Remove an edge (e.g. when a market stops quoting)"""
+        if u in self.edges and self.edges[u].pop(v, None) is not None:
+            self.legs.pop((u, v), None)
+            self._dirty = True
+
+    def update_ticker(self, venue: str, symbol: str, bid: float, ask: float):
+        """
+        Update both edges of a market from its best bid and ask
+
+        Both weights are stored before relaxing, so a half-applied quote
+        cannot produce a phantom cycle through the market itself.
+
+        Args:
+            venue: Venue the market trades on
+            symbol: Market symbol, e.g. 'ETH/BTC'
+            bid: Best bid (price at which BASE can be sold for QUOTE)
+            ask: Best ask (price at which BASE can be bought with QUOTE)
+        """
+        base, quote = symbol.split('/')
+        base_node, quote_node = (venue, base), (venue, quote)
+        keep = 1 - self.fee_rate
+        lowered = []
+        if bid and bid > 0:
+            if self._set_edge(base_node, quote_node, bid * keep,
+                              CycleLeg(venue, symbol, 'sell', bid, base, quote)):
+                lowered.append((base_node, quote_node))
+        else:
+            self.remove_edge(base_node, quote_node)
+        if ask and ask > 0:
+            if self._set_edge(quote_node, base_node, keep / ask,
+                              CycleLeg(venue, symbol, 'buy', ask, quote, base)):
+                lowered.append((quote_node, base_node))
+        else:
+            self.remove_edge(quote_node, base_node)
+
+        for u, v in lowered:
+            if self._dirty:
+                break
+            self._relax_from(u, v)
+
+    def _relax_from(self, u: Node, v: Node):
+        """
+        Propagate a lowered edge weight; the potentials were valid before the change,
+        so improving dist[u] again means the path v -> ... -> u closes a negative cycle
+        """
+        candidate = self.dist[u] + self.edges[u][v]
+        if candidate >= self.dist[v] - self.epsilon:
+            return
+
+        self.dist[v] = candidate
+        self.pred[v] = u
+        queue = deque([v])
+        queued = {v}
+        while queue:
+            x = queue.popleft()
+            queued.discard(x)
+            for y, weight in self.edges[x].items():
+                candidate = self.dist[x] + weight
+                if candidate < self.dist[y] - self.epsilon:
+                    self.pred[y] = x
+                    if y == u:
+                        self._pending.append(self._trace_cycle(u))
+                        # Potentials are no longer consistent with a negative cycle present
+                        self._dirty = True
+                        return
+                    self.dist[y] = candidate
+                    if y not in queued:
+                        queue.append(y)
+                        queued.add(y)
+
+    def _trace_cycle(self, start: Node) -> List[Node]:
+        """Follow predecessors from a node on a cycle back to itself"""
+        cycle = [start]
+        node = self.pred.get(start)
+        while node is not None and node != start and len(cycle) <= len(self.edges):
+            cycle.append(node)
+            node = self.pred.get(node)
+        cycle.reverse()
+        return cycle
+
+    def _full_pass(self) -> List[List[Node]]:
+        """SPFA from a virtual source connected to every node; returns negative cycles found"""
+        nodes = list(self.edges.keys())
+        self.dist = {node: 0.0 for node in nodes}
+        self.pred = {}
+        counts = {node: 0 for node in nodes}
+        queue = deque(nodes)
+        queued = set(nodes)
+        cycles = []
+        on_cycle = set()
+        n = len(nodes)
+
+        while queue:
+            x = queue.popleft()
+            queued.discard(x)
+            if x in on_cycle:
+                continue
+            for y, weight in self.edges[x].items():
+                if y in on_cycle:
+                    continue
+                candidate = self.dist[x] + weight
+                if candidate < self.dist[y] - self.epsilon:
+                    self.dist[y] = candidate
+                    self.pred[y] = x
+                    counts[y] += 1
+                    if counts[y] >= n:
+                        # y keeps being relaxed, so its predecessor chain runs into a negative cycle
+                        node = y
+                        visited = set()
+                        while node is not None and node not in visited:
+                            visited.add(node)
+                            node = self.pred.get(node)
+                        if node is not None:
+                            cycle = self._trace_cycle(node)
+                            cycles.append(cycle)
+                            on_cycle.update(cycle)
+                            continue
+                        counts[y] = 0
+                    if y not in queued:
+                        queue.append(y)
+                        queued.add(y)
+
+        self._dirty = bool(cycles)
+        return cycles
+
+    def _to_opportunity(self, cycle: List[Node], timestamp: int) -> Optional[CycleOpportunity]:
+        legs = []
+        total_weight = 0.0
+        for u, v in zip(cycle, cycle[1:] + cycle[:1]):
+            weight = self.edges.get(u, {}).get(v)
+            if weight is None:
+                return None  # Edge changed since the cycle was found
+            total_weight += weight
+            legs.append(self.legs[(u, v)])
+
+        trades = len([leg for leg in legs if leg.side != 'transfer'])
+        if total_weight >= 0 or trades > self.max_legs:
+            return None
+
+        # Start from a market leg so the cycle reads naturally
+        first_trade = next((i for i, leg in enumerate(legs) if leg.side != 'transfer'), 0)
+        legs = legs[first_trade:] + legs[:first_trade]
+        return CycleOpportunity(
+            start_currency=legs[0].from_currency,
+            legs=legs,
+            gross_return=math.exp(-total_weight) - 1,
+            timestamp=timestamp
+        )
+
+    def find_cycles(self, timestamp: int = 0) -> List[CycleOpportunity]:
+        """
+        Return the profitable cycles currently in the graph
+
+        When no update has invalidated the potentials this only reports cycles
+        already found by incremental updates; otherwise a full SPFA pass runs.
+
+        Args:
+            timestamp: Timestamp in milliseconds given to every result
+
+        Returns:
+            List of CycleOpportunity objects, best return first
+        """
+        cycles = self._pending
+        self._pending = []
+        if self._dirty:
+            cycles = cycles + self._full_pass()
+
+        opportunities = []
+        seen = set()
+        for cycle in cycles:
+            key = frozenset(cycle)
+            if key in seen:
+                continue
+            seen.add(key)
+            opportunity = self._to_opportunity(cycle, timestamp)
+            if opportunity:
+                opportunities.append(opportunity)
+
+        opportunities.sort(key=lambda opportunity: opportunity.gross_return, reverse=True)
+        return opportunities
@@ -0,0 +1,111 @@
+import logging
+import math
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from typing import Dict, Any, List
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class DepthCurve(ABC):
+    """
+    Quote amount needed (buy side) or received (sell side) for a base size
+
+    Curves are convex on the buy side and concave on the sell side, which is what
+    lets ProfitCalculator.optimize_trade_size use golden-section search.
+    """
+    side = 'buy'
+    max_size = 0.0
+    fee_included = False  # True if value() already accounts for the venue's trading fee
+
+    @abstractmethod
+    def value(self, size: float) -> float:
+        """
+        Args:
+            size: Base amount to trade
+
+        Returns:
+            Quote amount spent (buy) or received (sell); inf/0 if size exceeds the depth
+        """
+
+class OrderBookCurve(DepthCurve):
+    """Depth curve of one side of a venue's order book"""
+
+    def __init__(self, levels: List[List[float]], side: str):
+        """
+        Args:
+            levels: Asks sorted ascending (side='buy') or bids sorted descending (side='sell'),
+                    as [[price, amount], ...]
+            side: 'buy' to walk the asks, 'sell' to walk the bids
+        """
+        self.side = side
+        self.prices = []
+        self.cumulative_sizes = []
+        self.cumulative_values = []
+        size = value = 0.0
+        for level in levels:
+            price, amount = level[0], level[1]
+            if not amount or amount <= 0:
+                continue
+            size += amount
+            value += price * amount
+            self.prices.append(price)
+            self.cumulative_sizes.append(size)
+            self.cumulative_values.append(value)
+        self.max_size = size
+
+    @classmethod
+    def from_order_book(cls, order_book: Dict[str, Any], side: str) -> 'OrderBookCurve':
+        """Build a curve from a ccxt order book"""
+        return cls(order_book.get('asks' if side == 'buy' else 'bids') or [], side)
+
+    def value(self, size: float) -> float:
+        if size <= 0:
+            return 0.0
+        if size > self.max_size:
+            return math.inf if self.side == 'buy' else 0.0
+        i = bisect_left(self.cumulative_sizes, size)
+        filled_size = self.cumulative_sizes[i - 1] if i else 0.0
+        filled_value = self.cumulative_values[i - 1] if i else 0.0
+        return filled_value + (size - filled_size) * self.prices[i]
+
+class V3PoolCurve(DepthCurve):
+    """Depth curve of a Uniswap V3 pool, evaluated with the exact swap simulator"""
+    fee_included = True
+
+    def __init__(self, simulator, state: Dict[str, Any], side: str, base_is_token0: bool,
+                 base_decimals: int, quote_decimals: int):
+        """
+        Args:
+            simulator: V3PoolSimulator holding the pool's tick data
+            state: Pool state (sqrt_price_x96, tick, liquidity) to quote from
+            side: 'buy' to buy base with quote, 'sell' to sell base for quote
+            base_is_token0: Whether the base token is the pool's token0
+            base_decimals: Decimals of the base token
+            quote_decimals: Decimals of the quote token
+        """
+        self.simulator = simulator
+        self.state = state
+        self.side = side
+        self.base_scale = 10**base_decimals
+        self.quote_scale = 10**quote_decimals
+        # Buying base means paying in quote, i.e. swapping towards the base token
+        self.zero_for_one = base_is_token0 if side == 'sell' else not base_is_token0
+
+        # Largest size the loaded tick range can fill
+        huge = 1 << 200
+        if side == 'sell':
+            self.max_size = simulator.quote_exact_input(state, self.zero_for_one, huge).amount_in / self.base_scale
+        else:
+            self.max_size = simulator.quote_exact_output(state, self.zero_for_one, huge).amount_out / self.base_scale
+
+    def value(self, size: float) -> float:
+        amount = int(size * self.base_scale)
+        if amount <= 0:
+            return 0.0
+        if self.side == 'sell':
+            result = self.simulator.quote_exact_input(self.state, self.zero_for_one, amount)
+            return result.amount_out / self.quote_scale if result.complete else 0.0
+        result = self.simulator.quote_exact_output(self.state, self.zero_for_one, amount)
+        return result.amount_in / self.quote_scale if result.complete else math.inf
@@ -1,16 +1,27 @@
 import logging
 import ccxt
+import ccxt.async_support as ccxt_async
 import time
 import asyncio
 from typing import List, Dict, Any, Optional, Tuple
 from dataclasses import dataclass
 import traceback
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from uniswap_interface import UniswapV3Interface
+from price_stream import PriceStream, CcxtProTransport, Quote
+from order_book import walk_order_books
+from depth_curve import OrderBookCurve
+from rate_limiter import RateLimiter, order_book_cost, fetch_tickers_cost
+from market_cache import MarketCache
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Quote currencies treated as worth one US dollar
+STABLECOINS = ("USDT", "USDC", "DAI", "BUSD", "USD")
+
 @dataclass
 class OpportunityData:
     """Data class to hold arbitrage opportunity information"""
@@ -24,64 +35,168 @@ class OpportunityData:
     buy_volume: float = 0.0
     sell_volume: float = 0.0
     timestamp: int = 0
-
-class RateLimiter:
-    """
-    Simple rate limiter to prevent hitting exchange API limits
-    """
-    def __init__(self, max_calls_per_second=5):
-        self.max_calls_per_second = max_calls_per_second
-        self.call_timestamps = []
-    
-    async def wait(self):
-        """Wait if we've made too many calls recently"""
-        now = time.time()
-        # Remove timestamps older than 1 second
-        self.call_timestamps = [ts for ts in self.call_timestamps if now - ts < 1]
-        
-        if len(self.call_timestamps) >= self.max_calls_per_second:
-            # Need to wait until we can make another call
-            sleep_time = 1 - (now - self.call_timestamps[0])
-            if sleep_time > 0:
-                await asyncio.sleep(sleep_time)
-        
-        # Record this call
-        self.call_timestamps.append(time.time())
+    # Depth-aware sizing, filled in when order book mode is enabled
+    max_trade_size: float = 0.0
+    buy_vwap: float = 0.0
+    sell_vwap: float = 0.0
+    vwap_profit: float = 0.0
+    # Profit-maximizing size, filled in by ProfitCalculator.optimize_trade_size
+    optimal_trade_size: float = 0.0
 
 class ExchangeScanner:
     """
     Scans multiple exchanges for price differences to identify arbitrage opportunities
     """
     
-    def __init__(self, db):
-        """Initialize the scanner with database access"""
+    def __init__(self, db, connect_uniswap=True):
+        """
+        Initialize the scanner with database access
+        
+        Args:
+            db: Flask-SQLAlchemy database
+            connect_uniswap: Connect to Uniswap V3 now; pass False to defer it to warm_up
+        """
         self.db = db
         self.exchanges = {}
         self.rate_limiters = {}
         self.default_symbols = ["BTC/USDT", "ETH/USDT", "BNB/USDT", "SOL/USDT", "ADA/USDT"]
         self.exchange_instances = {}
+        self.async_exchange_instances = {}
+        self.batch_ticker_support = {}  # exchange id -> whether fetch_tickers([...]) can be used
+        
+        # Markets are loaded once per venue (cached on disk) and indexed by symbol,
+        # so venues are only asked for symbols they list
+        self.market_cache = MarketCache()
+        self.symbol_index = self.market_cache.index
+        
+        # Concurrent scan settings
+        self.concurrent_scan = True  # Fan out ticker fetches with asyncio instead of a serial loop
+        self.request_timeout = 5.0  # Seconds to wait for a single ticker before giving up on it
+        self._loop = None
+        
+        # Order book mode: walk both books to size each opportunity (None disables it)
+        self.order_book_depth = None  # Number of levels requested with fetch_order_book
+        self.order_book_fee_rate = 0.001  # Taker fee assumed on each leg when walking books
+        
+        # Matrix detection: report the top K venue pairs per symbol instead of only the best one
+        self.top_k_pairs = None  # None uses incremental single-best detection
+        self.spread_matrix = None
+        
+        # Every quote seen is recorded when a TickArchive is assigned
+        self.tick_archive = None
+        
+        # Triangular / multi-hop detection, enabled by assigning a CurrencyGraph
+        self.cycle_graph = None
+        self.cycle_opportunities = []
+        self.cycle_trade_size_usd = 1000.0  # USD value of the start currency each cycle is priced for
+        
+        # Incremental opportunity detection shared by the polling and streaming paths
+        from opportunity_detector import IncrementalDetector  # Imported here to avoid circular imports
+        self.detector = IncrementalDetector()
+        
+        # Maker/taker fees per venue and symbol, persisted in the exchange_fee table
+        from fee_schedule import FeeSchedule  # Imported here to avoid circular imports
+        self.fee_schedule = FeeSchedule(db=self.db, default_taker=self.order_book_fee_rate)
+        self.fee_schedule.load_from_db()
+        
+        # Fee, gas and sizing estimates for what detection finds
+        from profit_calculator import ProfitCalculator  # Imported here to avoid circular imports
+        self.profit_calculator = ProfitCalculator(fee_schedule=self.fee_schedule)
+        self.trade_value = 1000.0  # Quote amount each opportunity is priced for
+        
+        # Streaming feed state
+        self.price_stream = None
+        self.shard_pool = None  # Sharded polling processes, see start_shards
+        self.stream_opportunities = {}  # symbol -> latest OpportunityData detected from the stream
+        self._stream_lock = threading.RLock()  # Guards the detector, cycle graph and stream_opportunities across threads
         
         # Initialize Uniswap V3 interface
+        self.uniswap = None
+        if connect_uniswap:
+            self.connect_uniswap()
+            
+        logger.info("ExchangeScanner initialized")
+    
+    def connect_uniswap(self):
+        """Create the Uniswap V3 interface (blocks until the RPC node answers)"""
         try:
             self.uniswap = UniswapV3Interface(db=self.db)
             logger.info("Uniswap V3 interface initialized")
         except Exception as e:
             logger.error(f"Failed to initialize Uniswap V3 interface: {str(e)}")
             self.uniswap = None
+        return self.uniswap
+    
+    def warm_up(self, exchange_configs, connect_uniswap=True):
+        """
+        Create every active exchange and load its markets before the first scan
+        
+        Exchange instances are built in a thread pool and their markets loaded
+        concurrently, while the Uniswap RPC connection is made on the calling
+        thread (it reads its configuration from the database).
+        
+        Args:
+            exchange_configs: List of ExchangeConfig objects from the database
+            connect_uniswap: Whether to connect to Uniswap V3 if not connected yet
             
-        logger.info("ExchangeScanner initialized")
+        Returns:
+            Dictionary of warm-up phase -> seconds taken
+        """
+        timings = {}
+        use_async = self.concurrent_scan
+        configs = [config for config in exchange_configs if config.is_active]
+        
+        def warm_exchanges():
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=max(1, len(configs))) as pool:
+                exchanges = [exchange for exchange in pool.map(
+                    lambda config: self._initialize_exchange(config, use_async=use_async, load_markets=False),
+                    configs) if exchange is not None]
+            timings['exchanges'] = time.perf_counter() - start
+            
+            start = time.perf_counter()
+            if use_async:
+                async def load_all():
+                    await asyncio.gather(*[self.market_cache.load_async(exchange) for exchange in exchanges])
+                self._run_async(load_all())
+            else:
+                with ThreadPoolExecutor(max_workers=max(1, len(exchanges))) as pool:
+                    list(pool.map(self.market_cache.load, exchanges))
+            timings['markets'] = time.perf_counter() - start
+        
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            exchanges_done = pool.submit(warm_exchanges)
+            if connect_uniswap and self.uniswap is None:
+                start = time.perf_counter()
+                self.connect_uniswap()
+                timings['uniswap'] = time.perf_counter() - start
+            exchanges_done.result()
+        
+        logger.info("Scanner warm-up: " + ", ".join(f"{phase} {seconds:.2f}s" for phase, seconds in timings.items()))
+        return timings
     
-    def _initialize_exchange(self, exchange_config):
-        """Initialize an exchange connection"""
+    def _initialize_exchange(self, exchange_config, use_async=False, load_markets=True):
+        """
+        Initialize an exchange connection
+        
+        Args:
+            exchange_config: ExchangeConfig object from the database
+            use_async: Whether to create a ccxt.async_support instance for concurrent scans
+            load_markets: Whether to load the exchange's markets now (warm_up loads them in bulk)
+            
+        Returns:
+            ccxt exchange instance, or None if it could not be created
+        """
         exchange_id = exchange_config.exchange_name
+        instances = self.async_exchange_instances if use_async else self.exchange_instances
         
         # Check if we have already initialized this exchange
-        if exchange_id in self.exchange_instances:
-            return self.exchange_instances[exchange_id]
+        if exchange_id in instances:
+            return instances[exchange_id]
         
         # Initialize the exchange
         try:
-            exchange_class = getattr(ccxt, exchange_id)
+            exchange_class = getattr(ccxt_async if use_async else ccxt, exchange_id)
             exchange_params = {}
             
             # Add API credentials if available
@@ -89,15 +204,28 @@ class ExchangeScanner:
                 exchange_params['apiKey'] = exchange_config.api_key
                 exchange_params['secret'] = exchange_config.api_secret
             
-            # Additional common settings
-            exchange_params['enableRateLimit'] = True
+            # Async requests are paced by our RateLimiter; ccxt's own throttler on top would
+            # double every wait. The serial scan path has no limiter and keeps ccxt's.
+            exchange_params['enableRateLimit'] = not use_async
             
             # Create exchange instance
             exchange = exchange_class(exchange_params)
-            self.exchange_instances[exchange_id] = exchange
-            self.rate_limiters[exchange_id] = RateLimiter()
+            instances[exchange_id] = exchange
+            if exchange_id not in self.rate_limiters:
+                # Budget from the venue's declared rateLimit, shared across workers via RATE_LIMIT_BACKEND
+                self.rate_limiters[exchange_id] = RateLimiter.for_exchange(exchange)
+            
+            # Detect whether the venue can return several tickers in one request
+            if exchange_id not in self.batch_ticker_support:
+                self.batch_ticker_support[exchange_id] = bool(exchange.has.get('fetchTickers'))
             
-            logger.info(f"Initialized exchange: {exchange_id}")
+            # Load markets once; venues whose markets cannot be loaded are queried for every symbol
+            if load_markets and use_async:
+                self._run_async(self.market_cache.load_async(exchange))
+            elif load_markets:
+                self.market_cache.load(exchange)
+            
+            logger.info(f"Initialized {'async ' if use_async else ''}exchange: {exchange_id}")
             return exchange
         
         except Exception as e:
@@ -110,13 +238,140 @@ class ExchangeScanner:
             # Apply rate limiting
             await self.rate_limiters[exchange.id].wait()
             
-            # Fetch ticker
-            ticker = await exchange.fetch_ticker(symbol)
+            # Fetch ticker, abandoning it if the venue is too slow
+            ticker = await asyncio.wait_for(exchange.fetch_ticker(symbol), timeout=self.request_timeout)
             return ticker
+        except asyncio.TimeoutError:
+            logger.warning(f"Timed out after {self.request_timeout}s fetching {symbol} from {exchange.id}")
+            return None
         except Exception as e:
             logger.error(f"Error fetching ticker for {symbol} from {exchange.id}: {str(e)}")
             return None
     
+    async def _fetch_tickers(self, exchange, symbols):
+        """
+        Fetch tickers for all symbols from an exchange
+        
+        Uses a single fetch_tickers request where the venue supports it and falls
+        back to concurrent per-symbol requests otherwise.
+        
+        Args:
+            exchange: ccxt.async_support exchange instance
+            symbols: List of symbols to fetch
+            
+        Returns:
+            Dictionary of symbol -> ticker for the symbols that could be fetched
+        """
+        if len(symbols) > 1 and self.batch_ticker_support.get(exchange.id):
+            try:
+                await self.rate_limiters[exchange.id].wait(fetch_tickers_cost(exchange.id))
+                tickers = await asyncio.wait_for(exchange.fetch_tickers(symbols), timeout=self.request_timeout)
+                return {symbol: tickers[symbol] for symbol in symbols if symbol in tickers}
+            except asyncio.TimeoutError:
+                logger.warning(f"Timed out after {self.request_timeout}s fetching tickers from {exchange.id}")
+                return {}
+            except ccxt.NotSupported as e:
+                logger.warning(f"{exchange.id} does not support batched tickers, using per-symbol requests: {str(e)}")
+                self.batch_ticker_support[exchange.id] = False
+            except ccxt.BadSymbol as e:
+                # One unlisted symbol rejects the whole batch, so fetch the rest individually
+                logger.warning(f"{exchange.id} rejected batched tickers, using per-symbol requests: {str(e)}")
+            except Exception as e:
+                logger.error(f"Error fetching tickers from {exchange.id}: {str(e)}")
+                return {}
+        
+        tickers = await asyncio.gather(*[self._fetch_ticker(exchange, symbol) for symbol in symbols])
+        return {symbol: ticker for symbol, ticker in zip(symbols, tickers) if ticker}
+    
+    def _ticker_to_price(self, ticker):
+        """Convert a ccxt ticker into the price record used for opportunity detection"""
+        if not ticker:
+            return None
+        
+        price = ticker.get('last')
+        if not price and ticker.get('bid') and ticker.get('ask'):
+            price = (ticker['bid'] + ticker['ask']) / 2
+        if not price:
+            return None
+        
+        return {
+            'price': price,
+            'bid': ticker.get('bid', 0),
+            'ask': ticker.get('ask', 0),
+            'volume': ticker.get('quoteVolume', 0),
+            'timestamp': ticker.get('timestamp', 0)
+        }
+    
+    async def _collect_prices_async(self, exchanges, symbols_to_check):
+        """
+        Fetch tickers from every exchange concurrently
+        
+        Uniswap prices are read in a worker thread alongside the exchange requests,
+        so the scan takes as long as the slowest venue rather than the sum of all calls.
+        Tickers that fail or time out are simply left out of the result.
+        
+        Args:
+            exchanges: List of ccxt.async_support exchange instances
+            symbols_to_check: List of symbols to fetch
+            
+        Returns:
+            Dictionary of exchange id -> symbol -> price record
+        """
+        uniswap_task = None
+        if self.uniswap:
+            loop = asyncio.get_running_loop()
+            uniswap_task = loop.run_in_executor(None, self.get_uniswap_prices, symbols_to_check)
+        
+        results = await asyncio.gather(*[self._fetch_tickers(exchange, self.symbol_index.symbols_for(exchange.id, symbols_to_check))
+                                         for exchange in exchanges])
+        
+        exchange_prices = {}
+        for exchange, tickers in zip(exchanges, results):
+            exchange_prices[exchange.id] = {}
+            for symbol, ticker in tickers.items():
+                price = self._ticker_to_price(ticker)
+                if price:
+                    exchange_prices[exchange.id][symbol] = price
+        
+        if uniswap_task is not None:
+            try:
+                uniswap_prices = await uniswap_task
+                if uniswap_prices:
+                    exchange_prices['uniswap_v3'] = uniswap_prices
+            except Exception as e:
+                logger.error(f"Error getting Uniswap prices: {str(e)}")
+        
+        return exchange_prices
+    
+    def _run_async(self, coro):
+        """
+        Run a coroutine on the scanner's own event loop
+        
+        The loop is kept alive between scans because ccxt.async_support instances
+        hold HTTP sessions that are bound to the loop they were first used on.
+        """
+        if self._loop is None or self._loop.is_closed():
+            self._loop = asyncio.new_event_loop()
+        return self._loop.run_until_complete(coro)
+    
+    def close(self):
+        """Close async exchange sessions and the scanner event loop"""
+        if self.tick_archive is not None:
+            self.tick_archive.close()
+        if self._loop is None or self._loop.is_closed():
+            return
+        
+        async def _close_all():
+            for exchange in self.async_exchange_instances.values():
+                try:
+                    await exchange.close()
+                except Exception as e:
+                    logger.error(f"Error closing exchange {exchange.id}: {str(e)}")
+        
+        self._loop.run_until_complete(_close_all())
+        self._loop.close()
+        self.async_exchange_instances = {}
+    
     def get_token_pair_symbol(self, token_pair):
         """Convert a TokenPair database object to a ccxt symbol format"""
         return f"{token_pair.base_token}/{token_pair.quote_token}"
@@ -138,29 +393,449 @@ class ExchangeScanner:
         uniswap_prices = {}
         current_timestamp = int(time.time() * 1000)  # Current time in milliseconds
         
-        # Check which symbols are supported by Uniswap
-        supported_pairs = self.uniswap.get_exchange_data().get('supported_pairs', [])
+        # Check which symbols have a Uniswap pool (resolved once, then served from the pool registry)
+        symbols = self.uniswap.supported_symbols(symbols_to_check)
+        self.symbol_index.update('uniswap_v3', self.uniswap.get_exchange_data()['supported_pairs'])
+        if not symbols:
+            return {}
         
-        for symbol in symbols_to_check:
-            if symbol in supported_pairs:
+        # Read every pool of every supported pair in one multicall snapshot
+        try:
+            prices = self.uniswap.get_token_pair_prices(symbols)
+        except Exception as e:
+            logger.error(f"Error getting Uniswap prices: {str(e)}")
+            return {}
+        
+        for symbol, price in prices.items():
+            uniswap_prices[symbol] = {
+                'price': price,
+                # For Uniswap, we don't have separate bid/ask so use price for both
+                'bid': price,
+                'ask': price,
+                # We don't have volume data from our simple implementation
+                'volume': 0,
+                'timestamp': current_timestamp
+            }
+            logger.info(f"Got Uniswap V3 price for {symbol}: {price}")
+        
+        # Each pair is priced from its deepest pool, whose fee tier is the swap fee
+        self.fee_schedule.set_uniswap_fee_tiers(self.uniswap.price_fee_tiers)
+        
+        return uniswap_prices
+        
+    def _collect_prices(self, exchanges, symbols_to_check):
+        """
+        Fetch tickers one at a time from every exchange (serial scan mode)
+        
+        Args:
+            exchanges: List of synchronous ccxt exchange instances
+            symbols_to_check: List of symbols to fetch
+            
+        Returns:
+            Dictionary of exchange id -> symbol -> price record
+        """
+        exchange_prices = {}
+        
+        for exchange in exchanges:
+            exchange_prices[exchange.id] = {}
+            listed_symbols = self.symbol_index.symbols_for(exchange.id, symbols_to_check)
+            
+            if len(listed_symbols) > 1 and self.batch_ticker_support.get(exchange.id):
+                try:
+                    tickers = exchange.fetch_tickers(listed_symbols)
+                    for symbol in listed_symbols:
+                        price = self._ticker_to_price(tickers.get(symbol))
+                        if price:
+                            exchange_prices[exchange.id][symbol] = price
+                    continue
+                except ccxt.NotSupported as e:
+                    logger.warning(f"{exchange.id} does not support batched tickers, using per-symbol requests: {str(e)}")
+                    self.batch_ticker_support[exchange.id] = False
+                except ccxt.BadSymbol as e:
+                    # One unlisted symbol rejects the whole batch, so fetch the rest individually
+                    logger.warning(f"{exchange.id} rejected batched tickers, using per-symbol requests: {str(e)}")
+                except Exception as e:
+                    logger.error(f"Error fetching tickers from {exchange.id}: {str(e)}")
+                    continue
+            
+            for symbol in listed_symbols:
+                if symbol in exchange_prices[exchange.id]:
+                    continue
                 try:
-                    price = self.uniswap.get_token_pair_price(symbol)
+                    ticker = exchange.fetch_ticker(symbol)
+                    price = self._ticker_to_price(ticker)
                     if price:
-                        uniswap_prices[symbol] = {
-                            'price': price,
-                            # For Uniswap, we don't have separate bid/ask so use price for both
-                            'bid': price,
-                            'ask': price,
-                            # We don't have volume data from our simple implementation
-                            'volume': 0,
-                            'timestamp': current_timestamp
-                        }
-                        logger.info(f"Got Uniswap V3 price for {symbol}: {price}")
+                        exchange_prices[exchange.id][symbol] = price
                 except Exception as e:
-                    logger.error(f"Error getting Uniswap price for {symbol}: {str(e)}")
+                    logger.error(f"Error fetching {symbol} from {exchange.id}: {str(e)}")
+                    continue
+                    
+        # Add Uniswap V3 prices if available
+        if self.uniswap:
+            uniswap_prices = self.get_uniswap_prices(symbols_to_check)
+            if uniswap_prices:
+                exchange_prices['uniswap_v3'] = uniswap_prices
         
-        return uniswap_prices
+        return exchange_prices
+    
+    def _find_opportunities(self, exchange_prices, symbols_to_check):
+        """
+        Compare collected prices across exchanges and build opportunities
+        
+        Prices are fed into the incremental detector, which only recomputes the
+        spread for symbols whose quotes actually changed since the last scan.
+        
+        Args:
+            exchange_prices: Dictionary of exchange id -> symbol -> price record
+            symbols_to_check: List of symbols to compare
+            
+        Returns:
+            List of OpportunityData objects
+        """
+        opportunities = []
         
+        for symbol in symbols_to_check:
+            # Venues that did not return a price this scan no longer count
+            for exchange_id in self.detector.venues(symbol):
+                if symbol not in exchange_prices.get(exchange_id, {}):
+                    self.detector.remove(exchange_id, symbol)
+            
+            for exchange_id, symbols in exchange_prices.items():
+                record = symbols.get(symbol)
+                if record is None:
+                    continue
+                book = self.detector.books.get(symbol)
+                if book is not None and book.records.get(exchange_id) == record:
+                    continue  # Unchanged quote, nothing to recompute
+                self.detector.update(exchange_id, symbol, record)
+            
+            opportunity = self.detector.get_opportunity(symbol)
+            if opportunity is None:
+                continue
+            
+            opportunities.append(opportunity)
+            
+            logger.info(f"Found opportunity: {symbol} - Buy on {opportunity.buy_exchange} at {opportunity.buy_price:.2f}, "
+                        f"Sell on {opportunity.sell_exchange} at {opportunity.sell_price:.2f}, "
+                        f"Difference: {opportunity.price_difference_percentage:.2f}%")
+        
+        return opportunities
+    
+    def _find_opportunities_matrix(self, exchange_prices, symbols_to_check):
+        """
+        Evaluate every venue pair of every symbol at once and keep the top K per symbol
+        
+        Args:
+            exchange_prices: Dictionary of exchange id -> symbol -> price record
+            symbols_to_check: List of symbols to compare
+            
+        Returns:
+            List of OpportunityData objects still profitable after fees and gas at
+            trade_value, most profitable first
+        """
+        from spread_matrix import SpreadMatrix  # Imported here to avoid circular imports
+        
+        venues = sorted(exchange_prices.keys())
+        if self.spread_matrix is None or not self.spread_matrix.matches(symbols_to_check, venues):
+            self.spread_matrix = SpreadMatrix(symbols_to_check, venues)
+        
+        # Per-symbol rates, so Uniswap legs are charged their pool's fee tier
+        self.spread_matrix.set_fee_schedule(self.fee_schedule)
+        self.spread_matrix.load(exchange_prices)
+        
+        # Price every candidate pair in one pass and only build objects for the ones kept
+        batch = self.spread_matrix.to_batch(self.top_k_pairs, trade_value=self.trade_value)
+        self.profit_calculator.calculate_profit_batch(batch)
+        opportunities = self.spread_matrix.to_opportunities(batch, batch.profitable(),
+                                                            timestamp=int(time.time() * 1000))
+        
+        logger.info(f"Matrix detection kept {len(opportunities)} of {len(batch)} venue pairs with a positive edge "
+                    f"across {len(symbols_to_check)} symbols")
+        return opportunities
+    
+    def estimate_profits(self, opportunities):
+        """
+        Fill in fee, gas and net profit estimates for opportunities not priced yet
+        
+        Matrix detection and order book sizing price their results already; the
+        rest are priced for trade_value of quote currency.
+        
+        Args:
+            opportunities: List of OpportunityData objects
+            
+        Returns:
+            The same list
+        """
+        for opportunity in opportunities:
+            if hasattr(opportunity, 'estimated_profit') or opportunity.buy_price <= 0:
+                continue
+            opportunity.trade_amount = self.trade_value / opportunity.buy_price
+            self.profit_calculator.calculate_profit(opportunity, opportunity.trade_amount)
+        return opportunities
+    
+    def _update_cycle_graph(self, exchange_id, symbol, record):
+        """Feed a price record into the currency graph used for cycle detection"""
+        if '/' not in symbol:
+            return
+        self.cycle_graph.update_ticker(exchange_id, symbol,
+                                      record.get('bid') or record['price'],
+                                      record.get('ask') or record['price'])
+    
+    def _usd_price(self, currency, cycle):
+        """USD price of a currency from the cycle's own legs or the latest quotes, None if unknown"""
+        if currency in STABLECOINS:
+            return 1.0
+        for leg in cycle.legs:
+            base, _, quote = leg.symbol.partition('/')
+            if base == currency and quote in STABLECOINS:
+                return leg.price
+        for stablecoin in STABLECOINS:
+            book = self.detector.books.get(f"{currency}/{stablecoin}")
+            if book is not None:
+                for record in book.records.values():
+                    if record.get('price'):
+                        return record['price']
+        return None
+    
+    def find_cycle_opportunities(self):
+        """
+        Return the triangular and multi-hop cycles in the current currency graph
+        
+        Each cycle is priced with the profit calculator for cycle_trade_size_usd
+        worth of its start currency; cycles whose start currency has no USD
+        quote keep only their gross return.
+        
+        Returns:
+            List of CycleOpportunity objects, best return first
+        """
+        if self.cycle_graph is None:
+            return []
+        with self._stream_lock:
+            cycles = self.cycle_graph.find_cycles(int(time.time() * 1000))
+            for cycle in cycles:
+                price_usd = self._usd_price(cycle.start_currency, cycle)
+                if price_usd:
+                    self.profit_calculator.calculate_cycle_profit(cycle, self.cycle_trade_size_usd / price_usd, price_usd)
+            self.cycle_opportunities = cycles
+        return cycles
+    
+    def _apply_order_books(self, opportunity, buy_book, sell_book):
+        """
+        Size an opportunity by walking the buy venue's asks against the sell venue's bids
+        
+        Returns:
+            (opportunity, buy_curve, sell_curve) for ProfitCalculator.optimize_trade_sizes,
+            or None if either book is missing
+        """
+        if not buy_book or not sell_book:
+            return None
+        
+        result = walk_order_books(buy_book.get('asks') or [], sell_book.get('bids') or [],
+                                  self.fee_schedule.taker_fee(opportunity.buy_exchange, opportunity.token_pair),
+                                  self.fee_schedule.taker_fee(opportunity.sell_exchange, opportunity.token_pair))
+        opportunity.max_trade_size = result.size
+        opportunity.buy_vwap = result.buy_vwap
+        opportunity.sell_vwap = result.sell_vwap
+        opportunity.vwap_profit = result.profit
+        return (opportunity, OrderBookCurve.from_order_book(buy_book, 'buy'),
+                OrderBookCurve.from_order_book(sell_book, 'sell'))
+    
+    def _sizable_opportunities(self, opportunities, instances):
+        """Opportunities with a positive top-of-book spread between venues we hold order books for"""
+        return [opportunity for opportunity in opportunities
+                if opportunity.price_difference > 0
+                and opportunity.buy_exchange in instances
+                and opportunity.sell_exchange in instances]
+    
+    async def _fetch_order_book(self, exchange, symbol):
+        """Fetch an order book with rate limiting and the per-request timeout"""
+        try:
+            await self.rate_limiters[exchange.id].wait(order_book_cost(exchange.id, self.order_book_depth))
+            return await asyncio.wait_for(exchange.fetch_order_book(symbol, self.order_book_depth),
+                                          timeout=self.request_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Timed out after {self.request_timeout}s fetching {symbol} order book from {exchange.id}")
+            return None
+        except Exception as e:
+            logger.error(f"Error fetching {symbol} order book from {exchange.id}: {str(e)}")
+            return None
+    
+    async def _size_opportunities_async(self, opportunities):
+        """Fetch the order books needed by all opportunities concurrently and size them"""
+        sizable = self._sizable_opportunities(opportunities, self.async_exchange_instances)
+        keys = list({(exchange_id, opportunity.token_pair)
+                     for opportunity in sizable
+                     for exchange_id in (opportunity.buy_exchange, opportunity.sell_exchange)})
+        
+        books = await asyncio.gather(*[self._fetch_order_book(self.async_exchange_instances[exchange_id], symbol)
+                                       for exchange_id, symbol in keys])
+        books_by_key = dict(zip(keys, books))
+        
+        sizing = [self._apply_order_books(opportunity,
+                                          books_by_key.get((opportunity.buy_exchange, opportunity.token_pair)),
+                                          books_by_key.get((opportunity.sell_exchange, opportunity.token_pair)))
+                  for opportunity in sizable]
+        self.profit_calculator.optimize_trade_sizes([entry for entry in sizing if entry])
+    
+    def _size_opportunities(self, opportunities):
+        """Fetch order books one at a time and size each opportunity (serial scan mode)"""
+        sizing = []
+        for opportunity in self._sizable_opportunities(opportunities, self.exchange_instances):
+            try:
+                buy_book = self.exchange_instances[opportunity.buy_exchange].fetch_order_book(
+                    opportunity.token_pair, self.order_book_depth)
+                sell_book = self.exchange_instances[opportunity.sell_exchange].fetch_order_book(
+                    opportunity.token_pair, self.order_book_depth)
+                entry = self._apply_order_books(opportunity, buy_book, sell_book)
+                if entry:
+                    sizing.append(entry)
+            except Exception as e:
+                logger.error(f"Error fetching order books for {opportunity.token_pair}: {str(e)}")
+        self.profit_calculator.optimize_trade_sizes(sizing)
+    
+    def _get_symbols_to_check(self, token_pairs):
+        """Return the symbols of active token pairs, or the default symbols if none are configured"""
+        symbols_to_check = []
+        if token_pairs:
+            for pair in token_pairs:
+                if pair.is_active:
+                    symbol = f"{pair.base_token}/{pair.quote_token}"
+                    symbols_to_check.append(symbol)
+        
+        if not symbols_to_check:
+            symbols_to_check = self.default_symbols
+            logger.warning(f"No token pairs configured, using default symbols: {symbols_to_check}")
+
+        return symbols_to_check
+    
+    def start_stream(self, exchange_configs, token_pairs, transport=None):
+        """
+        Start (or restart) the streaming price feed for all active exchanges and pairs
+        
+        Each quote update runs detection for its symbol only; detected opportunities
+        are collected until drain_stream_opportunities is called.
+        
+        Args:
+            exchange_configs: List of ExchangeConfig objects from the database
+            token_pairs: List of TokenPair objects from the database
+            transport: Optional StreamTransport, defaults to ccxt.pro WebSocket clients
+        """
+        active_configs = [config for config in exchange_configs if config.is_active]
+        symbols_to_check = self._get_symbols_to_check(token_pairs)
+        subscriptions = [(config.exchange_name, symbol) for config in active_configs for symbol in symbols_to_check
+                         if self.symbol_index.lists(config.exchange_name, symbol)]
+        
+        if self.price_stream is not None:
+            if sorted(self.price_stream.subscriptions) == sorted(subscriptions):
+                return
+            logger.info("Stream subscriptions changed, restarting price stream")
+            self.price_stream.stop()
+        
+        if transport is None:
+            transport = CcxtProTransport(active_configs)
+        
+        self.price_stream = PriceStream(transport, on_update=self._on_stream_update)
+        for exchange_id, symbol in subscriptions:
+            self.price_stream.subscribe(exchange_id, symbol)
+        self.price_stream.start()
+    
+    def stop_stream(self):
+        """Stop the streaming price feed"""
+        if self.price_stream is not None:
+            self.price_stream.stop()
+            self.price_stream = None
+    
+    def start_shards(self, exchange_configs, token_pairs, shard_count, poll_interval=1.0):
+        """
+        Start or rebalance shard processes polling a hash partition of (venue, symbol) pairs
+        
+        Shards push quotes back to this process, where detection runs exactly as
+        for the streaming feed; collect the results with drain_stream_opportunities.
+        Calling this again with changed configs or pairs restarts only the shards
+        whose partition changed.
+        
+        Args:
+            exchange_configs: List of ExchangeConfig objects from the database
+            token_pairs: List of TokenPair objects from the database
+            shard_count: Number of shard processes
+            poll_interval: Seconds between ticker polls in each shard
+        """
+        from shard_scanner import ShardPool, VenueConfig  # Imported here to avoid circular imports
+        
+        active_configs = [config for config in exchange_configs if config.is_active]
+        symbols_to_check = self._get_symbols_to_check(token_pairs)
+        subscriptions = [(config.exchange_name, symbol) for config in active_configs for symbol in symbols_to_check
+                         if self.symbol_index.lists(config.exchange_name, symbol)]
+        
+        if self.shard_pool is not None and self.shard_pool.shard_count != shard_count:
+            logger.info("Shard count changed, restarting shard processes")
+            self.stop_shards()
+        if self.shard_pool is None:
+            self.shard_pool = ShardPool(self._on_stream_update, shard_count, poll_interval)
+        self.shard_pool.update([VenueConfig.from_config(config) for config in active_configs], subscriptions)
+    
+    def stop_shards(self):
+        """Stop the shard processes"""
+        if self.shard_pool is not None:
+            self.shard_pool.stop()
+            self.shard_pool = None
+    
+    def _on_stream_update(self, quote):
+        """Recompute the opportunity for the symbol whose quote just changed"""
+        if self.tick_archive is not None:
+            self.tick_archive.append([quote])
+        record = quote.to_price_record()
+        with self._stream_lock:
+            opportunity = self.detector.update(quote.exchange, quote.symbol, record)
+            if self.cycle_graph is not None:
+                self._update_cycle_graph(quote.exchange, quote.symbol, record)
+            if opportunity:
+                self.stream_opportunities[quote.symbol] = opportunity
+            else:
+                self.stream_opportunities.pop(quote.symbol, None)
+    
+    def refresh_fees_and_uniswap(self, exchange_configs, token_pairs):
+        """
+        Reload due fee schedules and feed Uniswap prices into detection
+        
+        Shards and the price stream only deliver exchange quotes; the scan loop
+        calls this so those modes see the same fees and Uniswap venue as a
+        polling scan.
+        
+        Args:
+            exchange_configs: List of ExchangeConfig objects from the database
+            token_pairs: List of TokenPair objects from the database
+        """
+        symbols_to_check = self._get_symbols_to_check(token_pairs)
+        
+        try:
+            exchanges = [exchange for exchange in (self._initialize_exchange(config, use_async=self.concurrent_scan)
+                                                   for config in exchange_configs if config.is_active)
+                         if exchange is not None]
+            if self.concurrent_scan:
+                self._run_async(self.fee_schedule.refresh_async(exchanges, symbols_to_check))
+            else:
+                self.fee_schedule.refresh(exchanges, symbols_to_check)
+        except Exception as e:
+            logger.error(f"Error refreshing fee schedules: {str(e)}")
+        
+        if self.uniswap:
+            for symbol, record in self.get_uniswap_prices(symbols_to_check).items():
+                self._on_stream_update(Quote(exchange='uniswap_v3', symbol=symbol, bid=record['bid'],
+                                             ask=record['ask'], last=record['price'],
+                                             timestamp=record['timestamp']))
+    
+    def drain_stream_opportunities(self):
+        """
+        Return the opportunities detected from the stream since the last call
+        
+        Returns:
+            List of OpportunityData objects, at most one per symbol
+        """
+        with self._stream_lock:
+            opportunities, self.stream_opportunities = self.stream_opportunities, {}
+        return list(opportunities.values())
+    
     def scan_exchanges(self, exchange_configs, token_pairs):
         """
         Scan all active exchanges for price differences on specified token pairs
@@ -181,7 +856,7 @@ class ExchangeScanner:
                 if not config.is_active:
                     continue
                 
-                exchange = self._initialize_exchange(config)
+                exchange = self._initialize_exchange(config, use_async=self.concurrent_scan)
                 if exchange:
                     active_exchanges.append(exchange)
             
@@ -191,110 +866,45 @@ class ExchangeScanner:
                 return []
             
             # Use default symbols if no token pairs are configured
-            symbols_to_check = []
-            if token_pairs:
-                for pair in token_pairs:
-                    if pair.is_active:
-                        symbol = f"{pair.base_token}/{pair.quote_token}"
-                        symbols_to_check.append(symbol)
+            symbols_to_check = self._get_symbols_to_check(token_pairs)
             
-            if not symbols_to_check:
-                symbols_to_check = self.default_symbols
-                logger.warning(f"No token pairs configured, using default symbols: {symbols_to_check}")
+            # Reload fee schedules that are missing or due for a refresh
+            if self.concurrent_scan:
+                self._run_async(self.fee_schedule.refresh_async(active_exchanges, symbols_to_check))
+            else:
+                self.fee_schedule.refresh(active_exchanges, symbols_to_check)
             
             # Collect price data from all exchanges
-            exchange_prices = {}
+            if self.concurrent_scan:
+                exchange_prices = self._run_async(self._collect_prices_async(active_exchanges, symbols_to_check))
+            else:
+                exchange_prices = self._collect_prices(active_exchanges, symbols_to_check)
             
-            # For now, use synchronous calls for simplicity
-            for exchange in active_exchanges:
-                exchange_prices[exchange.id] = {}
-                
-                for symbol in symbols_to_check:
-                    try:
-                        ticker = exchange.fetch_ticker(symbol)
-                        if ticker and 'last' in ticker and ticker['last']:
-                            exchange_prices[exchange.id][symbol] = {
-                                'price': ticker['last'],
-                                'bid': ticker.get('bid', 0),
-                                'ask': ticker.get('ask', 0),
-                                'volume': ticker.get('quoteVolume', 0),
-                                'timestamp': ticker.get('timestamp', 0)
-                            }
-                    except Exception as e:
-                        logger.error(f"Error fetching {symbol} from {exchange.id}: {str(e)}")
-                        continue
-                        
-            # Add Uniswap V3 prices if available
-            if self.uniswap:
-                uniswap_prices = self.get_uniswap_prices(symbols_to_check)
-                if uniswap_prices:
-                    exchange_prices['uniswap_v3'] = uniswap_prices
+            if self.tick_archive is not None:
+                self.tick_archive.append_prices(exchange_prices)
             
-            # Find arbitrage opportunities across exchanges
-            for symbol in symbols_to_check:
-                # Get all prices for this symbol across exchanges
-                prices_by_exchange = []
-                
-                for exchange_id, symbols in exchange_prices.items():
-                    if symbol in symbols:
-                        prices_by_exchange.append((
-                            exchange_id,
-                            symbols[symbol]['price'],
-                            symbols[symbol]['volume'],
-                            symbols[symbol]['timestamp']
-                        ))
-                
-                # Sort by price
-                prices_by_exchange.sort(key=lambda x: x[1])
-                
-                # Check if we have at least two exchanges with prices
-                if len(prices_by_exchange) < 2:
-                    continue
-                
-                # Get the lowest and highest prices
-                lowest = prices_by_exchange[0]
-                highest = prices_by_exchange[-1]
-                
-                # Calculate the price difference
-                buy_exchange, buy_price, buy_volume, buy_timestamp = lowest
-                sell_exchange, sell_price, sell_volume, sell_timestamp = highest
-                
-                price_diff = sell_price - buy_price
-                if buy_price <= 0:
-                    continue  # Avoid division by zero
-                
-                price_diff_percentage = (price_diff / buy_price) * 100
-                
-                # Create opportunity object
-                # Handle case where one of the timestamps might be None
-                if buy_timestamp is None and sell_timestamp is None:
-                    current_timestamp = int(time.time() * 1000)  # Current time in milliseconds
-                    timestamp = current_timestamp
-                elif buy_timestamp is None:
-                    timestamp = sell_timestamp
-                elif sell_timestamp is None:
-                    timestamp = buy_timestamp
+            # The detector and cycle graph are shared with stream and shard threads
+            with self._stream_lock:
+                if self.top_k_pairs:
+                    opportunities = self._find_opportunities_matrix(exchange_prices, symbols_to_check)
                 else:
-                    timestamp = max(buy_timestamp, sell_timestamp)
-                
-                opportunity = OpportunityData(
-                    token_pair=symbol,
-                    buy_exchange=buy_exchange,
-                    sell_exchange=sell_exchange,
-                    buy_price=buy_price,
-                    sell_price=sell_price,
-                    price_difference=price_diff,
-                    price_difference_percentage=price_diff_percentage,
-                    buy_volume=buy_volume,
-                    sell_volume=sell_volume,
-                    timestamp=timestamp
-                )
+                    opportunities = self._find_opportunities(exchange_prices, symbols_to_check)
                 
-                opportunities.append(opportunity)
-                
-                logger.info(f"Found opportunity: {symbol} - Buy on {buy_exchange} at {buy_price:.2f}, "
-                            f"Sell on {sell_exchange} at {sell_price:.2f}, "
-                            f"Difference: {price_diff_percentage:.2f}%")
+                # Look for multi-hop cycles over everything fetched this scan
+                if self.cycle_graph is not None:
+                    for exchange_id, symbols in exchange_prices.items():
+                        for symbol, record in symbols.items():
+                            self._update_cycle_graph(exchange_id, symbol, record)
+                    cycles = self.find_cycle_opportunities()
+                    if cycles:
+                        logger.info(f"Found {len(cycles)} multi-hop cycles, best return {cycles[0].gross_return * 100:.3f}%")
+            
+            # Size opportunities against real depth if order book mode is enabled
+            if self.order_book_depth and opportunities:
+                if self.concurrent_scan:
+                    self._run_async(self._size_opportunities_async(opportunities))
+                else:
+                    self._size_opportunities(opportunities)
             
         except Exception as e:
             logger.error(f"Error in scan_exchanges: {str(e)}")
@@ -0,0 +1,223 @@
+"""
+In-process fake of the JSON WebSocket feed spoken by WebSocketTransport
+
+Pushes deterministic ccxt-shaped tickers and order books for every subscription
+and can drop all connections on demand, so PriceStream can be exercised without
+any exchange. Run it as a local feed for PRICE_FEED=stream, or check that the
+stream delivers quotes and recovers from a dropped connection:
+
+    python fake_stream_server.py --serve --port 8765
+    PRICE_FEED=stream PRICE_STREAM_URL=ws://127.0.0.1:8765 python main.py
+
+    python fake_stream_server.py --check
+"""
+import sys
+import json
+import time
+import zlib
+import asyncio
+import argparse
+import logging
+import threading
+from typing import Dict, Any, Optional, Set
+
+from aiohttp import web, WSMsgType
+
+from price_stream import PriceStream, WebSocketTransport
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class FakeStreamServer:
+    """
+    WebSocket server answering subscribe messages with a stream of updates
+
+    Every `interval` seconds each subscription receives a ticker or order book
+    whose price oscillates around a per-symbol base. The server runs on its own
+    event loop in a background thread.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, interval: float = 0.05):
+        """
+        Args:
+            host: Interface to listen on
+            port: Port to listen on (0 picks a free port)
+            interval: Seconds between updates per subscription
+        """
+        self.host = host
+        self.port = port
+        self.interval = interval
+        self.connection_count = 0
+        self.message_count = 0
+        self._sockets: Set[web.WebSocketResponse] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._runner: Optional[web.AppRunner] = None
+        self._thread: Optional[threading.Thread] = None
+        self._started = threading.Event()
+
+    @property
+    def url(self) -> str:
+        return f"ws://{self.host}:{self.port}"
+
+    @staticmethod
+    def _price(symbol: str, step: int) -> float:
+        base = 100 + zlib.crc32(symbol.encode()) % 1000
+        return base * (1 + 0.001 * ((step % 20) - 10) / 10)
+
+    def _payload(self, subscription: Dict[str, Any], step: int) -> Dict[str, Any]:
+        exchange_id, symbol = subscription['exchange'], subscription['symbol']
+        # Venues are skewed against each other so detection has something to find
+        price = self._price(symbol, step) * (1 + (zlib.crc32(exchange_id.encode()) % 11 - 5) / 10000)
+        timestamp = int(time.time() * 1000)
+        if subscription['channel'] == 'orderbook':
+            depth = subscription.get('limit') or 5
+            data = {
+                'bids': [[price * (1 - 0.0001 * (i + 1)), 1.0] for i in range(depth)],
+                'asks': [[price * (1 + 0.0001 * (i + 1)), 1.0] for i in range(depth)],
+                'timestamp': timestamp
+            }
+        else:
+            data = {'bid': price * 0.9999, 'ask': price * 1.0001, 'last': price,
+                    'quoteVolume': 1000000.0, 'timestamp': timestamp}
+        return {'channel': subscription['channel'], 'exchange': exchange_id, 'symbol': symbol, 'data': data}
+
+    async def _publish(self, ws: web.WebSocketResponse, subscriptions):
+        step = 0
+        while not ws.closed:
+            for subscription in list(subscriptions):
+                await ws.send_str(json.dumps(self._payload(subscription, step)))
+                self.message_count += 1
+            step += 1
+            await asyncio.sleep(self.interval)
+
+    async def _handle(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self._sockets.add(ws)
+        self.connection_count += 1
+        subscriptions = []
+        publisher = asyncio.ensure_future(self._publish(ws, subscriptions))
+        try:
+            async for message in ws:
+                if message.type != WSMsgType.TEXT:
+                    continue
+                try:
+                    request_data = json.loads(message.data)
+                except ValueError:
+                    continue
+                if request_data.get('op') == 'subscribe':
+                    subscriptions.append(request_data)
+        finally:
+            publisher.cancel()
+            self._sockets.discard(ws)
+        return ws
+
+    async def _start(self):
+        app = web.Application()
+        app.router.add_get('/', self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = self._runner.addresses[0][1]
+
+    def start(self):
+        """Start serving in a background thread; returns once the port is bound"""
+        def _run():
+            self._loop = asyncio.new_event_loop()
+            self._loop.run_until_complete(self._start())
+            self._started.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=_run, daemon=True)
+        self._thread.start()
+        self._started.wait(timeout=5)
+        logger.info(f"Fake stream server listening on {self.url}")
+
+    def drop_connections(self):
+        """Close every client connection, as a venue would on a network drop"""
+        async def _drop():
+            for ws in list(self._sockets):
+                await ws.close()
+        asyncio.run_coroutine_threadsafe(_drop(), self._loop).result(timeout=5)
+
+    def stop(self):
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result(timeout=5)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+
+def _wait_for(condition, timeout: float) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return condition()
+
+def check_stream(timeout: float = 10.0) -> bool:
+    """
+    Check that PriceStream delivers quotes from the fake server and resumes after a drop
+
+    Returns:
+        True if both checks passed
+    """
+    server = FakeStreamServer()
+    server.start()
+    received = []
+    stream = PriceStream(WebSocketTransport(server.url), on_update=received.append)
+    stream.reconnect_delay = 0.1
+    for exchange_id in ("venue_a", "venue_b"):
+        for symbol in ("BTC/USDT", "ETH/USDT"):
+            stream.subscribe(exchange_id, symbol)
+    stream.start()
+
+    try:
+        if not _wait_for(lambda: len(stream.quotes) == len(stream.subscriptions), timeout):
+            logger.error(f"Only {len(stream.quotes)} of {len(stream.subscriptions)} subscriptions received quotes")
+            return False
+        logger.info(f"Received {len(received)} updates for {len(stream.quotes)} subscriptions")
+
+        server.drop_connections()
+        dropped_at = len(received)
+        if not _wait_for(lambda: server.connection_count >= 2 and len(received) > dropped_at + len(stream.subscriptions),
+                         timeout):
+            logger.error(f"Stream did not resume after the connection dropped "
+                         f"({server.connection_count} connections, {len(received) - dropped_at} updates since)")
+            return False
+        logger.info(f"Reconnected and received {len(received) - dropped_at} more updates")
+        return True
+    finally:
+        stream.stop()
+        server.stop()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fake JSON WebSocket market data feed")
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument("--serve", action="store_true", help="Serve the feed until interrupted")
+    mode.add_argument("--check", action="store_true", help="Check PriceStream delivery and reconnects, then exit")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on")
+    parser.add_argument("--interval", type=float, default=0.05, help="Seconds between updates per subscription")
+    args = parser.parse_args(argv)
+
+    if args.check:
+        passed = check_stream()
+        print("PriceStream check " + ("passed" if passed else "failed"))
+        return 0 if passed else 1
+
+    server = FakeStreamServer(args.host, args.port, args.interval)
+    server.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,189 @@
+import os
+import logging
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional, Tuple
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+VENUE_DEFAULT = '*'  # Symbol key of a venue-wide fee
+UNISWAP_VENUE = 'uniswap_v3'
+
+class FeeSchedule:
+    """
+    Maker/taker fees per venue and symbol
+
+    Fees are loaded once per venue from ccxt (fetch_trading_fees when the account
+    can call it, otherwise the fees declared in the venue's markets), stored in the
+    exchange_fee table linked to ExchangeConfig, and refreshed after
+    refresh_interval. Lookups are served from an in-memory dict keyed by
+    (venue, symbol) and fall back to the venue-wide fee, then to the default.
+    """
+
+    def __init__(self, db=None, default_taker: float = 0.001, default_maker: float = 0.001,
+                 refresh_interval: Optional[float] = None):
+        """
+        Args:
+            db: Optional Flask-SQLAlchemy database used to persist fees
+            default_taker: Taker fee rate used for venues and symbols without data
+            default_maker: Maker fee rate used for venues and symbols without data
+            refresh_interval: Seconds before a venue's fees are reloaded
+        """
+        self.db = db
+        self.default_taker = default_taker
+        self.default_maker = default_maker
+        self.refresh_interval = refresh_interval or float(os.getenv("FEE_REFRESH_INTERVAL", str(24 * 3600)))
+        self._fees: Dict[Tuple[str, str], Tuple[float, float]] = {}  # (venue, symbol) -> (maker, taker)
+        self._refreshed_at: Dict[str, float] = {}
+        self.version = 0  # Bumped whenever a fee changes, so derived fee tables can be cached
+
+    def set_fee(self, venue: str, symbol: str, maker: float, taker: float):
+        """Set the fee of a venue's symbol (VENUE_DEFAULT for the venue-wide fee)"""
+        if self._fees.get((venue, symbol)) != (maker, taker):
+            self._fees[(venue, symbol)] = (maker, taker)
+            self.version += 1
+
+    def _lookup(self, venue: str, symbol: Optional[str]) -> Optional[Tuple[float, float]]:
+        fees = self._fees.get((venue, symbol)) if symbol else None
+        return fees or self._fees.get((venue, VENUE_DEFAULT))
+
+    def taker_fee(self, venue: str, symbol: Optional[str] = None) -> float:
+        """Taker fee rate for a venue and symbol"""
+        fees = self._lookup(venue, symbol)
+        return fees[1] if fees else self.default_taker
+
+    def maker_fee(self, venue: str, symbol: Optional[str] = None) -> float:
+        """Maker fee rate for a venue and symbol"""
+        fees = self._lookup(venue, symbol)
+        return fees[0] if fees else self.default_maker
+
+    def venue_fee_rates(self) -> Dict[str, float]:
+        """Venue-wide taker fee rate of every venue with fee data"""
+        return {venue: fees[1] for (venue, symbol), fees in self._fees.items() if symbol == VENUE_DEFAULT}
+
+    def symbol_fee_rates(self) -> Dict[Tuple[str, str], float]:
+        """Taker fee rate of every (venue, symbol) with its own fee, overriding the venue-wide one"""
+        return {key: fees[1] for key, fees in self._fees.items() if key[1] != VENUE_DEFAULT}
+
+    def set_uniswap_fee_tiers(self, fee_tiers: Dict[str, int]):
+        """
+        Record the pool fee tier each Uniswap pair is priced from
+
+        Args:
+            fee_tiers: Dictionary of symbol -> fee tier in hundredths of a bip
+        """
+        for symbol, fee in fee_tiers.items():
+            rate = fee / 1_000_000
+            self.set_fee(UNISWAP_VENUE, symbol, rate, rate)
+
+    def needs_refresh(self, venue: str) -> bool:
+        refreshed_at = self._refreshed_at.get(venue)
+        return refreshed_at is None or time.time() - refreshed_at > self.refresh_interval
+
+    def _apply(self, venue: str, markets: Dict[str, Any], trading_fees: Optional[Dict[str, Any]],
+               exchange_fees: Dict[str, Any], symbols: List[str]) -> int:
+        """Store the fees of the given symbols from ccxt data; returns the number stored"""
+        venue_fees = (exchange_fees or {}).get('trading') or {}
+        if venue_fees.get('taker') is not None:
+            self.set_fee(venue, VENUE_DEFAULT,
+                         venue_fees.get('maker', venue_fees['taker']), venue_fees['taker'])
+
+        stored = 0
+        for symbol in symbols:
+            entry = (trading_fees or {}).get(symbol) or markets.get(symbol)
+            if not entry or entry.get('taker') is None:
+                continue
+            self.set_fee(venue, symbol, entry.get('maker', entry['taker']), entry['taker'])
+            stored += 1
+
+        self._refreshed_at[venue] = time.time()
+        return stored
+
+    @staticmethod
+    def _can_fetch_trading_fees(exchange) -> bool:
+        # Account-specific fees need credentials on most venues
+        return bool(exchange.has.get('fetchTradingFees')) and bool(getattr(exchange, 'apiKey', None))
+
+    def load_exchange(self, exchange, symbols: List[str]) -> Optional[int]:
+        """Load a venue's fees with a synchronous ccxt instance; None if loading failed"""
+        try:
+            markets = exchange.load_markets()
+            trading_fees = exchange.fetch_trading_fees() if self._can_fetch_trading_fees(exchange) else None
+        except Exception as e:
+            logger.error(f"Error loading fees for {exchange.id}: {str(e)}")
+            return None
+        return self._apply(exchange.id, markets, trading_fees, exchange.fees, symbols)
+
+    async def load_exchange_async(self, exchange, symbols: List[str]) -> Optional[int]:
+        """Load a venue's fees with a ccxt.async_support instance; None if loading failed"""
+        try:
+            markets = await exchange.load_markets()
+            trading_fees = await exchange.fetch_trading_fees() if self._can_fetch_trading_fees(exchange) else None
+        except Exception as e:
+            logger.error(f"Error loading fees for {exchange.id}: {str(e)}")
+            return None
+        return self._apply(exchange.id, markets, trading_fees, exchange.fees, symbols)
+
+    def refresh(self, exchanges: List[Any], symbols: List[str]) -> List[str]:
+        """
+        Reload fees of venues whose schedule is missing or older than refresh_interval
+
+        Returns:
+            Ids of the venues that were refreshed
+        """
+        refreshed = [exchange.id for exchange in exchanges
+                     if self.needs_refresh(exchange.id) and self.load_exchange(exchange, symbols) is not None]
+        if refreshed:
+            self.save_to_db(refreshed)
+        return refreshed
+
+    async def refresh_async(self, exchanges: List[Any], symbols: List[str]) -> List[str]:
+        """Concurrent version of refresh for ccxt.async_support instances"""
+        stale = [exchange for exchange in exchanges if self.needs_refresh(exchange.id)]
+        counts = await asyncio.gather(*[self.load_exchange_async(exchange, symbols) for exchange in stale])
+        refreshed = [exchange.id for exchange, count in zip(stale, counts) if count is not None]
+        if refreshed:
+            self.save_to_db(refreshed)
+        return refreshed
+
+    def load_from_db(self) -> int:
+        """Warm the in-memory schedule from the exchange_fee table"""
+        if self.db is None:
+            return 0
+        from models import ExchangeConfig, ExchangeFee  # Imported here to avoid circular imports
+
+        try:
+            rows = self.db.session.query(ExchangeFee, ExchangeConfig.exchange_name).join(ExchangeConfig).all()
+        except Exception as e:
+            self.db.session.rollback()
+            logger.error(f"Error loading fee schedule from database: {str(e)}")
+            return 0
+
+        for fee, venue in rows:
+            self.set_fee(venue, fee.symbol, fee.maker, fee.taker)
+            updated_at = fee.updated_at.replace(tzinfo=timezone.utc).timestamp() if fee.updated_at else 0
+            self._refreshed_at[venue] = max(self._refreshed_at.get(venue, 0), updated_at)
+        logger.info(f"Loaded {len(rows)} fee entries from the database")
+        return len(rows)
+
+    def save_to_db(self, venues: List[str]):
+        """Replace the stored fees of the given venues with the in-memory schedule"""
+        if self.db is None:
+            return
+        from models import ExchangeConfig, ExchangeFee  # Imported here to avoid circular imports
+
+        try:
+            configs = self.db.session.query(ExchangeConfig).filter(ExchangeConfig.exchange_name.in_(venues)).all()
+            for config in configs:
+                ExchangeFee.query.filter_by(exchange_id=config.id).delete()
+                for (venue, symbol), (maker, taker) in self._fees.items():
+                    if venue == config.exchange_name:
+                        self.db.session.add(ExchangeFee(exchange_id=config.id, symbol=symbol, maker=maker,
+                                                        taker=taker, updated_at=datetime.utcnow()))
+            self.db.session.commit()
+        except Exception as e:
+            self.db.session.rollback()
+            logger.error(f"Error saving fee schedule: {str(e)}")
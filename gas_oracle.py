@@ -0,0 +1,135 @@
+import logging
+import threading
+import time
+from statistics import median
+from typing import Optional
+from dataclasses import dataclass
+from uniswap_interface import TOKEN_ADDRESSES, TOKEN_DECIMALS
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+@dataclass(frozen=True)
+class GasSnapshot:
+    """Gas and ETH price readings taken together"""
+    base_fee_gwei: float  # Base fee of the next block
+    priority_fee_gwei: float  # Median tip paid over the recent blocks
+    eth_price_usd: float
+    block_number: int
+    updated_at: float  # time.time() of the reading
+
+    @property
+    def gas_price_gwei(self) -> float:
+        return self.base_fee_gwei + self.priority_fee_gwei
+
+    def gas_cost_usd(self, gas_units: int) -> float:
+        """USD cost of spending gas_units at the snapshot's gas price"""
+        return gas_units * self.gas_price_gwei * 1e-9 * self.eth_price_usd
+
+class GasOracle:
+    """
+    Background tracker of EIP-1559 fees and the ETH/USD price
+
+    Each refresh reads eth_feeHistory over the last few block headers (next block's
+    base fee and the median priority fee) and the WETH/USDT pool price. The result
+    is published as one immutable GasSnapshot by a single reference assignment, so
+    readers never take a lock or do any I/O.
+    """
+
+    def __init__(self, uniswap, poll_interval: float = 12.0, fee_history_blocks: int = 5,
+                 priority_percentile: float = 50.0, eth_symbol: str = "ETH/USDT"):
+        """
+        Args:
+            uniswap: UniswapV3Interface providing the web3 connection and pool prices
+            poll_interval: Seconds between refreshes (about one block)
+            fee_history_blocks: Number of recent blocks whose tips are considered
+            priority_percentile: Percentile of each block's tips to sample
+            eth_symbol: Uniswap pair used for the ETH/USD price
+        """
+        self.uniswap = uniswap
+        self.web3 = uniswap.web3
+        self.poll_interval = poll_interval
+        self.fee_history_blocks = fee_history_blocks
+        self.priority_percentile = priority_percentile
+        self.eth_symbol = eth_symbol
+        self.snapshot: Optional[GasSnapshot] = None
+        self._thread = None
+        self._running = False
+
+    def _eth_price_usd(self) -> Optional[float]:
+        """ETH price in USD from the Uniswap pool, adjusted for token decimals"""
+        price = self.uniswap.get_token_pair_prices([self.eth_symbol]).get(self.eth_symbol)
+        if not price:
+            return None
+        base, quote = self.eth_symbol.split('/')
+        decimals_base = TOKEN_DECIMALS[TOKEN_ADDRESSES[base].lower()]
+        decimals_quote = TOKEN_DECIMALS[TOKEN_ADDRESSES[quote].lower()]
+        # Pool prices are in raw units: quote wei per base wei
+        return price * 10**(decimals_base - decimals_quote)
+
+    def refresh(self) -> Optional[GasSnapshot]:
+        """Take a new reading and publish it"""
+        try:
+            history = self.web3.eth.fee_history(self.fee_history_blocks, "latest", [self.priority_percentile])
+            # The last entry is the base fee of the block after the newest one
+            base_fee = history["baseFeePerGas"][-1]
+            tips = [reward[0] for reward in history.get("reward") or [] if reward]
+            priority_fee = median(tips) if tips else self.web3.eth.max_priority_fee
+            block_number = history["oldestBlock"] + len(history["baseFeePerGas"]) - 2
+
+            eth_price = self._eth_price_usd()
+            if eth_price is None:
+                # Keep the previous ETH price rather than dropping the gas reading
+                if self.snapshot is None:
+                    logger.warning("No ETH price available yet, gas oracle not ready")
+                    return None
+                eth_price = self.snapshot.eth_price_usd
+
+            self.snapshot = GasSnapshot(
+                base_fee_gwei=base_fee / 10**9,
+                priority_fee_gwei=priority_fee / 10**9,
+                eth_price_usd=eth_price,
+                block_number=block_number,
+                updated_at=time.time()
+            )
+            return self.snapshot
+        except Exception as e:
+            logger.error(f"Error refreshing gas oracle: {str(e)}")
+            return None
+
+    def get_snapshot(self, max_age: Optional[float] = None) -> Optional[GasSnapshot]:
+        """
+        Return the latest snapshot without any I/O
+
+        Args:
+            max_age: Seconds after which the snapshot is treated as missing
+
+        Returns:
+            GasSnapshot, or None if there is none or it is too old
+        """
+        snapshot = self.snapshot
+        if snapshot is None or (max_age is not None and time.time() - snapshot.updated_at > max_age):
+            return None
+        return snapshot
+
+    def start(self):
+        """Refresh in a background thread"""
+        if self._thread is not None and self._thread.is_alive():
+            logger.info("Gas oracle already running")
+            return
+
+        def _run():
+            while self._running:
+                self.refresh()
+                time.sleep(self.poll_interval)
+
+        self._running = True
+        self._thread = threading.Thread(target=_run)
+        self._thread.daemon = True
+        self._thread.start()
+        logger.info(f"Gas oracle started, refreshing every {self.poll_interval}s")
+
+    def stop(self):
+        """Stop background refreshes"""
+        self._running = False
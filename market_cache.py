@@ -0,0 +1,124 @@
+import os
+import json
+import logging
+import time
+from typing import Dict, Any, List, Optional, Set
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_MARKET_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "instance", "markets")
+
+class SymbolIndex:
+    """Which venues list which symbols"""
+
+    def __init__(self):
+        self._venues: Dict[str, Set[str]] = {}  # symbol -> venues
+        self._symbols: Dict[str, Set[str]] = {}  # venue -> symbols
+
+    def update(self, venue: str, symbols):
+        """Replace the symbols listed by a venue"""
+        for symbol in self._symbols.get(venue, ()):
+            self._venues.get(symbol, set()).discard(venue)
+        self._symbols[venue] = set(symbols)
+        for symbol in self._symbols[venue]:
+            self._venues.setdefault(symbol, set()).add(venue)
+
+    def has_venue(self, venue: str) -> bool:
+        """Whether the venue's listings are known"""
+        return venue in self._symbols
+
+    def lists(self, venue: str, symbol: str) -> bool:
+        """Whether a venue lists a symbol; venues with unknown listings are assumed to"""
+        symbols = self._symbols.get(venue)
+        return symbols is None or symbol in symbols
+
+    def venues_for(self, symbol: str) -> List[str]:
+        return sorted(self._venues.get(symbol, ()))
+
+    def symbols_for(self, venue: str, symbols: Optional[List[str]] = None) -> List[str]:
+        """Symbols listed by a venue, optionally restricted to (and ordered as) `symbols`"""
+        if symbols is None:
+            return sorted(self._symbols.get(venue, ()))
+        return [symbol for symbol in symbols if self.lists(venue, symbol)]
+
+class MarketCache:
+    """
+    ccxt market metadata cached on disk
+
+    load_markets is the slowest request most venues serve and its result rarely
+    changes, so it is fetched once and kept in a JSON file per venue for `ttl`
+    seconds. Restarts restore markets from disk with exchange.set_markets instead.
+    """
+
+    def __init__(self, path: Optional[str] = None, ttl: Optional[float] = None):
+        """
+        Args:
+            path: Directory holding one <exchange id>.json file per venue
+            ttl: Seconds before cached markets are fetched again
+        """
+        self.path = path or os.getenv("MARKET_CACHE_DIR", DEFAULT_MARKET_CACHE_DIR)
+        self.ttl = ttl if ttl is not None else float(os.getenv("MARKET_CACHE_TTL", str(24 * 3600)))
+        self.index = SymbolIndex()
+        os.makedirs(self.path, exist_ok=True)
+
+    def _file(self, exchange_id: str) -> str:
+        return os.path.join(self.path, f"{exchange_id}.json")
+
+    def _read(self, exchange_id: str) -> Optional[Dict[str, Any]]:
+        """Cached markets of a venue, or None if missing or older than the TTL"""
+        try:
+            with open(self._file(exchange_id)) as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if time.time() - cached.get("fetched_at", 0) > self.ttl:
+            return None
+        return cached.get("markets")
+
+    def _write(self, exchange_id: str, markets: Dict[str, Any]):
+        # Write to a temporary file first so a crash never leaves a truncated cache
+        tmp_file = self._file(exchange_id) + ".tmp"
+        try:
+            with open(tmp_file, "w") as f:
+                json.dump({"fetched_at": time.time(), "markets": markets}, f)
+            os.replace(tmp_file, self._file(exchange_id))
+        except (OSError, TypeError, ValueError) as e:
+            logger.error(f"Error caching markets for {exchange_id}: {str(e)}")
+
+    def _restore(self, exchange) -> bool:
+        markets = self._read(exchange.id)
+        if markets is None:
+            return False
+        exchange.set_markets(markets)
+        self.index.update(exchange.id, exchange.symbols or markets.keys())
+        logger.info(f"Restored {len(markets)} {exchange.id} markets from cache")
+        return True
+
+    def _store(self, exchange, markets: Dict[str, Any]):
+        self._write(exchange.id, markets)
+        self.index.update(exchange.id, markets.keys())
+        logger.info(f"Loaded {len(markets)} {exchange.id} markets")
+
+    def load(self, exchange) -> bool:
+        """Load a synchronous ccxt instance's markets from cache or the venue"""
+        if self._restore(exchange):
+            return True
+        try:
+            self._store(exchange, exchange.load_markets())
+            return True
+        except Exception as e:
+            logger.error(f"Error loading markets for {exchange.id}: {str(e)}")
+            return False
+
+    async def load_async(self, exchange) -> bool:
+        """Load a ccxt.async_support instance's markets from cache or the venue"""
+        if self._restore(exchange):
+            return True
+        try:
+            self._store(exchange, await exchange.load_markets())
+            return True
+        except Exception as e:
+            logger.error(f"Error loading markets for {exchange.id}: {str(e)}")
+            return False
@@ -23,10 +23,39 @@ class ArbitrageOpportunity(db.Model):
     execution_time = db.Column(db.DateTime, nullable=True)
     notes = db.Column(db.Text, nullable=True)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # Indexes used by the history views (newest first, per pair, per venue pair) and by retention
+    __table_args__ = (
+        db.Index('ix_opportunity_timestamp', 'timestamp'),
+        db.Index('ix_opportunity_pair_timestamp', 'token_pair', 'timestamp'),
+        db.Index('ix_opportunity_exchanges_timestamp', 'buy_exchange', 'sell_exchange', 'timestamp'),
+    )
 
     def __repr__(self):
         return f"<ArbitrageOpportunity {self.token_pair}: {self.buy_exchange}->{self.sell_exchange}, {self.price_difference_percentage:.2f}%>"
 
+class ArbitrageCycle(db.Model):
+    """A triangular or multi-hop cycle found by the scanner"""
+    id = db.Column(db.Integer, primary_key=True)
+    start_currency = db.Column(db.String(10), nullable=False)
+    venues = db.Column(db.String(255), nullable=False)  # Comma-separated venues the cycle trades on
+    legs = db.Column(db.Text, nullable=False)  # JSON list of legs in execution order
+    leg_count = db.Column(db.Integer, nullable=False)
+    gross_return_percentage = db.Column(db.Float, nullable=False)
+    trade_amount = db.Column(db.Float, nullable=True)  # In the start currency
+    estimated_profit = db.Column(db.Float, nullable=True)  # Net of fees and gas, in USD
+    estimated_profit_percentage = db.Column(db.Float, nullable=True)
+    gas_cost = db.Column(db.Float, nullable=True)
+    exchange_fees = db.Column(db.Float, nullable=True)
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_cycle_timestamp', 'timestamp'),
+    )
+
+    def __repr__(self):
+        return f"<ArbitrageCycle {self.start_currency} over {self.leg_count} legs, {self.gross_return_percentage:.3f}%>"
+
 class ExchangeConfig(db.Model):
     """Configuration for cryptocurrency exchanges"""
     id = db.Column(db.Integer, primary_key=True)
@@ -35,10 +64,25 @@ class ExchangeConfig(db.Model):
     api_secret = db.Column(db.String(100), nullable=True)
     is_active = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    fees = db.relationship('ExchangeFee', backref='exchange', lazy=True, cascade='all, delete-orphan')
 
     def __repr__(self):
         return f"<ExchangeConfig {self.exchange_name}>"
 
+class ExchangeFee(db.Model):
+    """Maker/taker fee of an exchange, per symbol or venue-wide (symbol '*')"""
+    id = db.Column(db.Integer, primary_key=True)
+    exchange_id = db.Column(db.Integer, db.ForeignKey('exchange_config.id'), nullable=False)
+    symbol = db.Column(db.String(30), nullable=False)
+    maker = db.Column(db.Float, nullable=False)
+    taker = db.Column(db.Float, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (db.UniqueConstraint('exchange_id', 'symbol', name='_exchange_symbol_fee_uc'),)
+
+    def __repr__(self):
+        return f"<ExchangeFee {self.exchange_id} {self.symbol} maker={self.maker} taker={self.taker}>"
+
 class TokenPair(db.Model):
     """Trading pairs to monitor for arbitrage"""
     id = db.Column(db.Integer, primary_key=True)
@@ -61,6 +105,20 @@ class Settings(db.Model):
     def __repr__(self):
         return f"<Settings scan_interval={self.scan_interval}s min_profit={self.min_profit_threshold}%>"
         
+class ScannerStatus(db.Model):
+    """Heartbeat of the process running the scanner, read by the web tier"""
+    id = db.Column(db.Integer, primary_key=True)
+    pid = db.Column(db.Integer, nullable=True)
+    mode = db.Column(db.String(10), nullable=True)  # 'thread' or 'worker'
+    started_at = db.Column(db.DateTime, nullable=True)
+    heartbeat_at = db.Column(db.DateTime, nullable=True)
+    last_scan_at = db.Column(db.DateTime, nullable=True)
+    last_opportunity_count = db.Column(db.Integer, default=0)
+    paused = db.Column(db.Boolean, default=False)  # Set by the web tier to pause a separate worker
+
+    def __repr__(self):
+        return f"<ScannerStatus pid={self.pid} mode={self.mode} paused={self.paused}>"
+
 class UniswapConfig(db.Model):
     """Configuration for Uniswap V3 integration"""
     id = db.Column(db.Integer, primary_key=True)
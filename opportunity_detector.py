@@ -0,0 +1,194 @@
+import logging
+import heapq
+import time
+from typing import Dict, Any, Optional, List, Tuple
+from exchange_scanner import OpportunityData
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class SymbolBook:
+    """
+    Best buy/sell venues for one symbol
+
+    Keeps a min-heap of buy prices and a max-heap of sell prices over venues.
+    Superseded entries are discarded lazily when they reach the top of a heap,
+    so an update costs O(log venues) amortized.
+    """
+
+    def __init__(self):
+        self.records: Dict[str, Dict[str, Any]] = {}  # venue -> latest price record
+        self.versions: Dict[str, int] = {}  # venue -> version of its live heap entries
+        self.buy_heap: List[Tuple[float, int, str]] = []  # (buy price, version, venue)
+        self.sell_heap: List[Tuple[float, int, str]] = []  # (-sell price, version, venue)
+        self._version = 0
+
+    def update(self, exchange_id: str, record: Dict[str, Any], buy_price: float, sell_price: float):
+        """Replace the quote for a venue"""
+        self._version += 1
+        self.records[exchange_id] = record
+        self.versions[exchange_id] = self._version
+        heapq.heappush(self.buy_heap, (buy_price, self._version, exchange_id))
+        heapq.heappush(self.sell_heap, (-sell_price, self._version, exchange_id))
+        self._compact()
+
+    def remove(self, exchange_id: str):
+        """Drop a venue; its heap entries become stale"""
+        self.records.pop(exchange_id, None)
+        self.versions.pop(exchange_id, None)
+
+    def _is_live(self, entry: Tuple[float, int, str]) -> bool:
+        return self.versions.get(entry[2]) == entry[1]
+
+    def _compact(self):
+        """Rebuild the heaps once stale entries clearly outnumber live ones"""
+        limit = 2 * len(self.records) + 8
+        if len(self.buy_heap) > limit:
+            self.buy_heap = [entry for entry in self.buy_heap if self._is_live(entry)]
+            heapq.heapify(self.buy_heap)
+        if len(self.sell_heap) > limit:
+            self.sell_heap = [entry for entry in self.sell_heap if self._is_live(entry)]
+            heapq.heapify(self.sell_heap)
+
+    def _top_two(self, heap: List[Tuple[float, int, str]]) -> List[Tuple[float, int, str]]:
+        """Return up to two live entries from the top of a heap"""
+        while heap and not self._is_live(heap[0]):
+            heapq.heappop(heap)
+        if not heap:
+            return []
+
+        first = heapq.heappop(heap)
+        while heap and not self._is_live(heap[0]):
+            heapq.heappop(heap)
+        second = heap[0] if heap else None
+        heapq.heappush(heap, first)
+        return [first, second] if second else [first]
+
+    def best_pair(self) -> Optional[Tuple[str, float, str, float]]:
+        """
+        Return the best (buy venue, buy price, sell venue, sell price) across distinct venues
+        """
+        if len(self.records) < 2:
+            return None
+
+        buys = self._top_two(self.buy_heap)
+        sells = self._top_two(self.sell_heap)
+        if not buys or not sells:
+            return None
+
+        best_buy, best_sell = buys[0], sells[0]
+        if best_buy[2] == best_sell[2]:
+            # The same venue is best on both sides, so pair it with the runner-up on one side
+            candidates = []
+            if len(sells) > 1:
+                candidates.append((best_buy, sells[1]))
+            if len(buys) > 1:
+                candidates.append((buys[1], best_sell))
+            if not candidates:
+                return None
+            best_buy, best_sell = max(candidates, key=lambda pair: -pair[1][0] - pair[0][0])
+
+        return best_buy[2], best_buy[0], best_sell[2], -best_sell[0]
+
+class IncrementalDetector:
+    """
+    Event-driven cross-venue opportunity detection
+
+    Each price update only recomputes the spread for its own symbol, so the cost
+    of a quote change does not grow with the number of tracked pairs.
+    """
+
+    def __init__(self):
+        self.books: Dict[str, SymbolBook] = {}
+        self.opportunities: Dict[str, OpportunityData] = {}  # symbol -> current best opportunity
+
+    def _buy_sell_prices(self, record: Dict[str, Any]) -> Tuple[float, float]:
+        """
+        Prices at which we would buy and sell on a venue
+
+        We buy by lifting the ask and sell by hitting the bid; the last price is
+        only used when a venue does not report that side of the book.
+        """
+        return record.get('ask') or record['price'], record.get('bid') or record['price']
+
+    def update(self, exchange_id: str, symbol: str, record: Dict[str, Any]) -> Optional[OpportunityData]:
+        """
+        Apply a price update for a venue and recompute the opportunity for its symbol
+
+        Args:
+            exchange_id: Venue the price came from
+            symbol: Trading pair symbol
+            record: Price record ('price', 'bid', 'ask', 'volume', 'timestamp')
+
+        Returns:
+            Current best OpportunityData for the symbol, or None if there is none
+        """
+        book = self.books.get(symbol)
+        if book is None:
+            book = SymbolBook()
+            self.books[symbol] = book
+
+        buy_price, sell_price = self._buy_sell_prices(record)
+        book.update(exchange_id, record, buy_price, sell_price)
+        return self._recompute(symbol)
+
+    def remove(self, exchange_id: str, symbol: str) -> Optional[OpportunityData]:
+        """Remove a venue's quote for a symbol (e.g. when it went stale) and recompute"""
+        book = self.books.get(symbol)
+        if book is None or exchange_id not in book.records:
+            return self.opportunities.get(symbol)
+        book.remove(exchange_id)
+        return self._recompute(symbol)
+
+    def venues(self, symbol: str) -> List[str]:
+        """Venues that currently have a quote for a symbol"""
+        book = self.books.get(symbol)
+        return list(book.records.keys()) if book else []
+
+    def get_opportunity(self, symbol: str) -> Optional[OpportunityData]:
+        """Current best opportunity for a symbol"""
+        return self.opportunities.get(symbol)
+
+    def _recompute(self, symbol: str) -> Optional[OpportunityData]:
+        book = self.books[symbol]
+        best = book.best_pair()
+        if best is None:
+            self.opportunities.pop(symbol, None)
+            return None
+
+        buy_exchange, buy_price, sell_exchange, sell_price = best
+        if buy_price <= 0:
+            self.opportunities.pop(symbol, None)
+            return None  # Avoid division by zero
+
+        buy_record = book.records[buy_exchange]
+        sell_record = book.records[sell_exchange]
+        price_diff = sell_price - buy_price
+
+        # Handle case where one of the timestamps might be missing
+        buy_timestamp = buy_record.get('timestamp')
+        sell_timestamp = sell_record.get('timestamp')
+        if buy_timestamp is None and sell_timestamp is None:
+            timestamp = int(time.time() * 1000)  # Current time in milliseconds
+        elif buy_timestamp is None:
+            timestamp = sell_timestamp
+        elif sell_timestamp is None:
+            timestamp = buy_timestamp
+        else:
+            timestamp = max(buy_timestamp, sell_timestamp)
+
+        opportunity = OpportunityData(
+            token_pair=symbol,
+            buy_exchange=buy_exchange,
+            sell_exchange=sell_exchange,
+            buy_price=buy_price,
+            sell_price=sell_price,
+            price_difference=price_diff,
+            price_difference_percentage=(price_diff / buy_price) * 100,
+            buy_volume=buy_record.get('volume', 0),
+            sell_volume=sell_record.get('volume', 0),
+            timestamp=timestamp
+        )
+        self.opportunities[symbol] = opportunity
+        return opportunity
@@ -0,0 +1,350 @@
+import os
+import re
+import json
+import glob
+import logging
+import time
+from datetime import datetime, date, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import create_engine, insert, delete, select, text
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_HISTORY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "instance", "history")
+PARTITION_PREFIX = "arbitrage_opportunity_p"
+HISTORY_FILE_PATTERN = re.compile(r"opportunities-(\d{4}-\d{2}-\d{2})\.db$")
+
+# History layouts:
+#   table        one indexed table, old rows removed with one DELETE on the timestamp index
+#   partitioned  Postgres table partitioned by day, old days removed by dropping their partition
+#   files        SQLite file per day next to a database holding only the last day
+HISTORY_LAYOUTS = ("table", "partitioned", "files")
+
+class OpportunityStore:
+    """
+    Bulk persistence and history of detected opportunities
+
+    Each scan's opportunities are written with one multi-row INSERT and retention
+    is enforced set-based (one DELETE, a partition drop or a file removal), so
+    database time per scan does not grow with the number of opportunities found
+    or with the length of the history.
+    """
+
+    def __init__(self, db, max_rows: Optional[int] = None, retention_days: Optional[float] = None,
+                 layout: Optional[str] = None, history_dir: Optional[str] = None):
+        """
+        Args:
+            db: Flask-SQLAlchemy database
+            max_rows: Optional cap on the rows kept in the database (0 for no cap)
+            retention_days: Days of history to keep
+            layout: One of HISTORY_LAYOUTS
+            history_dir: Directory of the daily files of the 'files' layout
+        """
+        self.db = db
+        self.max_rows = max_rows if max_rows is not None else int(os.getenv("OPPORTUNITY_RETENTION_ROWS", "0"))
+        self.retention_days = retention_days or float(os.getenv("OPPORTUNITY_RETENTION_DAYS", "90"))
+        self.layout = (layout or os.getenv("OPPORTUNITY_HISTORY", "table")).lower()
+        if self.layout not in HISTORY_LAYOUTS:
+            logger.warning(f"Unknown opportunity history layout {self.layout}, using 'table'")
+            self.layout = "table"
+        self.history_dir = history_dir or os.getenv("OPPORTUNITY_HISTORY_DIR", DEFAULT_HISTORY_DIR)
+        self.prune_interval = 60.0  # Seconds between age-based retention passes
+        self._pruned_at = 0.0
+        self._partitions = set()  # Days known to have a partition
+        self._file_engines = {}  # day -> engine of its history file
+
+    @property
+    def _table(self):
+        from models import ArbitrageOpportunity  # Imported here to avoid circular imports
+        return ArbitrageOpportunity.__table__
+
+    def migrate(self):
+        """
+        Bring an existing database up to the history schema
+
+        Adds the history indexes to tables created before they existed and, for the
+        'partitioned' layout, converts the table to day partitions keeping every row.
+        Safe to run on every startup.
+        """
+        dialect = self.db.engine.dialect.name
+        if self.layout == "partitioned" and dialect != "postgresql":
+            logger.warning(f"Day partitions need Postgres, not {dialect}; using the 'table' layout")
+            self.layout = "table"
+
+        try:
+            if self.layout == "partitioned":
+                self._migrate_to_partitions()
+            else:
+                for index in self._table.indexes:
+                    index.create(self.db.engine, checkfirst=True)
+        except Exception as e:
+            logger.error(f"Error migrating opportunity history: {str(e)}")
+
+    def _migrate_to_partitions(self):
+        with self.db.engine.begin() as conn:
+            relkind = conn.execute(text("SELECT relkind FROM pg_class WHERE relname = 'arbitrage_opportunity' "
+                                        "AND relkind IN ('r', 'p')")).scalar()
+            if relkind == "p":
+                return
+
+            logger.info("Converting arbitrage_opportunity to day partitions")
+            conn.execute(text('UPDATE arbitrage_opportunity SET "timestamp" = now() AT TIME ZONE \'utc\' '
+                              'WHERE "timestamp" IS NULL'))
+            for index in self._table.indexes:
+                conn.execute(text(f"DROP INDEX IF EXISTS {index.name}"))
+            conn.execute(text("ALTER TABLE arbitrage_opportunity RENAME TO arbitrage_opportunity_legacy"))
+            conn.execute(text("ALTER TABLE arbitrage_opportunity_legacy "
+                              "RENAME CONSTRAINT arbitrage_opportunity_pkey TO arbitrage_opportunity_legacy_pkey"))
+            # Keep the id sequence alive when the old table is dropped
+            conn.execute(text("ALTER SEQUENCE arbitrage_opportunity_id_seq OWNED BY NONE"))
+            conn.execute(text("CREATE TABLE arbitrage_opportunity (LIKE arbitrage_opportunity_legacy INCLUDING DEFAULTS, "
+                              'PRIMARY KEY (id, "timestamp")) PARTITION BY RANGE ("timestamp")'))
+
+            days = conn.execute(text('SELECT DISTINCT CAST("timestamp" AS date) FROM arbitrage_opportunity_legacy')).scalars()
+            for day in set(days) | {datetime.utcnow().date()}:
+                self._create_partition(conn, day)
+            conn.execute(text("INSERT INTO arbitrage_opportunity SELECT * FROM arbitrage_opportunity_legacy"))
+            conn.execute(text("DROP TABLE arbitrage_opportunity_legacy"))
+            conn.execute(text("ALTER SEQUENCE arbitrage_opportunity_id_seq OWNED BY arbitrage_opportunity.id"))
+
+            # Indexes on the parent are created on every partition, current and future
+            for index in self._table.indexes:
+                index.create(conn)
+
+    def _create_partition(self, conn, day: date):
+        conn.execute(text(f"CREATE TABLE IF NOT EXISTS {PARTITION_PREFIX}{day:%Y%m%d} PARTITION OF arbitrage_opportunity "
+                          f"FOR VALUES FROM ('{day.isoformat()}') TO ('{(day + timedelta(days=1)).isoformat()}')"))
+        self._partitions.add(day)
+
+    def _ensure_partitions(self, timestamp: datetime):
+        """Create the partitions of today and tomorrow before rows are inserted into them"""
+        for day in (timestamp.date(), timestamp.date() + timedelta(days=1)):
+            if day not in self._partitions:
+                self._create_partition(self.db.session, day)
+
+    def _file_engine(self, day: date):
+        engine = self._file_engines.get(day)
+        if engine is None:
+            os.makedirs(self.history_dir, exist_ok=True)
+            engine = create_engine(f"sqlite:///{os.path.join(self.history_dir, f'opportunities-{day.isoformat()}.db')}")
+            self._table.create(engine, checkfirst=True)
+            # Only today's file is written to; close the others
+            for old_day in [old_day for old_day in self._file_engines if old_day != day]:
+                self._file_engines.pop(old_day).dispose()
+            self._file_engines[day] = engine
+        return engine
+
+    def _history_files(self) -> Dict[date, str]:
+        """Daily history files by day"""
+        files = {}
+        for path in glob.glob(os.path.join(self.history_dir, "opportunities-*.db")):
+            match = HISTORY_FILE_PATTERN.search(path)
+            if match:
+                files[date.fromisoformat(match.group(1))] = path
+        return files
+
+    @property
+    def _cycle_table(self):
+        from models import ArbitrageCycle  # Imported here to avoid circular imports
+        return ArbitrageCycle.__table__
+
+    @staticmethod
+    def _row(opportunity, timestamp: datetime) -> dict:
+        # Profit estimates are only present once ProfitCalculator has priced the opportunity
+        priced = hasattr(opportunity, "estimated_profit")
+        trade_amount = getattr(opportunity, "trade_amount", None) or opportunity.optimal_trade_size or None
+        return {
+            "token_pair": opportunity.token_pair,
+            "buy_exchange": opportunity.buy_exchange,
+            "sell_exchange": opportunity.sell_exchange,
+            "buy_price": opportunity.buy_price,
+            "sell_price": opportunity.sell_price,
+            "price_difference": opportunity.price_difference,
+            "price_difference_percentage": opportunity.price_difference_percentage,
+            "trade_amount": trade_amount,
+            "estimated_profit": opportunity.price_difference * trade_amount if priced and trade_amount else None,
+            "gas_cost": opportunity.gas_cost_estimate if priced else None,
+            "exchange_fees": opportunity.exchange_fee_estimate if priced else None,
+            "net_profit": opportunity.estimated_profit if priced else None,
+            "timestamp": timestamp
+        }
+
+    def save(self, opportunities: List, min_profit_threshold: float = 0.0, commit: bool = True) -> int:
+        """
+        Insert the opportunities at or above the threshold and prune old rows
+
+        Args:
+            opportunities: List of OpportunityData objects
+            min_profit_threshold: Minimum price_difference_percentage to store
+            commit: Whether to commit the session afterwards
+
+        Returns:
+            Number of opportunities stored
+        """
+        timestamp = datetime.utcnow()
+        rows = [self._row(opportunity, timestamp) for opportunity in opportunities
+                if opportunity.price_difference_percentage >= min_profit_threshold]
+        if rows:
+            if self.layout == "partitioned":
+                self._ensure_partitions(timestamp)
+            try:
+                # A list of parameter sets runs as a single executemany
+                self.db.session.execute(insert(self._table), rows)
+            except Exception:
+                # The partitions may have been created in a transaction that is now lost
+                self._partitions.clear()
+                raise
+            if self.layout == "files":
+                try:
+                    with self._file_engine(timestamp.date()).begin() as conn:
+                        conn.execute(insert(self._table), rows)
+                except Exception as e:
+                    logger.error(f"Error writing opportunity history file: {str(e)}")
+            self.prune()
+        if commit:
+            self.db.session.commit()
+        return len(rows)
+
+    @staticmethod
+    def _cycle_row(cycle, timestamp: datetime) -> dict:
+        return {
+            "start_currency": cycle.start_currency,
+            "venues": ",".join(cycle.venues),
+            "legs": json.dumps([{"venue": leg.venue, "symbol": leg.symbol, "side": leg.side, "price": leg.price,
+                                 "from": leg.from_currency, "to": leg.to_currency} for leg in cycle.legs]),
+            "leg_count": len(cycle.legs),
+            "gross_return_percentage": cycle.gross_return * 100,
+            "trade_amount": cycle.trade_amount or None,
+            "estimated_profit": cycle.estimated_profit if cycle.trade_amount else None,
+            "estimated_profit_percentage": cycle.estimated_profit_percentage if cycle.trade_amount else None,
+            "gas_cost": cycle.gas_cost_estimate if cycle.trade_amount else None,
+            "exchange_fees": cycle.exchange_fee_estimate if cycle.trade_amount else None,
+            "timestamp": timestamp
+        }
+
+    def save_cycles(self, cycles: List, min_profit_threshold: float = 0.0, commit: bool = True) -> int:
+        """
+        Insert the cycles at or above the threshold and drop cycles past the retention age
+
+        Cycles are kept in one table whatever the opportunity history layout.
+
+        Args:
+            cycles: List of CycleOpportunity objects
+            min_profit_threshold: Minimum gross return, in percent, to store
+            commit: Whether to commit the session afterwards
+
+        Returns:
+            Number of cycles stored
+        """
+        timestamp = datetime.utcnow()
+        rows = [self._cycle_row(cycle, timestamp) for cycle in cycles
+                if cycle.gross_return * 100 >= min_profit_threshold]
+        if rows:
+            self.db.session.execute(insert(self._cycle_table), rows)
+            cutoff = timestamp - timedelta(days=self.retention_days)
+            self.db.session.execute(delete(self._cycle_table).where(self._cycle_table.c.timestamp < cutoff))
+        if commit:
+            self.db.session.commit()
+        return len(rows)
+
+    def prune(self):
+        """Apply the row cap and, at most every prune_interval seconds, the age limit"""
+        table = self._table
+        if self.max_rows:
+            # Ids grow with insertion order, so the id of the max_rows-th newest row is the cutoff;
+            # with fewer rows the subquery is NULL and nothing is deleted
+            cutoff_id = (select(table.c.id)
+                         .order_by(table.c.id.desc())
+                         .offset(self.max_rows - 1)
+                         .limit(1)
+                         .scalar_subquery())
+            self.db.session.execute(delete(table).where(table.c.id < cutoff_id))
+
+        if time.time() - self._pruned_at < self.prune_interval:
+            return
+        self._pruned_at = time.time()
+        cutoff = datetime.utcnow() - timedelta(days=self.retention_days)
+
+        if self.layout == "partitioned":
+            self._drop_partitions(cutoff)
+        elif self.layout == "files":
+            # The database only serves the latest day; older days are read from the files
+            self.db.session.execute(delete(table).where(table.c.timestamp < datetime.utcnow() - timedelta(days=1)))
+            self._drop_files(cutoff)
+        else:
+            self.db.session.execute(delete(table).where(table.c.timestamp < cutoff))
+
+    def _drop_partitions(self, cutoff: datetime):
+        """Drop the partitions whose whole day is older than the cutoff"""
+        names = self.db.session.execute(text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = 'arbitrage_opportunity'")).scalars()
+        for name in names:
+            try:
+                day = datetime.strptime(name[len(PARTITION_PREFIX):], "%Y%m%d").date()
+            except ValueError:
+                continue
+            if day + timedelta(days=1) <= cutoff.date():
+                self.db.session.execute(text(f"DROP TABLE IF EXISTS {name}"))
+                self._partitions.discard(day)
+                logger.info(f"Dropped opportunity partition {name}")
+
+    def _drop_files(self, cutoff: datetime):
+        """Delete the history files whose whole day is older than the cutoff"""
+        for day, path in self._history_files().items():
+            if day + timedelta(days=1) > cutoff.date():
+                continue
+            engine = self._file_engines.pop(day, None)
+            if engine is not None:
+                engine.dispose()
+            for suffix in ("", "-wal", "-shm"):
+                try:
+                    os.remove(path + suffix)
+                except FileNotFoundError:
+                    pass
+            logger.info(f"Deleted opportunity history file {os.path.basename(path)}")
+
+    def history(self, since: Optional[datetime] = None, until: Optional[datetime] = None,
+                token_pair: Optional[str] = None, limit: int = 500) -> List[Dict[str, Any]]:
+        """
+        Opportunities in a time range, newest first
+
+        Args:
+            since: Oldest timestamp to include (defaults to the retention limit)
+            until: Newest timestamp to include (defaults to now)
+            token_pair: Optional symbol to filter on
+            limit: Maximum number of opportunities to return
+
+        Returns:
+            List of opportunity rows as dictionaries
+        """
+        table = self._table
+        until = until or datetime.utcnow()
+        since = since or until - timedelta(days=self.retention_days)
+        query = select(table).where(table.c.timestamp >= since, table.c.timestamp <= until)
+        if token_pair:
+            query = query.where(table.c.token_pair == token_pair)
+        query = query.order_by(table.c.timestamp.desc())
+
+        if self.layout != "files":
+            return [dict(row) for row in self.db.session.execute(query.limit(limit)).mappings()]
+
+        # Walk the daily files from newest to oldest until the limit is reached
+        rows = []
+        for day, path in sorted(self._history_files().items(), reverse=True):
+            if day > until.date() or day < since.date() or len(rows) >= limit:
+                continue
+            engine = self._file_engines.get(day) or create_engine(f"sqlite:///{path}")
+            try:
+                with engine.connect() as conn:
+                    rows.extend(dict(row) for row in conn.execute(query.limit(limit - len(rows))).mappings())
+            except Exception as e:
+                logger.error(f"Error reading opportunity history file {os.path.basename(path)}: {str(e)}")
+            finally:
+                if day not in self._file_engines:
+                    engine.dispose()
+        return rows
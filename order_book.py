@@ -0,0 +1,67 @@
+import logging
+from typing import List
+from dataclasses import dataclass
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+@dataclass
+class BookWalkResult:
+    """Result of crossing a buy-side order book against a sell-side order book"""
+    size: float = 0.0  # Base amount executable while the trade is still profitable
+    buy_cost: float = 0.0  # Quote spent buying `size` on the ask side, before fees
+    sell_proceeds: float = 0.0  # Quote received selling `size` on the bid side, before fees
+    buy_vwap: float = 0.0
+    sell_vwap: float = 0.0
+    profit: float = 0.0  # Net of the fee rates used for the walk
+
+def walk_order_books(asks: List[List[float]], bids: List[List[float]],
+                     buy_fee_rate: float = 0.0, sell_fee_rate: float = 0.0) -> BookWalkResult:
+    """
+    Walk the ask side of one venue against the bid side of another
+
+    Levels are consumed from the top of both books for as long as buying at the
+    current ask (plus fee) is cheaper than selling at the current bid (minus fee).
+
+    Args:
+        asks: Ask levels [[price, amount], ...] sorted ascending (buy venue)
+        bids: Bid levels [[price, amount], ...] sorted descending (sell venue)
+        buy_fee_rate: Taker fee rate on the buy venue
+        sell_fee_rate: Taker fee rate on the sell venue
+
+    Returns:
+        BookWalkResult with the maximum executable size, VWAPs and profit
+    """
+    result = BookWalkResult()
+    ask_index = bid_index = 0
+    ask_remaining = asks[0][1] if asks else 0.0
+    bid_remaining = bids[0][1] if bids else 0.0
+
+    while ask_index < len(asks) and bid_index < len(bids):
+        ask_price = asks[ask_index][0]
+        bid_price = bids[bid_index][0]
+        if ask_price * (1 + buy_fee_rate) >= bid_price * (1 - sell_fee_rate):
+            break
+
+        amount = min(ask_remaining, bid_remaining)
+        result.size += amount
+        result.buy_cost += amount * ask_price
+        result.sell_proceeds += amount * bid_price
+        ask_remaining -= amount
+        bid_remaining -= amount
+
+        if ask_remaining <= 0:
+            ask_index += 1
+            if ask_index < len(asks):
+                ask_remaining = asks[ask_index][1]
+        if bid_remaining <= 0:
+            bid_index += 1
+            if bid_index < len(bids):
+                bid_remaining = bids[bid_index][1]
+
+    if result.size > 0:
+        result.buy_vwap = result.buy_cost / result.size
+        result.sell_vwap = result.sell_proceeds / result.size
+        result.profit = result.sell_proceeds * (1 - sell_fee_rate) - result.buy_cost * (1 + buy_fee_rate)
+    return result
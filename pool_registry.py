@@ -0,0 +1,127 @@
+import os
+import logging
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from dataclasses import dataclass
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_REGISTRY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "instance", "pool_registry.db")
+
+@dataclass(frozen=True)
+class PoolInfo:
+    """Static facts about a Uniswap V3 pool that never change once it exists"""
+    address: str
+    token0: str
+    token1: str
+    fee: int
+
+# Marker stored for token pairs that have no pool at a fee tier
+MISSING_POOL = PoolInfo(address="", token0="", token1="", fee=0)
+
+class PoolRegistry:
+    """
+    Persistent registry of Uniswap V3 pool addresses and token ordering
+
+    Lookups are served from memory and backed by a small SQLite file so they
+    survive restarts. Pairs without a pool are cached as well, with a TTL since
+    a pool can be created later.
+    """
+
+    def __init__(self, path: Optional[str] = None, missing_ttl: float = 24 * 3600):
+        """
+        Args:
+            path: SQLite file to store the registry in (':memory:' for no persistence)
+            missing_ttl: Seconds before a missing pool is looked up again
+        """
+        self.path = path or os.getenv("POOL_REGISTRY_PATH", DEFAULT_REGISTRY_PATH)
+        self.missing_ttl = missing_ttl
+        self._lock = threading.Lock()
+        self._cache: Dict[Tuple[str, str, int], Tuple[PoolInfo, float]] = {}
+
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS pools (
+                token0 TEXT NOT NULL,
+                token1 TEXT NOT NULL,
+                fee INTEGER NOT NULL,
+                address TEXT,
+                checked_at REAL NOT NULL,
+                PRIMARY KEY (token0, token1, fee)
+            )
+        """)
+        self._conn.commit()
+        self._load()
+
+    @staticmethod
+    def sort_tokens(token_a: str, token_b: str) -> Tuple[str, str]:
+        """Return the tokens in Uniswap's token0/token1 order"""
+        if token_a.lower() > token_b.lower():
+            return token_b, token_a
+        return token_a, token_b
+
+    def _load(self):
+        """Load every stored pool into memory"""
+        rows = self._conn.execute("SELECT token0, token1, fee, address, checked_at FROM pools").fetchall()
+        for token0, token1, fee, address, checked_at in rows:
+            info = PoolInfo(address, token0, token1, fee) if address else MISSING_POOL
+            self._cache[(token0.lower(), token1.lower(), fee)] = (info, checked_at)
+        logger.info(f"Loaded {len(rows)} pools from registry {self.path}")
+
+    def get(self, token_a: str, token_b: str, fee: int) -> Optional[PoolInfo]:
+        """
+        Look up a pool
+
+        Returns:
+            PoolInfo if the pool is known, MISSING_POOL if it is known not to exist,
+            or None if it has to be resolved on-chain
+        """
+        token0, token1 = self.sort_tokens(token_a, token_b)
+        entry = self._cache.get((token0.lower(), token1.lower(), fee))
+        if entry is None:
+            return None
+        info, checked_at = entry
+        if info is MISSING_POOL and time.time() - checked_at > self.missing_ttl:
+            return None
+        return info
+
+    def put(self, token_a: str, token_b: str, fee: int, address: Optional[str]) -> PoolInfo:
+        """
+        Store the result of a factory lookup
+
+        Args:
+            token_a: Address of one token
+            token_b: Address of the other token
+            fee: Fee tier
+            address: Pool address, or None if the pool does not exist
+
+        Returns:
+            The stored PoolInfo (or MISSING_POOL)
+        """
+        token0, token1 = self.sort_tokens(token_a, token_b)
+        info = PoolInfo(address, token0, token1, fee) if address else MISSING_POOL
+        checked_at = time.time()
+        with self._lock:
+            self._cache[(token0.lower(), token1.lower(), fee)] = (info, checked_at)
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO pools (token0, token1, fee, address, checked_at) VALUES (?, ?, ?, ?, ?)",
+                    (token0, token1, fee, address or None, checked_at)
+                )
+                self._conn.commit()
+            except sqlite3.Error as e:
+                logger.error(f"Error saving pool to registry: {str(e)}")
+        return info
+
+    def known_pools(self):
+        """Return every pool known to exist"""
+        return [info for info, _ in self._cache.values() if info is not MISSING_POOL]
+
+    def close(self):
+        self._conn.close()
@@ -0,0 +1,187 @@
+import logging
+import threading
+import time
+from typing import Dict, Any, List, Optional
+from web3 import Web3
+from eth_abi import decode as abi_decode
+from pool_registry import PoolInfo
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Event topics of a Uniswap V3 pool
+SWAP_TOPIC = Web3.keccak(text="Swap(address,address,int256,int256,uint160,uint128,int24)")
+MINT_TOPIC = Web3.keccak(text="Mint(address,address,int24,int24,uint128,uint256,uint256)")
+BURN_TOPIC = Web3.keccak(text="Burn(address,int24,int24,uint128,uint256,uint256)")
+
+class PoolStateTracker:
+    """
+    Keeps sqrtPriceX96, tick and liquidity of Uniswap V3 pools current from their events
+
+    Swap events carry the post-swap price, tick and active liquidity; Mint and Burn
+    change active liquidity when their range covers the current tick. Logs are
+    polled with eth_getLogs over the blocks since the last poll, so RPC load depends
+    on block production rather than on how often prices are read. Pools are
+    re-synced from slot0 (one multicall) at start-up, after a reorg, or when the
+    tracker has fallen too far behind.
+
+    Per-pool state dicts are never modified once published: each poll applies its
+    logs to copies and swaps in a new states mapping, so readers on other threads
+    can hold on to states (or a shallow copy of it) without locking.
+    """
+
+    def __init__(self, uniswap, pools: List[PoolInfo], max_block_range: int = 500, max_gap: int = 2000):
+        """
+        Args:
+            uniswap: UniswapV3Interface used for RPC access and slot0 re-syncs
+            pools: Pools to track
+            max_block_range: Largest block range requested in one eth_getLogs call
+            max_gap: Re-sync from slot0 instead of replaying logs when further behind than this
+        """
+        self.uniswap = uniswap
+        self.web3 = uniswap.web3
+        self.pools = {Web3.to_checksum_address(pool.address): pool for pool in pools}
+        self.max_block_range = max_block_range
+        self.max_gap = max_gap
+        self.states: Dict[str, Dict[str, Any]] = {}
+        self.last_block: Optional[int] = None
+        self.last_block_hash = None
+        self.resync_count = 0
+        self._thread = None
+        self._running = False
+
+    def resync(self, block_identifier="latest"):
+        """Reload every pool's state from slot0 in one multicall snapshot"""
+        block_number, states = self.uniswap.get_pool_states(list(self.pools.values()), block_identifier)
+        if block_number is None:
+            raise ConnectionError("Could not read pool states")
+
+        self.states = {Web3.to_checksum_address(address): state for address, state in states.items()}
+        self.last_block = block_number
+        self.last_block_hash = self.web3.eth.get_block(block_number)["hash"]
+        self.resync_count += 1
+        logger.info(f"Re-synced {len(self.states)} Uniswap pools from slot0 at block {block_number}")
+
+    def _apply_log(self, states: Dict[str, Dict[str, Any]], log):
+        """Replace one pool's state in `states` with a copy updated from a Swap, Mint or Burn log"""
+        address = Web3.to_checksum_address(log["address"])
+        if address not in states:
+            return
+        state = dict(states[address])
+        states[address] = state
+
+        topics = log["topics"]
+        topic = bytes(topics[0])
+        data = bytes(log["data"])
+
+        if topic == bytes(SWAP_TOPIC):
+            _, _, sqrt_price_x96, liquidity, tick = abi_decode(
+                ["int256", "int256", "uint160", "uint128", "int24"], data)
+            state["sqrt_price_x96"] = sqrt_price_x96
+            state["liquidity"] = liquidity
+            state["tick"] = tick
+        elif topic in (bytes(MINT_TOPIC), bytes(BURN_TOPIC)):
+            tick_lower = abi_decode(["int24"], bytes(topics[2]))[0]
+            tick_upper = abi_decode(["int24"], bytes(topics[3]))[0]
+            if topic == bytes(MINT_TOPIC):
+                amount = abi_decode(["address", "uint128", "uint256", "uint256"], data)[1]
+            else:
+                amount = abi_decode(["uint128", "uint256", "uint256"], data)[0]
+                amount = -amount
+            # Only positions around the current price contribute to active liquidity
+            if tick_lower <= state["tick"] < tick_upper:
+                state["liquidity"] += amount
+            # The pool's initialized ticks changed, so cached tick data is stale
+            self.uniswap.invalidate_swap_simulator(log["address"])
+
+        state["block_number"] = log["blockNumber"]
+
+    def _reorged(self) -> bool:
+        """Whether the last processed block is no longer on the canonical chain"""
+        try:
+            return self.web3.eth.get_block(self.last_block)["hash"] != self.last_block_hash
+        except Exception:
+            return True
+
+    def poll(self) -> int:
+        """
+        Apply all pool events since the last poll
+
+        Returns:
+            Number of logs applied
+        """
+        if self.last_block is None:
+            self.resync()
+            return 0
+
+        # Pin the head before reading logs, so logs of a block replaced meanwhile are caught below
+        head = self.web3.eth.get_block("latest")
+        latest, latest_hash = head["number"], head["hash"]
+        if latest <= self.last_block:
+            return 0
+
+        if self._reorged():
+            logger.warning(f"Reorg detected at block {self.last_block}, re-syncing pools")
+            self.resync()
+            return 0
+        if latest - self.last_block > self.max_gap:
+            logger.warning(f"Pool tracker is {latest - self.last_block} blocks behind, re-syncing pools")
+            self.resync()
+            return 0
+
+        applied = 0
+        states = dict(self.states)
+        from_block = self.last_block + 1
+        while from_block <= latest:
+            to_block = min(from_block + self.max_block_range - 1, latest)
+            logs = self.web3.eth.get_logs({
+                "address": list(self.pools.keys()),
+                "fromBlock": from_block,
+                "toBlock": to_block,
+                "topics": [[SWAP_TOPIC, MINT_TOPIC, BURN_TOPIC]]
+            })
+            for log in sorted(logs, key=lambda log: (log["blockNumber"], log["logIndex"])):
+                orphaned = log["blockNumber"] == latest and bytes(log["blockHash"]) != bytes(latest_hash)
+                if log.get("removed") or orphaned:
+                    # A log from an orphaned block slipped through, start over from slot0
+                    logger.warning(f"Log from orphaned block {log['blockNumber']}, re-syncing pools")
+                    self.resync()
+                    return 0
+                self._apply_log(states, log)
+                applied += 1
+            from_block = to_block + 1
+
+        self.states = states
+        self.last_block = latest
+        self.last_block_hash = latest_hash
+        return applied
+
+    def get_state(self, pool_address: str) -> Optional[Dict[str, Any]]:
+        """Return the in-memory state of a pool"""
+        return self.states.get(Web3.to_checksum_address(pool_address))
+
+    def start(self, poll_interval: float = 2.0):
+        """Poll for pool events in a background thread"""
+        if self._thread is not None and self._thread.is_alive():
+            logger.info("Pool state tracker already running")
+            return
+
+        def _run():
+            while self._running:
+                try:
+                    self.poll()
+                except Exception as e:
+                    logger.error(f"Error tracking pool events: {str(e)}")
+                    # Force a fresh snapshot once the node is reachable again
+                    self.last_block = None
+                time.sleep(poll_interval)
+
+        self._running = True
+        self._thread = threading.Thread(target=_run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """Stop background polling"""
+        self._running = False
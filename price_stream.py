@@ -0,0 +1,361 @@
+import logging
+import json
+import time
+import asyncio
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, Any, Optional, Callable, List, Tuple
+from dataclasses import dataclass
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+@dataclass
+class Quote:
+    """Live top-of-book quote for a symbol on one venue"""
+    exchange: str
+    symbol: str
+    bid: float = 0.0
+    ask: float = 0.0
+    bid_volume: float = 0.0
+    ask_volume: float = 0.0
+    last: float = 0.0
+    volume: float = 0.0
+    timestamp: int = 0
+
+    @classmethod
+    def from_ticker(cls, exchange_id: str, symbol: str, ticker: Dict[str, Any]) -> 'Quote':
+        """Build a quote from a ccxt ticker"""
+        return cls(
+            exchange=exchange_id,
+            symbol=symbol,
+            bid=ticker.get('bid') or 0.0,
+            ask=ticker.get('ask') or 0.0,
+            bid_volume=ticker.get('bidVolume') or 0.0,
+            ask_volume=ticker.get('askVolume') or 0.0,
+            last=ticker.get('last') or 0.0,
+            volume=ticker.get('quoteVolume') or 0.0,
+            timestamp=ticker.get('timestamp') or int(time.time() * 1000)
+        )
+
+    def to_price_record(self) -> Dict[str, Any]:
+        """Convert to the price record format used by ExchangeScanner"""
+        return {
+            'price': self.last or (self.bid + self.ask) / 2,
+            'bid': self.bid,
+            'ask': self.ask,
+            'volume': self.volume,
+            'timestamp': self.timestamp
+        }
+
+class StreamTransport(ABC):
+    """
+    Base class for streaming market data transports
+
+    A transport exposes ccxt.pro-style watch methods: each call waits for and
+    returns the next update for the given venue and symbol.
+    """
+
+    @abstractmethod
+    async def watch_ticker(self, exchange_id: str, symbol: str) -> Dict[str, Any]:
+        """Wait for and return the next ccxt ticker of a symbol"""
+
+    @abstractmethod
+    async def watch_order_book(self, exchange_id: str, symbol: str, limit: int = 5) -> Dict[str, Any]:
+        """Wait for and return the next ccxt order book of a symbol"""
+
+    async def close(self):
+        pass
+
+class CcxtProTransport(StreamTransport):
+    """
+    Transport backed by ccxt.pro WebSocket clients
+    """
+
+    def __init__(self, exchange_configs=None):
+        """
+        Args:
+            exchange_configs: Optional list of ExchangeConfig objects used for API credentials
+        """
+        import ccxt.pro as ccxtpro
+        self._ccxtpro = ccxtpro
+        self.configs = {config.exchange_name: config for config in (exchange_configs or [])}
+        self.exchanges = {}
+
+    def _get_exchange(self, exchange_id: str):
+        """Create or return the ccxt.pro client for an exchange"""
+        if exchange_id not in self.exchanges:
+            exchange_params = {'enableRateLimit': True}
+            config = self.configs.get(exchange_id)
+            if config and config.api_key and config.api_secret:
+                exchange_params['apiKey'] = config.api_key
+                exchange_params['secret'] = config.api_secret
+            self.exchanges[exchange_id] = getattr(self._ccxtpro, exchange_id)(exchange_params)
+        return self.exchanges[exchange_id]
+
+    async def watch_ticker(self, exchange_id: str, symbol: str) -> Dict[str, Any]:
+        return await self._get_exchange(exchange_id).watch_ticker(symbol)
+
+    async def watch_order_book(self, exchange_id: str, symbol: str, limit: int = 5) -> Dict[str, Any]:
+        return await self._get_exchange(exchange_id).watch_order_book(symbol, limit)
+
+    async def close(self):
+        for exchange in self.exchanges.values():
+            try:
+                await exchange.close()
+            except Exception as e:
+                logger.error(f"Error closing stream for {exchange.id}: {str(e)}")
+        self.exchanges = {}
+
+class WebSocketTransport(StreamTransport):
+    """
+    Transport for a plain JSON WebSocket feed, e.g. a local fake server
+
+    Subscriptions are sent as
+        {"op": "subscribe", "channel": "ticker"|"orderbook", "exchange": ..., "symbol": ..., "limit": ...}
+    and the server pushes
+        {"channel": ..., "exchange": ..., "symbol": ..., "data": {...}}
+    where data is a ccxt-shaped ticker or order book.
+    """
+
+    def __init__(self, url: str):
+        """
+        Args:
+            url: WebSocket URL of the feed (e.g. 'ws://127.0.0.1:8765')
+        """
+        self.url = url
+        self._session = None
+        self._ws = None
+        self._reader = None
+        self._connect_lock = None
+        self._queues = {}
+        self._subscribed = set()
+
+    async def _connect(self):
+        """Open the connection and start routing messages to subscriber queues"""
+        if self._connect_lock is None:
+            self._connect_lock = asyncio.Lock()
+        async with self._connect_lock:
+            if self._ws is not None and not self._ws.closed:
+                return
+            import aiohttp
+            if self._session is None:
+                self._session = aiohttp.ClientSession()
+            self._ws = await self._session.ws_connect(self.url, heartbeat=30)
+            # Watchers re-subscribe on their next call after a reconnect
+            self._subscribed = set()
+            self._reader = asyncio.ensure_future(self._read_loop())
+
+    async def _send_subscribe(self, channel: str, exchange_id: str, symbol: str, limit: Optional[int]):
+        await self._ws.send_str(json.dumps({
+            'op': 'subscribe',
+            'channel': channel,
+            'exchange': exchange_id,
+            'symbol': symbol,
+            'limit': limit
+        }))
+
+    async def _read_loop(self):
+        """Dispatch incoming messages to the queue of the matching subscription"""
+        import aiohttp
+        ws = self._ws
+        try:
+            async for message in ws:
+                if message.type != aiohttp.WSMsgType.TEXT:
+                    continue
+                try:
+                    payload = json.loads(message.data)
+                    channel = payload['channel']
+                    exchange_id = payload['exchange']
+                    symbol = payload['symbol']
+                except (ValueError, KeyError) as e:
+                    logger.warning(f"Ignoring malformed stream message: {str(e)}")
+                    continue
+                for key, queue in self._queues.items():
+                    if key[0] == channel and key[1] == exchange_id and key[2] == symbol:
+                        queue.put_nowait(payload.get('data') or {})
+        finally:
+            # Wake up watchers so they notice the disconnect and reconnect
+            for queue in self._queues.values():
+                queue.put_nowait(None)
+
+    async def _watch(self, channel: str, exchange_id: str, symbol: str, limit: Optional[int] = None):
+        key = (channel, exchange_id, symbol, limit)
+        if key not in self._queues:
+            self._queues[key] = asyncio.Queue()
+        await self._connect()
+        if key not in self._subscribed:
+            self._subscribed.add(key)
+            await self._send_subscribe(channel, exchange_id, symbol, limit)
+
+        queue = self._queues[key]
+        data = await queue.get()
+        # Only the latest update matters, skip any that queued up behind it
+        while data is not None and not queue.empty():
+            data = queue.get_nowait()
+        if data is None:
+            raise ConnectionError(f"Stream connection to {self.url} closed")
+        return data
+
+    async def watch_ticker(self, exchange_id: str, symbol: str) -> Dict[str, Any]:
+        return await self._watch('ticker', exchange_id, symbol)
+
+    async def watch_order_book(self, exchange_id: str, symbol: str, limit: int = 5) -> Dict[str, Any]:
+        return await self._watch('orderbook', exchange_id, symbol, limit)
+
+    async def close(self):
+        if self._reader is not None:
+            self._reader.cancel()
+        if self._ws is not None:
+            await self._ws.close()
+        if self._session is not None:
+            await self._session.close()
+        self._ws = None
+        self._session = None
+
+class PriceStream:
+    """
+    Streams ticker and order-book-top updates into a live in-memory quote book
+
+    Every update replaces the best bid/ask for its (venue, symbol) and is passed
+    to the on_update callback, so detection runs as soon as a price moves instead
+    of on the next polling cycle.
+    """
+
+    def __init__(self, transport: StreamTransport, on_update: Optional[Callable[[Quote], None]] = None,
+                 watch_order_books: bool = True, order_book_depth: int = 5):
+        """
+        Args:
+            transport: StreamTransport used to receive market data
+            on_update: Callback invoked with the updated Quote after every update
+            watch_order_books: Whether to also subscribe to order-book-top updates
+            order_book_depth: Number of levels requested from order book channels
+        """
+        self.transport = transport
+        self.on_update = on_update
+        self.watch_order_books = watch_order_books
+        self.order_book_depth = order_book_depth
+        self.reconnect_delay = 1.0  # Initial backoff in seconds after a stream error
+        self.max_reconnect_delay = 30.0
+        self.quotes: Dict[Tuple[str, str], Quote] = {}
+        self.subscriptions: List[Tuple[str, str]] = []
+        self.update_count = 0
+        self._tasks = []
+        self._loop = None
+        self._thread = None
+        self._running = False
+
+    def subscribe(self, exchange_id: str, symbol: str):
+        """Add a (venue, symbol) subscription; takes effect on the next start"""
+        if (exchange_id, symbol) not in self.subscriptions:
+            self.subscriptions.append((exchange_id, symbol))
+
+    def get_quote(self, exchange_id: str, symbol: str) -> Optional[Quote]:
+        """Return the latest quote for a venue and symbol"""
+        return self.quotes.get((exchange_id, symbol))
+
+    def get_symbol_quotes(self, symbol: str) -> Dict[str, Quote]:
+        """Return the latest quote from every venue for a symbol"""
+        return {exchange_id: quote for (exchange_id, quote_symbol), quote in list(self.quotes.items())
+                if quote_symbol == symbol}
+
+    def _quote_for(self, exchange_id: str, symbol: str) -> Quote:
+        key = (exchange_id, symbol)
+        quote = self.quotes.get(key)
+        if quote is None:
+            quote = Quote(exchange=exchange_id, symbol=symbol)
+            self.quotes[key] = quote
+        return quote
+
+    def apply_ticker(self, exchange_id: str, symbol: str, ticker: Dict[str, Any]) -> Quote:
+        """Merge a ticker update into the quote book"""
+        quote = self._quote_for(exchange_id, symbol)
+        quote.bid = ticker.get('bid') or quote.bid
+        quote.ask = ticker.get('ask') or quote.ask
+        quote.bid_volume = ticker.get('bidVolume') or quote.bid_volume
+        quote.ask_volume = ticker.get('askVolume') or quote.ask_volume
+        quote.last = ticker.get('last') or quote.last
+        quote.volume = ticker.get('quoteVolume') or quote.volume
+        quote.timestamp = ticker.get('timestamp') or int(time.time() * 1000)
+        return quote
+
+    def apply_order_book(self, exchange_id: str, symbol: str, order_book: Dict[str, Any]) -> Quote:
+        """Merge the top level of an order book update into the quote book"""
+        quote = self._quote_for(exchange_id, symbol)
+        bids = order_book.get('bids') or []
+        asks = order_book.get('asks') or []
+        if bids:
+            quote.bid, quote.bid_volume = bids[0][0], bids[0][1]
+        if asks:
+            quote.ask, quote.ask_volume = asks[0][0], asks[0][1]
+        quote.timestamp = order_book.get('timestamp') or int(time.time() * 1000)
+        return quote
+
+    def _notify(self, quote: Quote):
+        self.update_count += 1
+        if self.on_update:
+            try:
+                self.on_update(quote)
+            except Exception as e:
+                logger.error(f"Error in stream update handler for {quote.symbol}: {str(e)}")
+
+    async def _watch_loop(self, channel: str, exchange_id: str, symbol: str):
+        """Keep one subscription alive, backing off and retrying on errors"""
+        delay = self.reconnect_delay
+        while self._running:
+            try:
+                if channel == 'ticker':
+                    ticker = await self.transport.watch_ticker(exchange_id, symbol)
+                    quote = self.apply_ticker(exchange_id, symbol, ticker)
+                else:
+                    order_book = await self.transport.watch_order_book(exchange_id, symbol, self.order_book_depth)
+                    quote = self.apply_order_book(exchange_id, symbol, order_book)
+                delay = self.reconnect_delay
+                self._notify(quote)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error streaming {channel} for {symbol} from {exchange_id}: {str(e)}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.max_reconnect_delay)
+
+    async def run(self):
+        """Run all subscriptions until stopped"""
+        self._running = True
+        channels = ['ticker', 'orderbook'] if self.watch_order_books else ['ticker']
+        self._tasks = [asyncio.ensure_future(self._watch_loop(channel, exchange_id, symbol))
+                       for exchange_id, symbol in self.subscriptions
+                       for channel in channels]
+        logger.info(f"Price stream started with {len(self.subscriptions)} subscriptions")
+        try:
+            await asyncio.gather(*self._tasks)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            await self.transport.close()
+
+    def start(self):
+        """Run the stream on its own event loop in a background thread"""
+        if self._thread is not None and self._thread.is_alive():
+            logger.info("Price stream already running")
+            return
+
+        def _run():
+            self._loop = asyncio.new_event_loop()
+            try:
+                self._loop.run_until_complete(self.run())
+            finally:
+                self._loop.close()
+
+        self._thread = threading.Thread(target=_run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """Stop all subscriptions and close the transport"""
+        self._running = False
+        if self._loop is not None and not self._loop.is_closed():
+            for task in self._tasks:
+                self._loop.call_soon_threadsafe(task.cancel)
+        logger.info("Price stream stopped")
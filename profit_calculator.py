@@ -1,39 +1,152 @@
 import logging
-from typing import Dict, Any
-from dataclasses import dataclass
+import math
+import numpy as np
+from typing import Dict, Any, List, Tuple, Optional, Union
+from dataclasses import dataclass, field
 from exchange_scanner import OpportunityData
 
 # Configure logging
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
+@dataclass
+class OpportunityBatch:
+    """
+    Struct-of-arrays view of many opportunities for calculate_profit_batch
+
+    Inputs are broadcast to one row per opportunity; result columns are allocated
+    once and overwritten in place on every calculation.
+    """
+    buy_price: np.ndarray
+    sell_price: np.ndarray
+    trade_amount: Union[np.ndarray, float] = 1.0
+    buy_fee_rate: Optional[np.ndarray] = None  # None uses the calculator's default exchange fee rate
+    sell_fee_rate: Optional[np.ndarray] = None
+    use_flashloan: Union[np.ndarray, bool] = False
+    # Optional row labels, e.g. the indices returned by SpreadMatrix.top_pairs
+    symbol_idx: Optional[np.ndarray] = None
+    buy_venue_idx: Optional[np.ndarray] = None
+    sell_venue_idx: Optional[np.ndarray] = None
+    # Optional row names, needed to look fee rates up in a FeeSchedule
+    token_pairs: Optional[List[str]] = None
+    buy_exchanges: Optional[List[str]] = None
+    sell_exchanges: Optional[List[str]] = None
+    # Results
+    estimated_profit: np.ndarray = field(init=False)
+    estimated_profit_percentage: np.ndarray = field(init=False)
+    gas_cost_estimate: np.ndarray = field(init=False)
+    exchange_fee_estimate: np.ndarray = field(init=False)
+    flashloan_fee_estimate: np.ndarray = field(init=False)
+
+    def __post_init__(self):
+        self.buy_price = np.asarray(self.buy_price, dtype=float)
+        self.sell_price = np.asarray(self.sell_price, dtype=float)
+        n = len(self.buy_price)
+        self.trade_amount = np.broadcast_to(np.asarray(self.trade_amount, dtype=float), (n,))
+        self.use_flashloan = np.broadcast_to(np.asarray(self.use_flashloan, dtype=bool), (n,))
+        if self.buy_fee_rate is not None:
+            self.buy_fee_rate = np.broadcast_to(np.asarray(self.buy_fee_rate, dtype=float), (n,))
+        if self.sell_fee_rate is not None:
+            self.sell_fee_rate = np.broadcast_to(np.asarray(self.sell_fee_rate, dtype=float), (n,))
+        self.estimated_profit = np.empty(n)
+        self.estimated_profit_percentage = np.empty(n)
+        self.gas_cost_estimate = np.empty(n)
+        self.exchange_fee_estimate = np.empty(n)
+        self.flashloan_fee_estimate = np.empty(n)
+
+    def __len__(self):
+        return len(self.buy_price)
+
+    @classmethod
+    def from_opportunities(cls, opportunities: List[OpportunityData], trade_amount: float = 1.0,
+                           use_flashloan: bool = False, fee_schedule=None) -> 'OpportunityBatch':
+        """
+        Build a batch from OpportunityData objects (row i is opportunities[i])
+
+        Args:
+            opportunities: Opportunities to include
+            trade_amount: Base amount traded per opportunity
+            use_flashloan: Whether the buy sides are funded with flashloans
+            fee_schedule: Optional FeeSchedule to fill per-row taker fee rates from
+        """
+        n = len(opportunities)
+        batch = cls(
+            buy_price=np.fromiter((opportunity.buy_price for opportunity in opportunities), float, n),
+            sell_price=np.fromiter((opportunity.sell_price for opportunity in opportunities), float, n),
+            trade_amount=trade_amount,
+            use_flashloan=use_flashloan,
+            token_pairs=[opportunity.token_pair for opportunity in opportunities],
+            buy_exchanges=[opportunity.buy_exchange for opportunity in opportunities],
+            sell_exchanges=[opportunity.sell_exchange for opportunity in opportunities]
+        )
+        if fee_schedule is not None:
+            batch.fill_fee_rates(fee_schedule)
+        return batch
+
+    def fill_fee_rates(self, fee_schedule):
+        """
+        Fill missing buy and sell fee rates with taker fees from a FeeSchedule
+
+        Rows are looked up by venue and symbol when the batch carries their names;
+        otherwise every row gets the schedule's default taker fee.
+        """
+        n = len(self)
+
+        def taker_fees(venues):
+            if venues is None or self.token_pairs is None:
+                return np.full(n, fee_schedule.default_taker)
+            return np.fromiter((fee_schedule.taker_fee(venue, symbol)
+                                for venue, symbol in zip(venues, self.token_pairs)), float, n)
+
+        if self.buy_fee_rate is None:
+            self.buy_fee_rate = taker_fees(self.buy_exchanges)
+        if self.sell_fee_rate is None:
+            self.sell_fee_rate = taker_fees(self.sell_exchanges)
+
+    def profitable(self, min_profit: float = 0.0) -> np.ndarray:
+        """Row indices whose estimated profit exceeds min_profit, best first"""
+        rows = np.flatnonzero(self.estimated_profit > min_profit)
+        return rows[np.argsort(-self.estimated_profit[rows], kind='stable')]
+
 class ProfitCalculator:
     """
     Calculates potential profits from arbitrage opportunities,
     taking into account transaction costs, gas fees, and exchange fees.
     """
     
-    def __init__(self):
-        """Initialize the profit calculator with default fee settings"""
+    def __init__(self, gas_oracle=None, fee_schedule=None):
+        """
+        Initialize the profit calculator with default fee settings
+        
+        Args:
+            gas_oracle: Optional GasOracle; its snapshot replaces the fixed gas and ETH price defaults
+            fee_schedule: Optional FeeSchedule with taker fees per venue and symbol
+        """
         self.default_exchange_fee_rate = 0.001  # 0.1% per trade
         self.default_gas_cost_eth = 0.005  # Estimated ETH cost for gas
         self.default_eth_price_usd = 2000  # Fallback ETH price in USD
+        self.gas_oracle = gas_oracle
+        self.fee_schedule = fee_schedule
+        self.gas_units = 250_000  # Gas used by an arbitrage transaction without a flashloan
+        self.gas_snapshot_max_age = 60.0  # Seconds before an oracle snapshot is ignored
         self.default_flashloan_fee_rate = 0.0009  # 0.09% for flash loans
+        self.size_tolerance = 1e-6  # Golden-section stopping width, relative to the largest fillable size
         logger.info("ProfitCalculator initialized")
     
-    def get_exchange_fee(self, exchange_name: str, trade_amount: float) -> float:
+    def get_exchange_fee(self, exchange_name: str, trade_amount: float, symbol: Optional[str] = None) -> float:
         """
         Get the estimated fee for a trade on a specific exchange
         
         Args:
             exchange_name: Name of the exchange
             trade_amount: Amount of the trade in quote currency
+            symbol: Optional symbol traded, for per-market fees
             
         Returns:
             Estimated fee amount
         """
-        # In a real implementation, this would have different fee rates per exchange
-        # based on your tier level, etc.
+        if self.fee_schedule is not None:
+            return trade_amount * self.fee_schedule.taker_fee(exchange_name, symbol)
         return trade_amount * self.default_exchange_fee_rate
     
     def get_gas_cost_estimate(self, use_flashloan: bool = False) -> float:
@@ -46,9 +159,13 @@ class ProfitCalculator:
         Returns:
             Estimated gas cost in USD
         """
-        # In a real implementation, you would query current gas prices
-        # and calculate based on expected gas usage for your contracts
         multiplier = 2.0 if use_flashloan else 1.0  # Flashloans use more gas
+        
+        # Live fees and ETH price from the oracle's last snapshot, no I/O here
+        snapshot = self.gas_oracle.get_snapshot(self.gas_snapshot_max_age) if self.gas_oracle else None
+        if snapshot is not None:
+            return snapshot.gas_cost_usd(self.gas_units) * multiplier
+        
         return self.default_gas_cost_eth * self.default_eth_price_usd * multiplier
     
     def get_flashloan_fee(self, loan_amount: float) -> float:
@@ -81,8 +198,8 @@ class ProfitCalculator:
         raw_profit = sell_value - buy_value
         
         # Calculate fees
-        buy_exchange_fee = self.get_exchange_fee(opportunity.buy_exchange, buy_value)
-        sell_exchange_fee = self.get_exchange_fee(opportunity.sell_exchange, sell_value)
+        buy_exchange_fee = self.get_exchange_fee(opportunity.buy_exchange, buy_value, opportunity.token_pair)
+        sell_exchange_fee = self.get_exchange_fee(opportunity.sell_exchange, sell_value, opportunity.token_pair)
         gas_cost = self.get_gas_cost_estimate(use_flashloan)
         
         # Calculate flashloan fee if applicable
@@ -107,3 +224,207 @@ class ProfitCalculator:
         logger.debug(f"Calculated profit for {opportunity.token_pair}: {net_profit:.4f} ({profit_percentage:.2f}%)")
         
         return opportunity
+    
+    def calculate_profit_batch(self, batch: OpportunityBatch) -> OpportunityBatch:
+        """
+        Calculate profits for a whole batch of opportunities in one vectorized pass
+        
+        Same arithmetic as calculate_profit, with per-row trade amounts, fee rates and
+        flashloan flags. Rows without fee rates take them from the fee schedule, like
+        calculate_profit does. Results are written into the batch's result columns.
+        
+        Args:
+            batch: OpportunityBatch to calculate
+            
+        Returns:
+            The same batch, with its result columns filled in
+        """
+        buy_value = batch.trade_amount * batch.buy_price
+        sell_value = batch.trade_amount * batch.sell_price
+        
+        if self.fee_schedule is not None and (batch.buy_fee_rate is None or batch.sell_fee_rate is None):
+            batch.fill_fee_rates(self.fee_schedule)
+        buy_fee_rate = self.default_exchange_fee_rate if batch.buy_fee_rate is None else batch.buy_fee_rate
+        sell_fee_rate = self.default_exchange_fee_rate if batch.sell_fee_rate is None else batch.sell_fee_rate
+        np.add(buy_value * buy_fee_rate, sell_value * sell_fee_rate, out=batch.exchange_fee_estimate)
+        
+        np.multiply(buy_value, self.default_flashloan_fee_rate, out=batch.flashloan_fee_estimate)
+        batch.flashloan_fee_estimate[~batch.use_flashloan] = 0.0
+        
+        batch.gas_cost_estimate[:] = np.where(batch.use_flashloan, self.get_gas_cost_estimate(True),
+                                              self.get_gas_cost_estimate(False))
+        
+        profit = batch.estimated_profit
+        np.subtract(sell_value, buy_value, out=profit)
+        profit -= batch.exchange_fee_estimate
+        profit -= batch.gas_cost_estimate
+        profit -= batch.flashloan_fee_estimate
+        
+        batch.estimated_profit_percentage.fill(0.0)
+        np.divide(profit * 100, buy_value, out=batch.estimated_profit_percentage, where=buy_value != 0)
+        
+        logger.debug(f"Calculated profit for {len(batch)} opportunities, "
+                     f"{int(np.count_nonzero(profit > 0))} profitable")
+        
+        return batch
+    
+    def _sized_result(self, size: float, opportunity: OpportunityData, buy_curve, sell_curve,
+                      use_flashloan: bool) -> Dict[str, float]:
+        """Value, fees and net profit before gas of trading `size` along two depth curves"""
+        buy_value = buy_curve.value(size)
+        sell_value = sell_curve.value(size)
+        if size <= 0 or math.isinf(buy_value):
+            return {"buy_value": 0.0, "sell_value": 0.0, "exchange_fee": 0.0, "flashloan_fee": 0.0, "net": 0.0}
+        
+        exchange_fee = 0.0
+        if not buy_curve.fee_included:
+            exchange_fee += self.get_exchange_fee(opportunity.buy_exchange, buy_value, opportunity.token_pair)
+        if not sell_curve.fee_included:
+            exchange_fee += self.get_exchange_fee(opportunity.sell_exchange, sell_value, opportunity.token_pair)
+        flashloan_fee = self.get_flashloan_fee(buy_value) if use_flashloan else 0.0
+        
+        return {
+            "buy_value": buy_value,
+            "sell_value": sell_value,
+            "exchange_fee": exchange_fee,
+            "flashloan_fee": flashloan_fee,
+            "net": sell_value - buy_value - exchange_fee - flashloan_fee
+        }
+    
+    def optimize_trade_size(self, opportunity: OpportunityData, buy_curve, sell_curve,
+                            use_flashloan: bool = False) -> OpportunityData:
+        """
+        Find the trade size that maximizes net profit along the buy and sell depth curves
+        
+        Buy cost is convex and sell proceeds concave in size, and fees are linear in
+        value, so profit is concave and golden-section search finds its maximum. Gas
+        is a flat cost: it does not move the optimum but decides whether it pays.
+        
+        Args:
+            opportunity: OpportunityData to size
+            buy_curve: DepthCurve of the buy venue (side='buy')
+            sell_curve: DepthCurve of the sell venue (side='sell')
+            use_flashloan: Whether the buy side is funded with a flashloan
+            
+        Returns:
+            Updated OpportunityData with optimal_trade_size and profit calculations;
+            optimal_trade_size is 0 if no size is profitable after gas
+        """
+        low, high = 0.0, min(buy_curve.max_size, sell_curve.max_size)
+        tolerance = self.size_tolerance * high
+        inverse_phi = (math.sqrt(5) - 1) / 2
+        
+        def profit(size):
+            return self._sized_result(size, opportunity, buy_curve, sell_curve, use_flashloan)["net"]
+        
+        if high > 0:
+            x1 = high - inverse_phi * (high - low)
+            x2 = low + inverse_phi * (high - low)
+            f1, f2 = profit(x1), profit(x2)
+            while high - low > tolerance:
+                if f1 < f2:
+                    low, x1, f1 = x1, x2, f2
+                    x2 = low + inverse_phi * (high - low)
+                    f2 = profit(x2)
+                else:
+                    high, x2, f2 = x2, x1, f1
+                    x1 = high - inverse_phi * (high - low)
+                    f1 = profit(x1)
+        
+        size = (low + high) / 2
+        result = self._sized_result(size, opportunity, buy_curve, sell_curve, use_flashloan)
+        gas_cost = self.get_gas_cost_estimate(use_flashloan)
+        net_profit = result["net"] - gas_cost
+        
+        opportunity.optimal_trade_size = size if net_profit > 0 else 0.0
+        opportunity.estimated_profit = net_profit
+        opportunity.estimated_profit_percentage = (net_profit / result["buy_value"]) * 100 if result["buy_value"] else 0.0
+        opportunity.gas_cost_estimate = gas_cost
+        opportunity.exchange_fee_estimate = result["exchange_fee"]
+        opportunity.flashloan_fee_estimate = result["flashloan_fee"]
+        
+        logger.debug(f"Optimal size for {opportunity.token_pair} {opportunity.buy_exchange}->{opportunity.sell_exchange}: "
+                     f"{size:.6f} for {net_profit:.4f} net")
+        
+        return opportunity
+    
+    def optimize_trade_sizes(self, sizing: List[Tuple[OpportunityData, Any, Any]],
+                             use_flashloan: bool = False) -> List[OpportunityData]:
+        """
+        Size every opportunity of a scan in one call
+        
+        Args:
+            sizing: List of (opportunity, buy_curve, sell_curve)
+            use_flashloan: Whether the buy sides are funded with flashloans
+            
+        Returns:
+            The sized opportunities, most profitable first
+        """
+        sized = []
+        for opportunity, buy_curve, sell_curve in sizing:
+            if buy_curve is None or sell_curve is None:
+                continue
+            try:
+                sized.append(self.optimize_trade_size(opportunity, buy_curve, sell_curve, use_flashloan))
+            except Exception as e:
+                logger.error(f"Error sizing {opportunity.token_pair}: {str(e)}")
+        
+        sized.sort(key=lambda opportunity: opportunity.estimated_profit, reverse=True)
+        return sized
+    
+    def _run_cycle(self, cycle, start_amount: float, apply_fees: bool) -> float:
+        """Amount of the start currency left after trading through every leg of a cycle"""
+        amount = start_amount
+        for leg in cycle.legs:
+            if leg.side == 'sell':
+                amount = amount * leg.price
+            elif leg.side == 'buy':
+                amount = amount / leg.price
+            else:
+                continue
+            if apply_fees:
+                amount -= self.get_exchange_fee(leg.venue, amount, leg.symbol)
+        return amount
+    
+    def calculate_cycle_profit(self, cycle, start_amount: float = 1.0, start_price_usd: float = 1.0,
+                               use_flashloan: bool = False):
+        """
+        Calculate the potential profit for a triangular or multi-hop cycle
+        
+        Args:
+            cycle: CycleOpportunity from the cycle detector
+            start_amount: Amount of the cycle's start currency to trade
+            start_price_usd: USD price of the start currency (1.0 for stablecoins)
+            use_flashloan: Whether to borrow the start amount with a flashloan
+            
+        Returns:
+            Updated CycleOpportunity with profit calculations in USD
+        """
+        final_amount = self._run_cycle(cycle, start_amount, apply_fees=True)
+        final_amount_before_fees = self._run_cycle(cycle, start_amount, apply_fees=False)
+        
+        raw_profit = (final_amount_before_fees - start_amount) * start_price_usd
+        exchange_fees = (final_amount_before_fees - final_amount) * start_price_usd
+        
+        # Only legs executed on-chain pay gas
+        gas_cost = 0.0
+        if any(leg.venue == 'uniswap_v3' for leg in cycle.legs) or use_flashloan:
+            gas_cost = self.get_gas_cost_estimate(use_flashloan)
+        
+        flashloan_fee = 0
+        if use_flashloan:
+            flashloan_fee = self.get_flashloan_fee(start_amount * start_price_usd)
+        
+        net_profit = raw_profit - exchange_fees - gas_cost - flashloan_fee
+        
+        cycle.trade_amount = start_amount
+        cycle.estimated_profit = net_profit
+        cycle.estimated_profit_percentage = (net_profit / (start_amount * start_price_usd)) * 100
+        cycle.gas_cost_estimate = gas_cost
+        cycle.exchange_fee_estimate = exchange_fees
+        cycle.flashloan_fee_estimate = flashloan_fee
+        
+        logger.debug(f"Calculated cycle profit starting in {cycle.start_currency} over {len(cycle.legs)} legs: "
+                     f"{net_profit:.4f} ({cycle.estimated_profit_percentage:.2f}%)")
+        
+        return cycle
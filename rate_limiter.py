@@ -0,0 +1,168 @@
+import os
+import logging
+import asyncio
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Request weight of an order book by requested depth, as [(max depth, cost), ...].
+# Costs are in units of one ccxt rateLimit interval.
+ORDER_BOOK_COSTS = {
+    'binance': [(100, 5), (500, 25), (1000, 50), (5000, 250)],
+    'binanceus': [(100, 5), (500, 25), (1000, 50), (5000, 250)],
+    'kucoin': [(20, 1), (100, 2)],
+}
+
+# Cost of fetch_tickers for venues that weigh it more heavily than a single ticker
+FETCH_TICKERS_COSTS = {
+    'binance': 40,
+    'binanceus': 40,
+}
+
+def order_book_cost(exchange_id: str, depth: Optional[int]) -> float:
+    """Cost of a fetch_order_book call at the given depth (None for the venue default)"""
+    tiers = ORDER_BOOK_COSTS.get(exchange_id)
+    if not tiers:
+        return 1
+    if depth is None:
+        return tiers[0][1]
+    for max_depth, cost in tiers:
+        if depth <= max_depth:
+            return cost
+    return tiers[-1][1]
+
+def fetch_tickers_cost(exchange_id: str) -> float:
+    """Cost of a batched fetch_tickers call"""
+    return FETCH_TICKERS_COSTS.get(exchange_id, 1)
+
+class LocalBucketBackend:
+    """Token buckets held in this process"""
+
+    def __init__(self):
+        self._buckets: Dict[str, Tuple[float, float]] = {}  # key -> (tokens, updated_at)
+        self._lock = threading.Lock()
+
+    async def reserve(self, key: str, cost: float, rate: float, capacity: float) -> float:
+        """
+        Take `cost` tokens from a bucket, going into debt if needed
+
+        Returns:
+            Seconds the caller has to wait before its request may be sent
+        """
+        with self._lock:
+            now = time.monotonic()
+            tokens, updated_at = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated_at) * rate) - cost
+            self._buckets[key] = (tokens, now)
+        return -tokens / rate if tokens < 0 else 0.0
+
+class RedisBucketBackend:
+    """
+    Token buckets shared by every process using the same Redis-compatible server
+
+    The refill and reservation run in one Lua script, so concurrent workers cannot
+    overspend a venue's budget, and the server clock is used so hosts need not agree.
+    """
+
+    _SCRIPT = """
+        local rate = tonumber(ARGV[1])
+        local capacity = tonumber(ARGV[2])
+        local cost = tonumber(ARGV[3])
+        local clock = redis.call('TIME')
+        local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+        local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+        local tokens = tonumber(state[1]) or capacity
+        local ts = tonumber(state[2]) or now
+        tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate) - cost
+        redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+        redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 60)
+        if tokens >= 0 then return '0' end
+        return tostring(-tokens / rate)
+    """
+
+    def __init__(self, url: str, prefix: str = "ratelimit:"):
+        """
+        Args:
+            url: Redis URL, e.g. redis://localhost:6379/0
+            prefix: Prefix of the bucket keys
+        """
+        try:
+            import redis.asyncio as redis_asyncio
+        except ImportError:
+            raise ImportError("The redis package is required for a shared rate limit backend: pip install redis")
+
+        self.client = redis_asyncio.from_url(url)
+        self.prefix = prefix
+        self._script = self.client.register_script(self._SCRIPT)
+
+    async def reserve(self, key: str, cost: float, rate: float, capacity: float) -> float:
+        wait = await self._script(keys=[self.prefix + key], args=[rate, capacity, cost])
+        return float(wait)
+
+_default_backend = None
+
+def get_default_backend():
+    """
+    Backend selected by RATE_LIMIT_BACKEND: 'local' (default) or a redis:// URL
+
+    Falls back to local buckets if the shared backend cannot be created.
+    """
+    global _default_backend
+    if _default_backend is None:
+        url = os.getenv("RATE_LIMIT_BACKEND", "local")
+        if url.startswith(("redis://", "rediss://", "unix://")):
+            try:
+                _default_backend = RedisBucketBackend(url)
+                logger.info("Using shared rate limit buckets")
+            except Exception as e:
+                logger.error(f"Error creating shared rate limit backend, using local buckets: {str(e)}")
+        if _default_backend is None:
+            _default_backend = LocalBucketBackend()
+    return _default_backend
+
+class RateLimiter:
+    """
+    Token-bucket rate limiter for one venue
+
+    The bucket refills at `rate` tokens per second up to `capacity`; a request
+    takes `cost` tokens. The reservation is made before sleeping, so concurrent
+    callers queue up behind each other instead of all waking at once.
+    """
+
+    def __init__(self, max_calls_per_second: float = 5, capacity: Optional[float] = None,
+                 key: Optional[str] = None, backend=None):
+        """
+        Args:
+            max_calls_per_second: Refill rate in tokens per second
+            capacity: Burst size in tokens (defaults to one second of refill)
+            key: Bucket name; limiters with the same key share one budget
+            backend: LocalBucketBackend or RedisBucketBackend (defaults to RATE_LIMIT_BACKEND)
+        """
+        self.rate = float(max_calls_per_second)
+        self.capacity = float(capacity) if capacity is not None else max(1.0, self.rate)
+        self.key = key or f"limiter-{id(self)}"
+        self.backend = backend or get_default_backend()
+
+    @classmethod
+    def for_exchange(cls, exchange, capacity: Optional[float] = None, backend=None) -> 'RateLimiter':
+        """
+        Limiter matching a ccxt exchange's declared rateLimit (milliseconds per request)
+
+        Args:
+            exchange: ccxt exchange instance
+            capacity: Burst size in tokens (defaults to 1, like ccxt's own throttler)
+            backend: Optional backend shared between processes
+        """
+        rate_limit_ms = getattr(exchange, 'rateLimit', None) or 200
+        return cls(1000.0 / rate_limit_ms, capacity=capacity if capacity is not None else 1.0,
+                   key=exchange.id, backend=backend)
+
+    async def wait(self, cost: float = 1):
+        """Wait until a request costing `cost` tokens may be sent"""
+        delay = await self.backend.reserve(self.key, cost, self.rate, self.capacity)
+        if delay > 0:
+            await asyncio.sleep(delay)
@@ -0,0 +1,93 @@
+"""
+Standalone scanner worker
+
+Runs the exchange scanner in its own process and publishes opportunities through
+the shared database (SQLite in WAL mode, or Postgres), which the web tier only
+reads. Run the web tier with SCANNER_MODE=worker so it does not start its own
+scanner thread, then start exactly one worker per deployment:
+
+    SCANNER_MODE=worker gunicorn --bind 0.0.0.0:5000 main:app
+    python scanner_worker.py --cpu 3
+"""
+import os
+import sys
+import signal
+import argparse
+import logging
+from datetime import datetime
+
+# The worker owns the scanner; importing app must not start a scanner thread as well
+os.environ["SCANNER_MODE"] = "worker"
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run the arbitrage scanner as a standalone worker process")
+    parser.add_argument("--cpu", type=int, nargs="+", default=None,
+                        help="Pin the worker to these CPU cores (Linux only)")
+    parser.add_argument("--once", action="store_true",
+                        help="Run a single scan and exit")
+    parser.add_argument("--force", action="store_true",
+                        help="Start even if another worker's heartbeat is recent")
+    return parser.parse_args(argv)
+
+def pin_to_cpus(cpus):
+    """Restrict this process to the given CPU cores"""
+    if not hasattr(os, "sched_setaffinity"):
+        logger.warning("CPU pinning is not supported on this platform")
+        return
+    try:
+        os.sched_setaffinity(0, set(cpus))
+        logger.info(f"Scanner worker pinned to CPUs {sorted(cpus)}")
+    except OSError as e:
+        logger.error(f"Error pinning scanner worker to CPUs {cpus}: {str(e)}")
+
+def other_worker_alive(app_module, max_age=30):
+    """Whether another worker has written a heartbeat in the last `max_age` seconds"""
+    with app_module.app.app_context():
+        status = app_module.ScannerStatus.query.first()
+        if not status or not status.heartbeat_at or status.pid == os.getpid() or status.mode != "worker":
+            return False
+        return (datetime.utcnow() - status.heartbeat_at).total_seconds() < max_age
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.cpu:
+        pin_to_cpus(args.cpu)
+
+    import app as app_module  # Imported here so SCANNER_MODE is set before the app initializes
+
+    if not args.force and other_worker_alive(app_module):
+        logger.error("Another scanner worker is running (use --force to start anyway)")
+        return 1
+
+    def handle_signal(signum, frame):
+        logger.info(f"Received signal {signum}, stopping scanner worker")
+        app_module.stop_scanner()
+
+    signal.signal(signal.SIGTERM, handle_signal)
+    signal.signal(signal.SIGINT, handle_signal)
+
+    with app_module.app.app_context():
+        status = app_module.get_scanner_status()
+        status.pid = os.getpid()
+        status.mode = "worker"
+        status.started_at = datetime.utcnow()
+        status.heartbeat_at = status.started_at
+        app_module.db.session.commit()
+
+    logger.info(f"Scanner worker started with pid {os.getpid()}")
+    if args.once:
+        app_module.warm_up_scanner()
+        app_module.run_scan_cycle()
+    else:
+        app_module.scan_for_opportunities()
+
+    app_module.scanner.close()
+    logger.info("Scanner worker stopped")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
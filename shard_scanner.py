@@ -0,0 +1,199 @@
+import logging
+import asyncio
+import queue
+import threading
+import time
+import zlib
+import multiprocessing
+from typing import Dict, List, Optional, Callable, Tuple
+from dataclasses import dataclass
+
+from price_stream import Quote
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+@dataclass(frozen=True)
+class VenueConfig:
+    """Picklable copy of the ExchangeConfig fields a shard process needs"""
+    exchange_name: str
+    api_key: Optional[str] = None
+    api_secret: Optional[str] = None
+    is_active: bool = True
+
+    @classmethod
+    def from_config(cls, config) -> 'VenueConfig':
+        return cls(config.exchange_name, config.api_key, config.api_secret, config.is_active)
+
+def shard_for(exchange_id: str, symbol: str, shard_count: int) -> int:
+    """
+    Shard that owns a (venue, symbol) subscription
+
+    Uses crc32 rather than hash() so every process agrees on the assignment.
+    """
+    return zlib.crc32(f"{exchange_id}|{symbol}".encode()) % shard_count
+
+def partition(subscriptions: List[Tuple[str, str]], shard_count: int) -> List[List[Tuple[str, str]]]:
+    """Split (venue, symbol) subscriptions into shard_count hash partitions"""
+    shards = [[] for _ in range(shard_count)]
+    for exchange_id, symbol in subscriptions:
+        shards[shard_for(exchange_id, symbol, shard_count)].append((exchange_id, symbol))
+    return [sorted(shard) for shard in shards]
+
+def run_shard(shard_id: int, shard_count: int, venue_configs: List[VenueConfig],
+              subscriptions: List[Tuple[str, str]], quotes, stop_event, poll_interval: float):
+    """
+    Entry point of a shard process: poll tickers for the shard's subscriptions
+
+    Quotes are pushed to the aggregator in one batch per poll, as (shard_id, [Quote, ...]).
+    """
+    from exchange_scanner import ExchangeScanner  # Imported here to avoid circular imports
+    from rate_limiter import LocalBucketBackend  # Imported here to avoid circular imports
+
+    scanner = ExchangeScanner(db=None, connect_uniswap=False)
+    symbols_by_venue = {}
+    for exchange_id, symbol in subscriptions:
+        symbols_by_venue.setdefault(exchange_id, []).append(symbol)
+    scanner.warm_up([config for config in venue_configs if config.exchange_name in symbols_by_venue],
+                    connect_uniswap=False)
+    exchanges = {exchange_id: scanner.async_exchange_instances[exchange_id]
+                 for exchange_id in symbols_by_venue if exchange_id in scanner.async_exchange_instances}
+
+    # Every shard polls every venue; without shared buckets each takes an equal share of the budget
+    for limiter in scanner.rate_limiters.values():
+        if isinstance(limiter.backend, LocalBucketBackend):
+            limiter.rate /= shard_count
+
+    async def poll():
+        while not stop_event.is_set():
+            started = time.monotonic()
+            venues = list(exchanges)
+            results = await asyncio.gather(*[scanner._fetch_tickers(exchanges[exchange_id], symbols_by_venue[exchange_id])
+                                             for exchange_id in venues])
+            batch = [Quote.from_ticker(exchange_id, symbol, ticker)
+                     for exchange_id, tickers in zip(venues, results)
+                     for symbol, ticker in tickers.items()
+                     if ticker.get('last') or (ticker.get('bid') and ticker.get('ask'))]
+            if batch:
+                quotes.put((shard_id, batch))
+            # Sleep in short steps so a stop request is noticed quickly
+            while not stop_event.is_set() and time.monotonic() - started < poll_interval:
+                await asyncio.sleep(min(0.1, poll_interval))
+
+    logger.info(f"Shard {shard_id}/{shard_count} polling {len(subscriptions)} subscriptions on {len(exchanges)} venues")
+    try:
+        scanner._run_async(poll())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        scanner.close()
+
+class ShardPool:
+    """
+    Scanner processes that each poll a hash partition of (venue, symbol) subscriptions
+
+    Shards push normalized quotes into one queue; a thread in this process hands
+    them to `on_quote`, which runs detection. When subscriptions change only the
+    shards whose partition changed are restarted.
+    """
+
+    def __init__(self, on_quote: Callable[[Quote], None], shard_count: int, poll_interval: float = 1.0):
+        """
+        Args:
+            on_quote: Called in the aggregator thread for every quote received
+            shard_count: Number of shard processes
+            poll_interval: Seconds between ticker polls in each shard
+        """
+        self.on_quote = on_quote
+        self.shard_count = shard_count
+        self.poll_interval = poll_interval
+        # Shards are spawned rather than forked; the parent runs Flask and several threads
+        self._context = multiprocessing.get_context("spawn")
+        self.quotes = self._context.Queue()
+        self.assignments: List[List[Tuple[str, str]]] = [[] for _ in range(shard_count)]
+        self._venue_configs: List[VenueConfig] = []
+        self._processes: Dict[int, Tuple[multiprocessing.Process, object]] = {}  # shard id -> (process, stop event)
+        self.quote_count = 0
+        self._running = True
+        self._thread = threading.Thread(target=self._drain, daemon=True)
+        self._thread.start()
+
+    @property
+    def subscriptions(self) -> List[Tuple[str, str]]:
+        return sorted(subscription for shard in self.assignments for subscription in shard)
+
+    def _start_shard(self, shard_id: int):
+        stop_event = self._context.Event()
+        process = self._context.Process(
+            target=run_shard,
+            args=(shard_id, self.shard_count, self._venue_configs, self.assignments[shard_id],
+                  self.quotes, stop_event, self.poll_interval),
+            name=f"scanner-shard-{shard_id}",
+            daemon=True
+        )
+        process.start()
+        self._processes[shard_id] = (process, stop_event)
+
+    def _stop_shards(self, shard_ids: List[int], timeout: float = 2.0):
+        """Signal shards to stop, then terminate any still running after `timeout` seconds"""
+        stopping = [self._processes.pop(shard_id) for shard_id in shard_ids if shard_id in self._processes]
+        for _, stop_event in stopping:
+            stop_event.set()
+        deadline = time.monotonic() + timeout
+        for process, _ in stopping:
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                process.terminate()
+                process.join(timeout)
+
+    def update(self, venue_configs: List[VenueConfig], subscriptions: List[Tuple[str, str]]) -> List[int]:
+        """
+        Rebalance the shards for a new set of subscriptions
+
+        Returns:
+            Ids of the shards that were (re)started or stopped
+        """
+        venue_configs = sorted(venue_configs, key=lambda config: config.exchange_name)
+        configs_changed = venue_configs != self._venue_configs
+        self._venue_configs = venue_configs
+
+        changed = []
+        assignments = partition(subscriptions, self.shard_count)
+        for shard_id, assignment in enumerate(assignments):
+            alive = shard_id in self._processes and self._processes[shard_id][0].is_alive()
+            if assignment != self.assignments[shard_id] or configs_changed or (assignment and not alive):
+                changed.append(shard_id)
+
+        self._stop_shards(changed)
+        for shard_id in changed:
+            self.assignments[shard_id] = assignments[shard_id]
+            if assignments[shard_id]:
+                self._start_shard(shard_id)
+
+        if changed:
+            logger.info(f"Rebalanced shards {changed}: " +
+                        ", ".join(str(len(assignment)) for assignment in self.assignments) + " subscriptions per shard")
+        return changed
+
+    def _drain(self):
+        """Hand quotes from every shard to the detector"""
+        while self._running:
+            try:
+                _, batch = self.quotes.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            except (EOFError, OSError):
+                break
+            for quote in batch:
+                self.quote_count += 1
+                try:
+                    self.on_quote(quote)
+                except Exception as e:
+                    logger.error(f"Error handling shard quote for {quote.symbol}: {str(e)}")
+
+    def stop(self):
+        """Stop every shard process and the aggregator thread"""
+        self._stop_shards(list(self._processes))
+        self._running = False
+        self._thread.join(timeout=2)
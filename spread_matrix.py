@@ -0,0 +1,233 @@
+import logging
+import numpy as np
+from typing import Dict, Any, List, Optional, Sequence
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class SpreadMatrix:
+    """
+    Vectorized cross-venue spread detection
+
+    Quotes are held in (symbol x venue) ask/bid matrices and every ordered venue
+    pair is evaluated at once, so all profitable pairs are found instead of only
+    the global lowest and highest price per symbol. Buffers are reused between
+    scans while the symbol and venue sets stay the same.
+    """
+
+    def __init__(self, symbols: Sequence[str], venues: Sequence[str]):
+        """
+        Args:
+            symbols: Symbols making up the matrix rows
+            venues: Venues making up the matrix columns
+        """
+        self.symbols = list(symbols)
+        self.venues = list(venues)
+        self.symbol_index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.venue_index = {venue: i for i, venue in enumerate(self.venues)}
+
+        shape = (len(self.symbols), len(self.venues))
+        self.asks = np.full(shape, np.nan)
+        self.bids = np.full(shape, np.nan)
+        self.fee_rates = np.zeros(shape)  # Taker fee rate per (symbol, venue)
+        self._fee_version = None  # FeeSchedule version fee_rates was built from
+
+        pair_shape = (len(self.symbols), len(self.venues), len(self.venues))
+        self._buy_cost = np.empty(shape)
+        self._sell_value = np.empty(shape)
+        self._edges = np.empty(pair_shape)
+        self._same_venue = np.eye(len(self.venues), dtype=bool)
+
+    def matches(self, symbols: Sequence[str], venues: Sequence[str]) -> bool:
+        """Whether the matrix was built for exactly these symbols and venues"""
+        return list(symbols) == self.symbols and list(venues) == self.venues
+
+    def set_fee_rates(self, fee_rates: Dict[str, float], default: float = 0.0):
+        """Set the taker fee rate charged by each venue on every symbol"""
+        for venue, i in self.venue_index.items():
+            self.fee_rates[:, i] = fee_rates.get(venue, default)
+        self._fee_version = None
+
+    def set_fee_schedule(self, fee_schedule):
+        """
+        Set the taker fee rate of every (symbol, venue) cell from a FeeSchedule
+
+        Venue-wide rates are broadcast to whole columns and only the symbols with
+        their own fee (e.g. Uniswap pool tiers) are written individually. The table
+        is rebuilt only when the schedule's version has changed.
+        """
+        if self._fee_version == fee_schedule.version:
+            return
+        venue_rates = fee_schedule.venue_fee_rates()
+        self.fee_rates[:] = np.array([venue_rates.get(venue, fee_schedule.default_taker) for venue in self.venues])
+        for (venue, symbol), rate in fee_schedule.symbol_fee_rates().items():
+            i = self.symbol_index.get(symbol)
+            j = self.venue_index.get(venue)
+            if i is not None and j is not None:
+                self.fee_rates[i, j] = rate
+        self._fee_version = fee_schedule.version
+
+    def load(self, exchange_prices: Dict[str, Dict[str, Dict[str, Any]]]):
+        """
+        Fill the ask/bid matrices from scanner price records
+
+        Args:
+            exchange_prices: Dictionary of exchange id -> symbol -> price record
+        """
+        self.asks.fill(np.nan)
+        self.bids.fill(np.nan)
+        for venue, symbols in exchange_prices.items():
+            j = self.venue_index.get(venue)
+            if j is None:
+                continue
+            for symbol, record in symbols.items():
+                i = self.symbol_index.get(symbol)
+                if i is None:
+                    continue
+                self.asks[i, j] = record.get('ask') or record['price']
+                self.bids[i, j] = record.get('bid') or record['price']
+
+    def net_edges(self) -> np.ndarray:
+        """
+        Net relative edge for every (symbol, buy venue, sell venue)
+
+        edge[s, i, j] = (bid[s, j] * (1 - fee[s, j]) - ask[s, i] * (1 + fee[s, i])) / (ask[s, i] * (1 + fee[s, i]))
+
+        Missing quotes and same-venue pairs are set to -inf.
+        """
+        np.multiply(self.asks, 1 + self.fee_rates, out=self._buy_cost)
+        np.multiply(self.bids, 1 - self.fee_rates, out=self._sell_value)
+
+        edges = self._edges
+        np.subtract(self._sell_value[:, None, :], self._buy_cost[:, :, None], out=edges)
+        np.divide(edges, self._buy_cost[:, :, None], out=edges)
+
+        edges[:, self._same_venue] = -np.inf
+        np.nan_to_num(edges, copy=False, nan=-np.inf)
+        return edges
+
+    def top_pairs(self, top_k: int = 3, min_edge: float = 0.0):
+        """
+        Best venue pairs per symbol ranked by net edge
+
+        The edge is sell_value[j] / buy_cost[i] - 1, so any of the top-k pairs must
+        buy on one of the k + 1 cheapest venues and sell on one of the k + 1 richest
+        (one extra to allow for excluded same-venue pairs). Only that small candidate
+        block is expanded instead of the full venue x venue matrix.
+
+        Args:
+            top_k: Maximum number of venue pairs returned per symbol
+            min_edge: Only return pairs whose net relative edge exceeds this value (>= -1)
+
+        Returns:
+            Tuple of arrays (symbol_idx, buy_venue_idx, sell_venue_idx, net_edge),
+            ordered by symbol and then by descending edge
+        """
+        n_symbols, n_venues = len(self.symbols), len(self.venues)
+        if n_symbols == 0 or n_venues < 2 or top_k < 1:
+            empty = np.empty(0, dtype=np.intp)
+            return empty, empty, empty, np.empty(0)
+
+        np.multiply(self.asks, 1 + self.fee_rates, out=self._buy_cost)
+        np.multiply(self.bids, 1 - self.fee_rates, out=self._sell_value)
+        buy_cost = np.where(np.isnan(self._buy_cost), np.inf, self._buy_cost)
+        sell_value = np.where(np.isnan(self._sell_value), -np.inf, self._sell_value)
+
+        # Candidate venues on each side
+        c = min(top_k + 1, n_venues)
+        if c < n_venues:
+            buy_venues = np.argpartition(buy_cost, c - 1, axis=1)[:, :c]
+            sell_venues = np.argpartition(-sell_value, c - 1, axis=1)[:, :c]
+        else:
+            buy_venues = np.broadcast_to(np.arange(n_venues), (n_symbols, n_venues))
+            sell_venues = buy_venues
+        candidate_buy = np.take_along_axis(buy_cost, buy_venues, axis=1)
+        candidate_sell = np.take_along_axis(sell_value, sell_venues, axis=1)
+
+        # Missing quotes give an edge of -1 (buy at inf) or NaN/-inf (sell at -inf),
+        # which never pass a min_edge >= -1 and sort after real edges
+        with np.errstate(invalid='ignore'):
+            edges = candidate_sell[:, None, :] / candidate_buy[:, :, None] - 1
+        edges[buy_venues[:, :, None] == sell_venues[:, None, :]] = -np.inf
+
+        # Rank the candidate block of each symbol
+        flat = edges.reshape(n_symbols, c * c)
+        k = min(top_k, c * c)
+        order = np.argsort(-flat, axis=1, kind='stable')[:, :k]
+        net_edge = np.take_along_axis(flat, order, axis=1).ravel()
+        symbol_idx = np.repeat(np.arange(n_symbols), k)
+        buy_idx = np.take_along_axis(buy_venues, order // c, axis=1).ravel()
+        sell_idx = np.take_along_axis(sell_venues, order % c, axis=1).ravel()
+
+        keep = net_edge > min_edge
+        return symbol_idx[keep], buy_idx[keep], sell_idx[keep], net_edge[keep]
+
+    def to_batch(self, top_k: int = 3, min_edge: float = 0.0, trade_amount: float = 1.0,
+                 trade_value: Optional[float] = None):
+        """
+        Build an OpportunityBatch for the top venue pairs without creating per-row objects
+
+        Args:
+            top_k: Maximum number of venue pairs per symbol
+            min_edge: Minimum net relative edge
+            trade_amount: Base amount traded per opportunity
+            trade_value: Quote amount spent per opportunity; overrides trade_amount when given
+
+        Returns:
+            OpportunityBatch labelled with symbol and venue indices into this matrix
+        """
+        from profit_calculator import OpportunityBatch  # Imported here to avoid circular imports
+
+        symbol_idx, buy_idx, sell_idx, _ = self.top_pairs(top_k, min_edge)
+        buy_price = self.asks[symbol_idx, buy_idx]
+        if trade_value is not None:
+            trade_amount = trade_value / buy_price
+        return OpportunityBatch(
+            buy_price=buy_price,
+            sell_price=self.bids[symbol_idx, sell_idx],
+            trade_amount=trade_amount,
+            buy_fee_rate=self.fee_rates[symbol_idx, buy_idx],
+            sell_fee_rate=self.fee_rates[symbol_idx, sell_idx],
+            symbol_idx=symbol_idx,
+            buy_venue_idx=buy_idx,
+            sell_venue_idx=sell_idx
+        )
+
+    def to_opportunities(self, batch, rows, timestamp: int = 0) -> List[Any]:
+        """
+        Build OpportunityData objects for selected rows of a batch from to_batch
+
+        Args:
+            batch: OpportunityBatch returned by to_batch, usually priced by calculate_profit_batch
+            rows: Row indices to build, e.g. batch.profitable()
+            timestamp: Timestamp in milliseconds given to every opportunity
+
+        Returns:
+            List of OpportunityData objects in the order of rows, carrying the batch's profit estimates
+        """
+        from exchange_scanner import OpportunityData  # Imported here to avoid circular imports
+
+        opportunities = []
+        for row in np.asarray(rows).tolist():
+            buy_price = float(batch.buy_price[row])
+            sell_price = float(batch.sell_price[row])
+            price_diff = sell_price - buy_price
+            opportunity = OpportunityData(
+                token_pair=self.symbols[batch.symbol_idx[row]],
+                buy_exchange=self.venues[batch.buy_venue_idx[row]],
+                sell_exchange=self.venues[batch.sell_venue_idx[row]],
+                buy_price=buy_price,
+                sell_price=sell_price,
+                price_difference=price_diff,
+                price_difference_percentage=(price_diff / buy_price) * 100,
+                timestamp=timestamp
+            )
+            opportunity.trade_amount = float(batch.trade_amount[row])
+            opportunity.estimated_profit = float(batch.estimated_profit[row])
+            opportunity.estimated_profit_percentage = float(batch.estimated_profit_percentage[row])
+            opportunity.gas_cost_estimate = float(batch.gas_cost_estimate[row])
+            opportunity.exchange_fee_estimate = float(batch.exchange_fee_estimate[row])
+            opportunity.flashloan_fee_estimate = float(batch.flashloan_fee_estimate[row])
+            opportunities.append(opportunity)
+        return opportunities
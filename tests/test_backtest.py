@@ -0,0 +1,48 @@
+import os
+
+import pytest
+
+from backtest import ReplayEngine, load_fixture
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "backtest_quotes.jsonl")
+
+# Report of the fixture with the default engine: 1 unit per trade, 0.1% taker fee per leg
+# and the calculator's fixed 0.005 ETH gas at 2000 USD
+EXPECTED_CURVE = [
+    # latency_ms, trades, profitable_trades, pnl
+    (0, 5, 5, 76.1865),
+    (100, 5, 4, 55.1755),
+    (500, 5, 1, -27.387),
+    (1000, 5, 1, -62.352),
+]
+
+def test_fixture_report():
+    report = ReplayEngine().run(load_fixture(FIXTURE))
+
+    assert report.quotes == 16
+    assert report.opportunities == 14
+    assert report.signals == 5
+    assert (report.start_ms, report.end_ms) == (1700000000000, 1700000002600)
+    assert [(result.latency_ms, result.trades, result.profitable_trades, pytest.approx(result.pnl))
+            for result in report.latency_results] == EXPECTED_CURVE
+
+def test_first_signal_is_priced_at_detection_and_after_latency():
+    trades = []
+    ReplayEngine().run(load_fixture(FIXTURE), trades)
+
+    first = {trade.latency_ms: trade for trade in trades
+             if trade.detected_at == 1700000000010}
+    assert sorted(first) == [0, 100, 500, 1000]
+    assert (first[0].buy_exchange, first[0].sell_exchange) == ("binance", "kraken")
+    # Buy 1 ETH at 2000, sell at 2030, less 4.03 of fees and 10 of gas
+    assert first[0].profit == pytest.approx(15.97)
+    # 100ms later kraken's bid has dropped to 2025
+    assert (first[100].buy_price, first[100].sell_price) == (2000.0, 2025.0)
+
+def test_replay_is_deterministic():
+    first = ReplayEngine().run(load_fixture(FIXTURE)).to_dict()
+    second = ReplayEngine().run(load_fixture(FIXTURE)).to_dict()
+    for report in (first, second):
+        report.pop("wall_seconds")
+        report.pop("speedup")
+    assert first == second
@@ -0,0 +1,300 @@
+import os
+import json
+import logging
+import threading
+import time
+from datetime import datetime, timezone, date
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from price_stream import Quote
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# One fixed-width record per quote; the venue is implied by the segment file
+TICK_DTYPE = np.dtype([
+    ('timestamp', '<i8'),   # Milliseconds since the epoch
+    ('symbol', '<u4'),      # Index into the archive's symbol dictionary
+    ('bid', '<f8'),
+    ('ask', '<f8'),
+    ('last', '<f8'),
+    ('bid_volume', '<f4'),
+    ('ask_volume', '<f4'),
+    ('volume', '<f8'),
+])
+
+# Records of several venues merged into one time-ordered array
+MERGED_DTYPE = np.dtype(TICK_DTYPE.descr + [('venue', '<u2')])
+
+MAGIC = b'TICKS001'
+HEADER_SIZE = 16  # MAGIC + record size (uint32) + reserved
+SEGMENT_SUFFIX = '.ticks'
+
+def _day_of(timestamp_ms: int) -> date:
+    return datetime.fromtimestamp(timestamp_ms / 1000, tz=timezone.utc).date()
+
+class SymbolDictionary:
+    """Symbol <-> integer id mapping shared by every segment of an archive"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.symbols: List[str] = []
+        self.ids: Dict[str, int] = {}
+        self.dirty = False  # Symbols added since the last save
+        self.reload()
+
+    def reload(self):
+        try:
+            with open(self.path) as f:
+                self.symbols = json.load(f)
+        except (OSError, ValueError):
+            self.symbols = []
+        self.ids = {symbol: i for i, symbol in enumerate(self.symbols)}
+
+    def id_for(self, symbol: str) -> int:
+        """Id of a symbol, adding it to the dictionary if new (in memory until save)"""
+        symbol_id = self.ids.get(symbol)
+        if symbol_id is None:
+            symbol_id = len(self.symbols)
+            self.symbols.append(symbol)
+            self.ids[symbol] = symbol_id
+            self.dirty = True
+        return symbol_id
+
+    def save(self, symbols: Optional[List[str]] = None):
+        """
+        Write the dictionary to disk
+
+        Args:
+            symbols: Snapshot of the symbol list to write (defaults to the current list)
+        """
+        # Ids are only ever appended, so a reader with an older copy stays valid
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.symbols if symbols is None else symbols, f)
+        os.replace(tmp_path, self.path)
+
+class TickArchive:
+    """
+    Append-only columnar archive of every quote the scanner sees
+
+    Quotes are stored as fixed-width TICK_DTYPE records in one segment file per
+    venue and UTC day ({root}/{venue}/{YYYY-MM-DD}.ticks), with symbols encoded
+    through a shared dictionary. Writes are buffered and flushed every
+    `flush_interval` seconds or `flush_size` records; segments are read back
+    zero-copy with TickReader. Flushes run on a background thread, so appending
+    never waits for the disk.
+    """
+
+    def __init__(self, root: Optional[str] = None, flush_interval: float = 1.0, flush_size: int = 4096):
+        """
+        Args:
+            root: Archive directory (defaults to TICK_ARCHIVE_DIR)
+            flush_interval: Seconds between flushes of buffered quotes
+            flush_size: Number of buffered quotes that triggers a flush
+        """
+        self.root = root or os.getenv("TICK_ARCHIVE_DIR", "instance/ticks")
+        os.makedirs(self.root, exist_ok=True)
+        self.dictionary = SymbolDictionary(os.path.join(self.root, 'symbols.json'))
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self.record_count = 0
+        self._buffer: Dict[Tuple[str, date], List[tuple]] = {}
+        self._buffered = 0
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()  # One flush writes segments at a time
+        self._flush_requested = threading.Event()
+        self._running = True
+        self._thread = threading.Thread(target=self._flush_loop, name="tick-archive-flush", daemon=True)
+        self._thread.start()
+
+    def _segment_path(self, venue: str, day: date) -> str:
+        return os.path.join(self.root, venue, f"{day.isoformat()}{SEGMENT_SUFFIX}")
+
+    def append(self, quotes: List[Quote]):
+        """Buffer quotes for writing"""
+        with self._lock:
+            for quote in quotes:
+                timestamp = int(quote.timestamp or time.time() * 1000)
+                self._buffer.setdefault((quote.exchange, _day_of(timestamp)), []).append((
+                    timestamp, self.dictionary.id_for(quote.symbol), quote.bid or 0.0, quote.ask or 0.0,
+                    quote.last or 0.0, quote.bid_volume or 0.0, quote.ask_volume or 0.0, quote.volume or 0.0
+                ))
+            self._buffered += len(quotes)
+            full = self._buffered >= self.flush_size
+        if full:
+            self._flush_requested.set()
+
+    def append_prices(self, exchange_prices: Dict[str, Dict[str, dict]]):
+        """Buffer a scan's price records (exchange -> symbol -> record), as built by ExchangeScanner"""
+        self.append([
+            Quote(exchange=exchange_id, symbol=symbol, bid=record.get('bid') or 0.0, ask=record.get('ask') or 0.0,
+                  last=record.get('price') or 0.0, volume=record.get('volume') or 0.0,
+                  timestamp=record.get('timestamp') or 0)
+            for exchange_id, symbols in exchange_prices.items()
+            for symbol, record in symbols.items()
+        ])
+
+    def _flush_loop(self):
+        """Flush every flush_interval seconds, or sooner when the buffer fills up"""
+        while self._running:
+            self._flush_requested.wait(self.flush_interval)
+            self._flush_requested.clear()
+            self.flush()
+
+    def flush(self):
+        """Write new symbols to the dictionary and buffered quotes to their segments"""
+        with self._write_lock:
+            with self._lock:
+                buffer, self._buffer = self._buffer, {}
+                self._buffered = 0
+                symbols = list(self.dictionary.symbols) if self.dictionary.dirty else None
+                self.dictionary.dirty = False
+            # Symbols go first, so every record on disk refers to a saved symbol
+            if symbols is not None:
+                try:
+                    self.dictionary.save(symbols)
+                except Exception as e:
+                    self.dictionary.dirty = True
+                    logger.error(f"Error writing tick symbol dictionary: {str(e)}")
+            self._write(buffer)
+
+    def _write(self, buffer: Dict[Tuple[str, date], List[tuple]]):
+        for (venue, day), rows in buffer.items():
+            path = self._segment_path(venue, day)
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                records = np.array(rows, dtype=TICK_DTYPE)
+                with open(path, 'ab') as f:
+                    if f.tell() == 0:
+                        f.write(MAGIC + np.uint32(TICK_DTYPE.itemsize).tobytes() + bytes(HEADER_SIZE - len(MAGIC) - 4))
+                    f.write(records.tobytes())
+                self.record_count += len(records)
+            except Exception as e:
+                logger.error(f"Error writing tick segment {path}: {str(e)}")
+
+    def close(self):
+        """Stop the flush thread and write everything still buffered"""
+        self._running = False
+        self._flush_requested.set()
+        self._thread.join(timeout=5)
+        self.flush()
+
+class TickReader:
+    """
+    Memory-mapped reader of a TickArchive
+
+    Segments are mapped read-only, so scanning them costs no copies or parsing;
+    records appended while reading become visible on the next read.
+    """
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = root or os.getenv("TICK_ARCHIVE_DIR", "instance/ticks")
+        self.dictionary = SymbolDictionary(os.path.join(self.root, 'symbols.json'))
+
+    @property
+    def venues(self) -> List[str]:
+        return sorted(name for name in os.listdir(self.root) if os.path.isdir(os.path.join(self.root, name)))
+
+    def segments(self, venues: Optional[List[str]] = None, start: Optional[date] = None,
+                 end: Optional[date] = None) -> List[Tuple[str, date, str]]:
+        """(venue, day, path) of the segments in a day range, oldest first"""
+        found = []
+        for venue in venues or self.venues:
+            directory = os.path.join(self.root, venue)
+            if not os.path.isdir(directory):
+                continue
+            for name in os.listdir(directory):
+                if not name.endswith(SEGMENT_SUFFIX):
+                    continue
+                day = date.fromisoformat(name[:-len(SEGMENT_SUFFIX)])
+                if (start is None or day >= start) and (end is None or day <= end):
+                    found.append((venue, day, os.path.join(directory, name)))
+        return sorted(found, key=lambda segment: (segment[1], segment[0]))
+
+    @staticmethod
+    def read_segment(path: str) -> np.ndarray:
+        """Map a segment as a read-only TICK_DTYPE array"""
+        with open(path, 'rb') as f:
+            header = f.read(HEADER_SIZE)
+        if len(header) < HEADER_SIZE or header[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a tick segment")
+        if int(np.frombuffer(header, dtype='<u4', count=1, offset=len(MAGIC))[0]) != TICK_DTYPE.itemsize:
+            raise ValueError(f"{path} was written with a different record layout")
+        # A crash can leave a partial record at the end; only whole records are mapped
+        count = (os.path.getsize(path) - HEADER_SIZE) // TICK_DTYPE.itemsize
+        if count == 0:
+            return np.empty(0, dtype=TICK_DTYPE)
+        return np.memmap(path, dtype=TICK_DTYPE, mode='r', offset=HEADER_SIZE, shape=(count,))
+
+    def symbol_ids(self, symbols: List[str]) -> np.ndarray:
+        self.dictionary.reload()
+        return np.array([self.dictionary.ids[symbol] for symbol in symbols if symbol in self.dictionary.ids],
+                        dtype='<u4')
+
+    def iter_segments(self, venues: Optional[List[str]] = None, start: Optional[date] = None,
+                      end: Optional[date] = None, symbols: Optional[List[str]] = None
+                      ) -> Iterator[Tuple[str, np.ndarray]]:
+        """Yield (venue, records) per segment, optionally restricted to some symbols"""
+        symbol_ids = self.symbol_ids(symbols) if symbols else None
+        for venue, _, path in self.segments(venues, start, end):
+            try:
+                records = self.read_segment(path)
+            except (OSError, ValueError) as e:
+                logger.error(f"Error reading tick segment {path}: {str(e)}")
+                continue
+            if symbol_ids is not None:
+                records = records[np.isin(records['symbol'], symbol_ids)]
+            yield venue, records
+
+    def merged(self, venues: Optional[List[str]] = None, start_ms: Optional[int] = None,
+               end_ms: Optional[int] = None, symbols: Optional[List[str]] = None) -> Tuple[np.ndarray, List[str]]:
+        """
+        Records of several venues in one array ordered by timestamp
+
+        Args:
+            venues: Venues to include (defaults to all)
+            start_ms: First timestamp to include, in milliseconds
+            end_ms: Last timestamp to include, in milliseconds
+            symbols: Optional symbols to restrict to
+
+        Returns:
+            (MERGED_DTYPE array, venue names indexed by its 'venue' field)
+        """
+        start = _day_of(start_ms) if start_ms is not None else None
+        end = _day_of(end_ms) if end_ms is not None else None
+        venue_names = list(venues or self.venues)
+        parts = []
+        for venue, records in self.iter_segments(venue_names, start, end, symbols):
+            if start_ms is not None or end_ms is not None:
+                mask = np.ones(len(records), dtype=bool)
+                if start_ms is not None:
+                    mask &= records['timestamp'] >= start_ms
+                if end_ms is not None:
+                    mask &= records['timestamp'] <= end_ms
+                records = records[mask]
+            part = np.empty(len(records), dtype=MERGED_DTYPE)
+            for name in TICK_DTYPE.names:
+                part[name] = records[name]
+            part['venue'] = venue_names.index(venue)
+            parts.append(part)
+
+        if not parts:
+            return np.empty(0, dtype=MERGED_DTYPE), venue_names
+        merged = np.concatenate(parts)
+        # Stable, so quotes with equal timestamps keep their per-venue order
+        return merged[np.argsort(merged['timestamp'], kind='stable')], venue_names
+
+    def iter_quotes(self, venues: Optional[List[str]] = None, start_ms: Optional[int] = None,
+                    end_ms: Optional[int] = None, symbols: Optional[List[str]] = None) -> Iterator[Quote]:
+        """Replay archived records as Quote objects in timestamp order"""
+        records, venue_names = self.merged(venues, start_ms, end_ms, symbols)
+        self.dictionary.reload()
+        symbol_names = self.dictionary.symbols
+        columns = [records[name].tolist() for name in MERGED_DTYPE.names]
+        for timestamp, symbol, bid, ask, last, bid_volume, ask_volume, volume, venue in zip(*columns):
+            yield Quote(exchange=venue_names[venue], symbol=symbol_names[symbol], bid=bid, ask=ask,
+                        bid_volume=bid_volume, ask_volume=ask_volume, last=last, volume=volume, timestamp=timestamp)
@@ -2,9 +2,11 @@ import os
 import json
 import logging
 import time
-from typing import Dict, Any, Optional, Tuple
+from typing import Dict, Any, Optional, Tuple, List
 from web3 import Web3
+from eth_abi import decode as abi_decode
 from dotenv import load_dotenv
+from pool_registry import PoolRegistry, PoolInfo, MISSING_POOL
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -17,6 +19,9 @@ load_dotenv()
 UNISWAP_V3_FACTORY_ADDRESS = "0x1F98431c8aD98523631AE4a59f267346ea31F984"
 UNISWAP_V3_ROUTER_ADDRESS = "0xE592427A0AEce92De3Edee1F18E0157C05861564"
 
+# Multicall3 is deployed at the same address on mainnet and most other chains
+MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
+
 # Common token addresses
 WETH_ADDRESS = "0xC02aaA39b223FE8D0A0e5C4F27eAD9083C756Cc2"  # Wrapped ETH
 USDT_ADDRESS = "0xdAC17F958D2ee523a2206206994597C13D831ec7"  # USDT
@@ -24,10 +29,34 @@ USDC_ADDRESS = "0xA0b86991c6218b36c1d19D4a2e9Eb0cE3606eB48"  # USDC
 DAI_ADDRESS = "0x6B175474E89094C44Da98b954EedeAC495271d0F"   # DAI
 WBTC_ADDRESS = "0x2260FAC5E5542a773Aa44fBCfeDf7C193bc2C599"  # Wrapped BTC
 
+# Symbols supported by the bot mapped to token addresses
+TOKEN_ADDRESSES = {
+    'ETH': WETH_ADDRESS,
+    'WETH': WETH_ADDRESS,
+    'BTC': WBTC_ADDRESS,
+    'WBTC': WBTC_ADDRESS,
+    'USDT': USDT_ADDRESS,
+    'USDC': USDC_ADDRESS,
+    'DAI': DAI_ADDRESS
+}
+
+# Token decimals, needed to convert between human amounts and raw token units
+TOKEN_DECIMALS = {
+    WETH_ADDRESS.lower(): 18,
+    USDT_ADDRESS.lower(): 6,
+    USDC_ADDRESS.lower(): 6,
+    DAI_ADDRESS.lower(): 18,
+    WBTC_ADDRESS.lower(): 8
+}
+
 # Common fee tiers in Uniswap V3 (in hundredths of a bip, 1 bip = 0.01%)
 FEE_LOW = 500      # 0.05%
 FEE_MEDIUM = 3000  # 0.3%
 FEE_HIGH = 10000   # 1%
+FEE_TIERS = [FEE_LOW, FEE_MEDIUM, FEE_HIGH]
+
+# Tick spacing the factory assigns to each fee tier
+TICK_SPACINGS = {100: 1, FEE_LOW: 10, FEE_MEDIUM: 60, FEE_HIGH: 200}
 
 # ABI for the Uniswap V3 Factory
 FACTORY_ABI = [
@@ -81,6 +110,82 @@ POOL_ABI = [
         "outputs": [{"internalType": "uint24", "name": "", "type": "uint24"}],
         "stateMutability": "view",
         "type": "function"
+    },
+    {
+        "inputs": [],
+        "name": "liquidity",
+        "outputs": [{"internalType": "uint128", "name": "", "type": "uint128"}],
+        "stateMutability": "view",
+        "type": "function"
+    },
+    {
+        "inputs": [],
+        "name": "tickSpacing",
+        "outputs": [{"internalType": "int24", "name": "", "type": "int24"}],
+        "stateMutability": "view",
+        "type": "function"
+    },
+    {
+        "inputs": [{"internalType": "int16", "name": "", "type": "int16"}],
+        "name": "tickBitmap",
+        "outputs": [{"internalType": "uint256", "name": "", "type": "uint256"}],
+        "stateMutability": "view",
+        "type": "function"
+    },
+    {
+        "inputs": [{"internalType": "int24", "name": "", "type": "int24"}],
+        "name": "ticks",
+        "outputs": [
+            {"internalType": "uint128", "name": "liquidityGross", "type": "uint128"},
+            {"internalType": "int128", "name": "liquidityNet", "type": "int128"},
+            {"internalType": "uint256", "name": "feeGrowthOutside0X128", "type": "uint256"},
+            {"internalType": "uint256", "name": "feeGrowthOutside1X128", "type": "uint256"},
+            {"internalType": "int56", "name": "tickCumulativeOutside", "type": "int56"},
+            {"internalType": "uint160", "name": "secondsPerLiquidityOutsideX128", "type": "uint160"},
+            {"internalType": "uint32", "name": "secondsOutside", "type": "uint32"},
+            {"internalType": "bool", "name": "initialized", "type": "bool"}
+        ],
+        "stateMutability": "view",
+        "type": "function"
+    }
+]
+
+# ABI for the parts of Multicall3 used for batched reads
+MULTICALL3_ABI = [
+    {
+        "inputs": [
+            {
+                "components": [
+                    {"internalType": "address", "name": "target", "type": "address"},
+                    {"internalType": "bool", "name": "allowFailure", "type": "bool"},
+                    {"internalType": "bytes", "name": "callData", "type": "bytes"}
+                ],
+                "internalType": "struct Multicall3.Call3[]",
+                "name": "calls",
+                "type": "tuple[]"
+            }
+        ],
+        "name": "aggregate3",
+        "outputs": [
+            {
+                "components": [
+                    {"internalType": "bool", "name": "success", "type": "bool"},
+                    {"internalType": "bytes", "name": "returnData", "type": "bytes"}
+                ],
+                "internalType": "struct Multicall3.Result[]",
+                "name": "returnData",
+                "type": "tuple[]"
+            }
+        ],
+        "stateMutability": "payable",
+        "type": "function"
+    },
+    {
+        "inputs": [],
+        "name": "getBlockNumber",
+        "outputs": [{"internalType": "uint256", "name": "blockNumber", "type": "uint256"}],
+        "stateMutability": "view",
+        "type": "function"
     }
 ]
 
@@ -89,12 +194,23 @@ class UniswapV3Interface:
     Interface to interact with Uniswap V3 for price data and potential swaps
     """
     
-    def __init__(self, db=None):
-        """Initialize the Uniswap V3 interface with web3 connection"""
+    def __init__(self, db=None, pool_registry: Optional[PoolRegistry] = None, multicall_address: Optional[str] = None,
+                 provider=None):
+        """
+        Initialize the Uniswap V3 interface with web3 connection
+        
+        Args:
+            db: Optional Flask-SQLAlchemy database used to read UniswapConfig
+            pool_registry: Optional PoolRegistry; defaults to the shared on-disk registry
+            multicall_address: Optional Multicall3 address (e.g. on a local test chain)
+            provider: Optional web3 provider used instead of an HTTP RPC URL (e.g. a fake chain)
+        """
         try:
             # First try to get RPC URL from database if db connection is provided
             rpc_url = None
-            if db:
+            if provider is not None:
+                rpc_url = type(provider).__name__
+            elif db:
                 from models import UniswapConfig
                 # Use Flask-SQLAlchemy session if provided
                 try:
@@ -114,7 +230,7 @@ class UniswapV3Interface:
                 rpc_url = "https://mainnet.infura.io/v3/8f869800e73e4de2ba792d9ec67cab85"  # User's Infura key
                 logger.warning("No RPC_URL found in database or .env file, using user's Infura node")
                 
-            self.web3 = Web3(Web3.HTTPProvider(rpc_url))
+            self.web3 = Web3(provider if provider is not None else Web3.HTTPProvider(rpc_url))
             if not self.web3.is_connected():
                 logger.error("Failed to connect to Ethereum. Check your RPC provider.")
                 raise ConnectionError("Cannot connect to Ethereum")
@@ -125,11 +241,85 @@ class UniswapV3Interface:
                 abi=FACTORY_ABI
             )
             
+            # Pool addresses and token order never change, so they are resolved once
+            self.pool_registry = pool_registry or PoolRegistry()
+            self._pool_contracts = {}
+            
+            # Multicall3 contract used to batch reads for every tracked pool into one eth_call
+            self.multicall = self.web3.eth.contract(
+                address=Web3.to_checksum_address(multicall_address or os.getenv("MULTICALL3_ADDRESS", MULTICALL3_ADDRESS)),
+                abi=MULTICALL3_ABI
+            )
+            self._pool_template = self.web3.eth.contract(abi=POOL_ABI)
+            self._pool_calldata = {
+                name: self._pool_template.encode_abi(name) for name in ("slot0", "liquidity", "fee", "tickSpacing")
+            }
+            self._block_number_calldata = self.multicall.encode_abi("getBlockNumber")
+            
+            # Event-driven pool state, see enable_event_tracking
+            self.state_tracker = None
+            
+            # Fee tier of the pool each pair was last priced from
+            self.price_fee_tiers = {}
+            
+            # Tick data for local swap simulation, see get_swap_simulator
+            self._simulators = {}
+            self.tick_data_ttl = float(os.getenv("UNISWAP_TICK_DATA_TTL", "300"))
+            
+            # Pairs known to have at least one pool, see supported_symbols
+            self._supported_pairs = set()
+            
             logger.info(f"Uniswap V3 interface initialized successfully with RPC URL: {rpc_url[:20]}...")
         except Exception as e:
             logger.error(f"Error initializing Uniswap V3 interface: {str(e)}")
             raise
     
+    def resolve_pool(self, token_a: str, token_b: str, fee: int = FEE_MEDIUM) -> Optional[PoolInfo]:
+        """
+        Resolve a pool's address and token order, using the pool registry when possible
+        
+        Only the first lookup of a pool calls factory.getPool; token0/token1 follow
+        from Uniswap's address ordering and need no RPC call at all.
+        
+        Args:
+            token_a: Address of the first token
+            token_b: Address of the second token
+            fee: Fee tier (500, 3000, or 10000)
+            
+        Returns:
+            PoolInfo, or None if no pool exists for the pair and fee tier
+        """
+        info = self.pool_registry.get(token_a, token_b, fee)
+        if info is None:
+            try:
+                # Ensure token addresses are checksummed and sorted (required by Uniswap)
+                token0, token1 = PoolRegistry.sort_tokens(Web3.to_checksum_address(token_a),
+                                                          Web3.to_checksum_address(token_b))
+                
+                # Query the factory for the pool address
+                pool_address = self.factory.functions.getPool(token0, token1, fee).call()
+                if pool_address == "0x0000000000000000000000000000000000000000":
+                    logger.warning(f"No pool exists for {token0}-{token1} with fee {fee}")
+                    pool_address = None
+                
+                info = self.pool_registry.put(token0, token1, fee, pool_address)
+            except Exception as e:
+                logger.error(f"Error getting pool address: {str(e)}")
+                return None
+        
+        return None if info is MISSING_POOL else info
+    
+    def _get_pool_contract(self, pool_address: str):
+        """Return a cached contract instance for a pool"""
+        pool = self._pool_contracts.get(pool_address)
+        if pool is None:
+            pool = self.web3.eth.contract(
+                address=Web3.to_checksum_address(pool_address),
+                abi=POOL_ABI
+            )
+            self._pool_contracts[pool_address] = pool
+        return pool
+    
     def get_pool_address(self, token_a: str, token_b: str, fee: int = FEE_MEDIUM) -> str:
         """
         Get the address of a Uniswap V3 pool for a pair of tokens
@@ -142,27 +332,8 @@ class UniswapV3Interface:
         Returns:
             Address of the pool
         """
-        try:
-            # Ensure token addresses are checksummed
-            token_a = Web3.to_checksum_address(token_a)
-            token_b = Web3.to_checksum_address(token_b)
-            
-            # Sort tokens (required by Uniswap)
-            if token_a.lower() > token_b.lower():
-                token_a, token_b = token_b, token_a
-            
-            # Query the factory for the pool address
-            pool_address = self.factory.functions.getPool(token_a, token_b, fee).call()
-            
-            # Check if pool exists
-            if pool_address == "0x0000000000000000000000000000000000000000":
-                logger.warning(f"No pool exists for {token_a}-{token_b} with fee {fee}")
-                return None
-            
-            return pool_address
-        except Exception as e:
-            logger.error(f"Error getting pool address: {str(e)}")
-            return None
+        info = self.resolve_pool(token_a, token_b, fee)
+        return info.address if info else None
     
     def get_pool_price(self, token_a: str, token_b: str, fee: int = FEE_MEDIUM) -> Optional[float]:
         """
@@ -177,39 +348,222 @@ class UniswapV3Interface:
             Current price of token_b in terms of token_a
         """
         try:
-            # Get pool address
-            pool_address = self.get_pool_address(token_a, token_b, fee)
-            if not pool_address:
+            # Resolve pool address and token order from the registry
+            pool_info = self.resolve_pool(token_a, token_b, fee)
+            if not pool_info:
                 return None
             
-            # Create pool contract instance
-            pool = self.web3.eth.contract(
-                address=Web3.to_checksum_address(pool_address),
-                abi=POOL_ABI
-            )
-            
-            # Get token addresses from the pool to determine order
-            token0 = pool.functions.token0().call()
-            token1 = pool.functions.token1().call()
+            pool = self._get_pool_contract(pool_info.address)
             
             # Get current price from slot0
             slot0 = pool.functions.slot0().call()
             sqrt_price_x96 = slot0[0]
             
-            # Calculate price from sqrtPriceX96
-            # Formula: sqrtPriceX96 = sqrt(price) * 2^96
-            # So, price = (sqrtPriceX96 / 2^96)^2
-            price = (sqrt_price_x96 / (2**96))**2
-            
-            # If token_a is token1, invert the price
-            if token_a.lower() == token1.lower():
-                price = 1 / price
-            
-            return price
+            return self._price_from_sqrt_price(sqrt_price_x96, token_a, pool_info)
         except Exception as e:
             logger.error(f"Error getting pool price: {str(e)}")
             return None
     
+    def _price_from_sqrt_price(self, sqrt_price_x96: int, token_a: str, pool_info: PoolInfo) -> Optional[float]:
+        """Convert a pool's sqrtPriceX96 into the price of token_b in terms of token_a"""
+        if not sqrt_price_x96:
+            return None
+        
+        # Calculate price from sqrtPriceX96
+        # Formula: sqrtPriceX96 = sqrt(price) * 2^96
+        # So, price = (sqrtPriceX96 / 2^96)^2
+        price = (sqrt_price_x96 / (2**96))**2
+        
+        # If token_a is token1, invert the price
+        if token_a.lower() == pool_info.token1.lower():
+            price = 1 / price
+        
+        return price
+    
+    def _aggregate(self, calls: List[Tuple[str, bytes]], block_identifier="latest") -> Tuple[Optional[int], List[Optional[bytes]]]:
+        """
+        Execute read calls in a single Multicall3 aggregate3 eth_call
+        
+        The block number is read inside the same batch, so every result comes from
+        that one block.
+        
+        Args:
+            calls: List of (target address, calldata) pairs
+            block_identifier: Block to execute against ('latest' or a block number)
+            
+        Returns:
+            Tuple of (block number, list of return data or None for failed calls)
+        """
+        batch = [(self.multicall.address, True, self._block_number_calldata)]
+        batch += [(Web3.to_checksum_address(target), True, calldata) for target, calldata in calls]
+        
+        results = self.multicall.functions.aggregate3(batch).call(block_identifier=block_identifier)
+        
+        block_success, block_data = results[0]
+        block_number = abi_decode(["uint256"], block_data)[0] if block_success else None
+        return block_number, [data if success else None for success, data in results[1:]]
+    
+    def resolve_pools(self, pairs: List[Tuple[str, str]], fee_tiers: Optional[List[int]] = None) -> List[PoolInfo]:
+        """
+        Resolve every fee tier of several token pairs, batching unknown factory lookups
+        
+        Args:
+            pairs: List of (token_a, token_b) addresses
+            fee_tiers: Fee tiers to resolve (defaults to all tiers)
+            
+        Returns:
+            List of PoolInfo for the pools that exist
+        """
+        fee_tiers = fee_tiers or FEE_TIERS
+        pools = []
+        unknown = []
+        for token_a, token_b in pairs:
+            for fee in fee_tiers:
+                info = self.pool_registry.get(token_a, token_b, fee)
+                if info is None:
+                    unknown.append(PoolRegistry.sort_tokens(Web3.to_checksum_address(token_a),
+                                                            Web3.to_checksum_address(token_b)) + (fee,))
+                elif info is not MISSING_POOL:
+                    pools.append(info)
+        
+        if unknown:
+            try:
+                calls = [(self.factory.address, self.factory.encode_abi("getPool", args=[token0, token1, fee]))
+                         for token0, token1, fee in unknown]
+                _, results = self._aggregate(calls)
+                for (token0, token1, fee), data in zip(unknown, results):
+                    if data is None:
+                        continue
+                    pool_address = abi_decode(["address"], data)[0]
+                    if int(pool_address, 16) == 0:
+                        pool_address = None
+                    info = self.pool_registry.put(token0, token1, fee, Web3.to_checksum_address(pool_address) if pool_address else None)
+                    if info is not MISSING_POOL:
+                        pools.append(info)
+            except Exception as e:
+                logger.error(f"Error resolving pools with multicall: {str(e)}")
+        
+        return pools
+    
+    def get_pool_states(self, pools: List[PoolInfo], block_identifier="latest") -> Tuple[Optional[int], Dict[str, Dict[str, Any]]]:
+        """
+        Read slot0, liquidity and fee for many pools in one RPC round-trip
+        
+        Args:
+            pools: Pools to read
+            block_identifier: Block to pin the snapshot to ('latest' or a block number)
+            
+        Returns:
+            Tuple of (block number, dictionary of pool address -> state), where state has
+            'sqrt_price_x96', 'tick', 'liquidity' and 'fee'
+        """
+        calls = []
+        for pool in pools:
+            for name in ("slot0", "liquidity", "fee"):
+                calls.append((pool.address, self._pool_calldata[name]))
+        
+        try:
+            block_number, results = self._aggregate(calls, block_identifier)
+        except Exception as e:
+            logger.error(f"Error reading pool states with multicall: {str(e)}")
+            return None, {}
+        
+        states = {}
+        for i, pool in enumerate(pools):
+            slot0_data, liquidity_data, fee_data = results[3 * i:3 * i + 3]
+            if slot0_data is None or liquidity_data is None:
+                continue
+            sqrt_price_x96, tick = abi_decode(["uint160", "int24"], slot0_data[:64])
+            states[pool.address] = {
+                "sqrt_price_x96": sqrt_price_x96,
+                "tick": tick,
+                "liquidity": abi_decode(["uint128"], liquidity_data)[0],
+                "fee": abi_decode(["uint24"], fee_data)[0] if fee_data is not None else pool.fee,
+                "block_number": block_number
+            }
+        return block_number, states
+    
+    def supported_symbols(self, symbols: List[str]) -> List[str]:
+        """
+        Filter symbols down to the pairs that have at least one Uniswap V3 pool
+        
+        Pool existence comes from the pool registry, so only pairs never seen
+        before cost a (single, batched) factory lookup.
+        
+        Args:
+            symbols: Trading pair symbols (e.g. ['ETH/USDT', 'BTC/USDC'])
+            
+        Returns:
+            The supported symbols, in the order given
+        """
+        pairs = {}
+        for symbol in symbols:
+            tokens = symbol.split('/')
+            if len(tokens) != 2 or tokens[0] not in TOKEN_ADDRESSES or tokens[1] not in TOKEN_ADDRESSES:
+                continue
+            pairs[symbol] = PoolRegistry.sort_tokens(Web3.to_checksum_address(TOKEN_ADDRESSES[tokens[0]]),
+                                                     Web3.to_checksum_address(TOKEN_ADDRESSES[tokens[1]]))
+        
+        pooled = {(pool.token0.lower(), pool.token1.lower()) for pool in self.resolve_pools(list(set(pairs.values())))}
+        supported = [symbol for symbol, (token0, token1) in pairs.items() if (token0.lower(), token1.lower()) in pooled]
+        self._supported_pairs.update(supported)
+        return [symbol for symbol in symbols if symbol in self._supported_pairs]
+    
+    def get_token_pair_prices(self, symbols: List[str], block_identifier="latest") -> Dict[str, float]:
+        """
+        Get prices for several token pairs from one consistent multicall snapshot
+        
+        All fee tiers of every pair are read at once and the tier with the most
+        active liquidity sets the price.
+        
+        Args:
+            symbols: Trading pair symbols (e.g. ['ETH/USDT', 'BTC/USDC'])
+            block_identifier: Block to pin the snapshot to
+            
+        Returns:
+            Dictionary of symbol -> price for the pairs that have a pool
+        """
+        pairs = {}
+        for symbol in symbols:
+            tokens = symbol.split('/')
+            if len(tokens) != 2 or tokens[0] not in TOKEN_ADDRESSES or tokens[1] not in TOKEN_ADDRESSES:
+                continue
+            pairs[symbol] = (TOKEN_ADDRESSES[tokens[0]], TOKEN_ADDRESSES[tokens[1]])
+        
+        pools = self.resolve_pools(list(set(pairs.values())))
+        tracker = self.state_tracker
+        if tracker is not None and tracker.last_block is not None and block_identifier == "latest":
+            # Served from pool events, no RPC needed; the tracker swaps in new per-pool
+            # dicts instead of modifying them, so a shallow copy is a consistent snapshot
+            block_number, states = tracker.last_block, dict(tracker.states)
+            # Pools of pairs added after tracking started are read with multicall
+            untracked = [pool for pool in pools if pool.address not in states]
+            if untracked:
+                logger.debug(f"Reading {len(untracked)} untracked Uniswap pools with multicall")
+                _, untracked_states = self.get_pool_states(untracked, block_identifier)
+                states.update(untracked_states)
+        else:
+            block_number, states = self.get_pool_states(pools, block_identifier)
+        
+        prices = {}
+        for symbol, (base_address, quote_address) in pairs.items():
+            token0, token1 = PoolRegistry.sort_tokens(base_address, quote_address)
+            best = None
+            for pool in pools:
+                state = states.get(pool.address)
+                if not state or pool.token0.lower() != token0.lower() or pool.token1.lower() != token1.lower():
+                    continue
+                if best is None or state["liquidity"] > best[1]["liquidity"]:
+                    best = (pool, state)
+            if best:
+                price = self._price_from_sqrt_price(best[1]["sqrt_price_x96"], base_address, best[0])
+                if price:
+                    prices[symbol] = price
+                    self.price_fee_tiers[symbol] = best[0].fee
+        
+        logger.debug(f"Read {len(states)} Uniswap pools at block {block_number}")
+        return prices
+    
     def get_token_pair_price(self, symbol: str) -> Optional[float]:
         """
         Get the price for a token pair in a format compatible with the arbitrage bot
@@ -230,15 +584,7 @@ class UniswapV3Interface:
             base, quote = tokens
             
             # Map to token addresses
-            token_map = {
-                'ETH': WETH_ADDRESS,
-                'WETH': WETH_ADDRESS,
-                'BTC': WBTC_ADDRESS,
-                'WBTC': WBTC_ADDRESS,
-                'USDT': USDT_ADDRESS,
-                'USDC': USDC_ADDRESS,
-                'DAI': DAI_ADDRESS
-            }
+            token_map = TOKEN_ADDRESSES
             
             if base not in token_map or quote not in token_map:
                 logger.warning(f"Unsupported token in {symbol}")
@@ -246,7 +592,7 @@ class UniswapV3Interface:
             
             # Get price for each fee tier and use the one with most liquidity
             # (this is a simplification, in reality you would check liquidity)
-            for fee_tier in [FEE_LOW, FEE_MEDIUM, FEE_HIGH]:
+            for fee_tier in FEE_TIERS:
                 price = self.get_pool_price(token_map[base], token_map[quote], fee_tier)
                 if price:
                     return price
@@ -257,6 +603,193 @@ class UniswapV3Interface:
             logger.error(f"Error in get_token_pair_price: {str(e)}")
             return None
     
+    def enable_event_tracking(self, symbols: Optional[List[str]] = None, poll_interval: float = 2.0):
+        """
+        Track pool state from Swap/Mint/Burn events instead of polling slot0
+        
+        Once enabled, get_token_pair_prices reads prices from memory.
+        
+        Args:
+            symbols: Pairs whose pools (all fee tiers) are tracked; defaults to the pairs found by supported_symbols
+            poll_interval: Seconds between eth_getLogs polls
+        """
+        from pool_state_tracker import PoolStateTracker  # Imported here to avoid circular imports
+        
+        symbols = symbols or self.get_exchange_data()["supported_pairs"]
+        if not symbols:
+            logger.warning("No Uniswap pairs known yet, event tracking not enabled")
+            return
+        pairs = set()
+        for symbol in symbols:
+            tokens = symbol.split('/')
+            if len(tokens) == 2 and tokens[0] in TOKEN_ADDRESSES and tokens[1] in TOKEN_ADDRESSES:
+                pairs.add((TOKEN_ADDRESSES[tokens[0]], TOKEN_ADDRESSES[tokens[1]]))
+        
+        if self.state_tracker is not None:
+            self.state_tracker.stop()
+        self.state_tracker = PoolStateTracker(self, self.resolve_pools(list(pairs)))
+        self.state_tracker.start(poll_interval)
+        logger.info(f"Tracking {len(self.state_tracker.pools)} Uniswap pools from events")
+    
+    def disable_event_tracking(self):
+        """Stop event tracking and go back to multicall slot0 reads"""
+        if self.state_tracker is not None:
+            self.state_tracker.stop()
+            self.state_tracker = None
+
+    def get_swap_simulator(self, pool: PoolInfo, word_radius: int = 2, refresh: bool = False):
+        """
+        Return a swap simulator for a pool, loading its tick data on first use
+
+        The tick bitmap words around the current price and the liquidityNet of every
+        initialized tick in them are read with two multicalls pinned to one block,
+        then cached for tick_data_ttl seconds (or until a Mint/Burn is tracked).
+
+        Args:
+            pool: Pool to simulate
+            word_radius: Bitmap words loaded on each side of the current tick's word
+            refresh: Reload the tick data even if cached
+
+        Returns:
+            V3PoolSimulator, or None if the tick data could not be read
+        """
+        from v3_swap_simulator import V3PoolSimulator  # Imported here to avoid circular imports
+
+        cached = self._simulators.get(pool.address)
+        if cached and not refresh and time.time() - cached[1] < self.tick_data_ttl \
+                and cached[0].loaded_words[1] - cached[0].loaded_words[0] >= 2 * word_radius:
+            return cached[0]
+
+        try:
+            tick_spacing = TICK_SPACINGS.get(pool.fee)
+            calls = [(pool.address, self._pool_calldata["slot0"])]
+            if tick_spacing is None:
+                calls.append((pool.address, self._pool_calldata["tickSpacing"]))
+            block_number, results = self._aggregate(calls)
+            if results[0] is None:
+                return None
+            tick = abi_decode(["uint160", "int24"], results[0][:64])[1]
+            if tick_spacing is None:
+                tick_spacing = abi_decode(["int24"], results[1])[0]
+
+            center = (tick // tick_spacing) >> 8
+            words = list(range(center - word_radius, center + word_radius + 1))
+            _, results = self._aggregate(
+                [(pool.address, self._pool_template.encode_abi("tickBitmap", args=[word])) for word in words],
+                block_number
+            )
+            bitmap = {}
+            initialized = []
+            for word, data in zip(words, results):
+                if data is None:
+                    return None
+                bits = abi_decode(["uint256"], data)[0]
+                if bits:
+                    bitmap[word] = bits
+                    for bit in range(256):
+                        if bits >> bit & 1:
+                            initialized.append(((word << 8) + bit) * tick_spacing)
+
+            _, results = self._aggregate(
+                [(pool.address, self._pool_template.encode_abi("ticks", args=[t])) for t in initialized],
+                block_number
+            ) if initialized else (block_number, [])
+            liquidity_net = {}
+            for t, data in zip(initialized, results):
+                if data is None:
+                    return None
+                liquidity_net[t] = abi_decode(["uint128", "int128"], data[:64])[1]
+
+            simulator = V3PoolSimulator(pool.fee, tick_spacing, bitmap, liquidity_net, (words[0], words[-1]))
+            self._simulators[pool.address] = (simulator, time.time())
+            logger.debug(f"Loaded {len(initialized)} initialized ticks for pool {pool.address} at block {block_number}")
+            return simulator
+        except Exception as e:
+            logger.error(f"Error loading tick data: {str(e)}")
+            return None
+
+    def invalidate_swap_simulator(self, pool_address: str):
+        """Drop cached tick data of a pool, e.g. after a Mint or Burn"""
+        self._simulators.pop(Web3.to_checksum_address(pool_address), None)
+
+    def _get_pool_state(self, pool: PoolInfo) -> Optional[Dict[str, Any]]:
+        """Current state of one pool, from the event tracker when it is running"""
+        tracker = self.state_tracker
+        if tracker is not None and tracker.last_block is not None:
+            state = tracker.get_state(pool.address)
+            if state:
+                return state
+        _, states = self.get_pool_states([pool])
+        return states.get(pool.address)
+
+    def quote_exact_input(self, token_in: str, token_out: str, amount_in: int, fee: int = FEE_MEDIUM,
+                          state: Optional[Dict[str, Any]] = None):
+        """
+        Quote an exact-input swap locally, crossing initialized ticks like the pool does
+
+        Args:
+            token_in: Address of the input token
+            token_out: Address of the output token
+            amount_in: Input amount in raw token units
+            fee: Fee tier (500, 3000, or 10000)
+            state: Pool state (sqrt_price_x96, tick, liquidity) to start from; read if omitted
+
+        Returns:
+            SwapResult, or None if the pool or its tick data is unavailable
+        """
+        pool = self.resolve_pool(token_in, token_out, fee)
+        if not pool:
+            return None
+        if state is None:
+            state = self._get_pool_state(pool)
+        if not state:
+            return None
+
+        zero_for_one = token_in.lower() == pool.token0.lower()
+        word_radius = 2
+        while True:
+            simulator = self.get_swap_simulator(pool, word_radius)
+            if simulator is None:
+                return None
+            result = simulator.quote_exact_input(state, zero_for_one, amount_in)
+            # Ran past the loaded tick range: load a wider window and retry once
+            if result.complete or word_radius > 2:
+                return result
+            word_radius = 8
+
+    def get_depth_curve(self, symbol: str, side: str, fee: int = FEE_MEDIUM, word_radius: int = 8):
+        """
+        Build a depth curve for sizing trades against a pool
+
+        Args:
+            symbol: Trading pair symbol (e.g. 'ETH/USDT')
+            side: 'buy' to buy the base token on Uniswap, 'sell' to sell it
+            fee: Fee tier (500, 3000, or 10000)
+            word_radius: Bitmap words of tick data loaded around the current price
+
+        Returns:
+            V3PoolCurve, or None if the pool or its tick data is unavailable
+        """
+        from depth_curve import V3PoolCurve  # Imported here to avoid circular imports
+
+        tokens = symbol.split('/')
+        if len(tokens) != 2 or tokens[0] not in TOKEN_ADDRESSES or tokens[1] not in TOKEN_ADDRESSES:
+            return None
+        base_address, quote_address = TOKEN_ADDRESSES[tokens[0]], TOKEN_ADDRESSES[tokens[1]]
+
+        pool = self.resolve_pool(base_address, quote_address, fee)
+        if not pool:
+            return None
+        state = self._get_pool_state(pool)
+        simulator = self.get_swap_simulator(pool, word_radius)
+        if not state or simulator is None:
+            return None
+
+        return V3PoolCurve(simulator, state, side,
+                           base_is_token0=base_address.lower() == pool.token0.lower(),
+                           base_decimals=TOKEN_DECIMALS[base_address.lower()],
+                           quote_decimals=TOKEN_DECIMALS[quote_address.lower()])
+
     def calculate_fee(self, amount: float, fee_tier: int) -> float:
         """
         Calculate the fee for a swap
@@ -285,23 +818,19 @@ class UniswapV3Interface:
             Dictionary with liquidity information
         """
         try:
-            # Get pool address
-            pool_address = self.get_pool_address(token_a, token_b, fee)
-            if not pool_address:
+            # Resolve pool address and token order from the registry
+            pool_info = self.resolve_pool(token_a, token_b, fee)
+            if not pool_info:
                 return None
             
-            # Create pool contract instance
-            pool = self.web3.eth.contract(
-                address=Web3.to_checksum_address(pool_address),
-                abi=POOL_ABI
-            )
+            pool_address = pool_info.address
+            pool = self._get_pool_contract(pool_address)
             
             # Get current liquidity
             liquidity = pool.functions.liquidity().call()
             
-            # Get token addresses from the pool to determine order
-            token0 = pool.functions.token0().call()
-            token1 = pool.functions.token1().call()
+            token0 = pool_info.token0
+            token1 = pool_info.token1
             
             # Get token symbols if possible (simplified version)
             token0_symbol = "Unknown"
@@ -354,22 +883,70 @@ class UniswapV3Interface:
             logger.error(f"Error getting gas prices: {str(e)}")
             return None
     
-    def calculate_price_impact(self, token_in: str, token_out: str, amount_in: float, fee: int = FEE_MEDIUM) -> Optional[Dict[str, Any]]:
+    def _simulate_price_impact(self, token_in: str, token_out: str, amount_in: float,
+                               fee: int) -> Optional[Dict[str, Any]]:
+        """Price impact from an exact local swap simulation, or None if it cannot run"""
+        decimals_in = TOKEN_DECIMALS.get(token_in.lower())
+        decimals_out = TOKEN_DECIMALS.get(token_out.lower())
+        pool = self.resolve_pool(token_in, token_out, fee)
+        if decimals_in is None or decimals_out is None or not pool:
+            return None
+
+        state = self._get_pool_state(pool)
+        amount_in_raw = int(amount_in * 10**decimals_in)
+        if not state or amount_in_raw <= 0:
+            return None
+        result = self.quote_exact_input(token_in, token_out, amount_in_raw, fee, state)
+        if result is None or not result.complete:
+            return None
+
+        # Raw-unit prices, same convention as get_pool_price
+        spot_price = self._price_from_sqrt_price(state["sqrt_price_x96"], token_in, pool)
+        fee_percentage = fee / 1_000_000
+        execution_price = result.amount_out / result.amount_in
+        price_impact = max(0.0, 1 - execution_price / (spot_price * (1 - fee_percentage)))
+        amount_out = result.amount_out / 10**decimals_out
+
+        return {
+            "spot_price": spot_price,
+            "amount_in": amount_in,
+            "amount_out": amount_out,
+            "estimated_fee": amount_in * fee_percentage,
+            "estimated_price_impact_percentage": price_impact * 100,
+            "slippage_tolerance": 0.5,  # Default 0.5% slippage tolerance
+            "minimum_received": amount_out * (1 - 0.005),
+            "ticks_crossed": result.ticks_crossed,
+            "simulated": True
+        }
+
+    def calculate_price_impact(self, token_in: str, token_out: str, amount_in: float, fee: int = FEE_MEDIUM,
+                               spot_price: Optional[float] = None,
+                               pool_info: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
         """
         Calculate the estimated price impact for a swap
         
+        The swap is simulated exactly against the pool's initialized ticks when the
+        token decimals are known; otherwise a rough liquidity-based estimate is used.
+        
         Args:
             token_in: Address of the input token
             token_out: Address of the output token
             amount_in: Amount of the input token to swap
             fee: Fee tier (500, 3000, or 10000)
+            spot_price: Spot price already read by the caller, to avoid another slot0 call
+            pool_info: Result of get_pool_liquidity already read by the caller
             
         Returns:
             Dictionary with price impact information
         """
         try:
+            simulated = self._simulate_price_impact(token_in, token_out, amount_in, fee)
+            if simulated:
+                return simulated
+
             # Get the current spot price
-            spot_price = self.get_pool_price(token_in, token_out, fee)
+            if spot_price is None:
+                spot_price = self.get_pool_price(token_in, token_out, fee)
             if not spot_price:
                 return None
             
@@ -382,7 +959,8 @@ class UniswapV3Interface:
             
             # Simplified estimation of price impact based on the amount relative to pool depth
             # This is not accurate for large trades but gives a basic estimate
-            pool_info = self.get_pool_liquidity(token_in, token_out, fee)
+            if pool_info is None:
+                pool_info = self.get_pool_liquidity(token_in, token_out, fee)
             if not pool_info:
                 # If pool info is not available, provide a very rough estimate
                 # Assuming 0.5% impact per 1% of pool liquidity used
@@ -428,15 +1006,7 @@ class UniswapV3Interface:
             base, quote = tokens
             
             # Map to token addresses
-            token_map = {
-                'ETH': WETH_ADDRESS,
-                'WETH': WETH_ADDRESS,
-                'BTC': WBTC_ADDRESS,
-                'WBTC': WBTC_ADDRESS,
-                'USDT': USDT_ADDRESS,
-                'USDC': USDC_ADDRESS,
-                'DAI': DAI_ADDRESS
-            }
+            token_map = TOKEN_ADDRESSES
             
             if base not in token_map or quote not in token_map:
                 logger.warning(f"Unsupported token in {symbol}")
@@ -451,7 +1021,7 @@ class UniswapV3Interface:
             fee_used = None
             pool_liquidity = None
             
-            for fee_tier in [FEE_LOW, FEE_MEDIUM, FEE_HIGH]:
+            for fee_tier in FEE_TIERS:
                 current_price = self.get_pool_price(token_map[base], token_map[quote], fee_tier)
                 if current_price:
                     price = current_price
@@ -467,7 +1037,8 @@ class UniswapV3Interface:
             gas_prices = self.get_gas_price()
             
             # Calculate price impact for a standard trade size (1 unit of base token)
-            price_impact = self.calculate_price_impact(base_address, quote_address, 1.0, fee_used) if fee_used else None
+            price_impact = self.calculate_price_impact(base_address, quote_address, 1.0, fee_used,
+                                                       spot_price=price, pool_info=pool_liquidity) if fee_used else None
             
             # Combine all data
             return {
@@ -497,7 +1068,8 @@ class UniswapV3Interface:
             "name": "uniswap_v3",
             "display_name": "Uniswap V3",
             "url": "https://app.uniswap.org/#/swap",
-            "supported_pairs": ["ETH/USDT", "ETH/USDC", "BTC/USDT", "BTC/USDC"]
+            # Pairs found by supported_symbols; empty until the first lookup
+            "supported_pairs": sorted(self._supported_pairs)
         }
 
 # Example usage
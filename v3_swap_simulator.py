@@ -0,0 +1,328 @@
+import logging
+import math
+from typing import Dict, Any, Optional, Tuple
+from dataclasses import dataclass
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Constants from Uniswap V3 TickMath / FixedPoint96
+MIN_TICK = -887272
+MAX_TICK = 887272
+MIN_SQRT_RATIO = 4295128739
+MAX_SQRT_RATIO = 1461446703485210103287273052203988822378723970342
+Q96 = 1 << 96
+MAX_UINT256 = (1 << 256) - 1
+FEE_DENOMINATOR = 1_000_000
+
+# Per-bit multipliers of TickMath.getSqrtRatioAtTick (Q128.128)
+_TICK_RATIO_FACTORS = [
+    (0x2, 0xfff97272373d413259a46990580e213a),
+    (0x4, 0xfff2e50f5f656932ef12357cf3c7fdcc),
+    (0x8, 0xffe5caca7e10e4e61c3624eaa0941cd0),
+    (0x10, 0xffcb9843d60f6159c9db58835c926644),
+    (0x20, 0xff973b41fa98c081472e6896dfb254c0),
+    (0x40, 0xff2ea16466c96a3843ec78b326b52861),
+    (0x80, 0xfe5dee046a99a2a811c461f1969c3053),
+    (0x100, 0xfcbe86c7900a88aedcffc83b479aa3a4),
+    (0x200, 0xf987a7253ac413176f2b074cf7815e54),
+    (0x400, 0xf3392b0822b70005940c7a398e4b70f3),
+    (0x800, 0xe7159475a2c29b7443b29c7fa6e889d9),
+    (0x1000, 0xd097f3bdfd2022b8845ad8f792aa5825),
+    (0x2000, 0xa9f746462d870fdf8a65dc1f90e061e5),
+    (0x4000, 0x70d869a156d2a1b890bb3df62baf32f7),
+    (0x8000, 0x31be135f97d08fd981231505542fcfa6),
+    (0x10000, 0x9aa508b5b7a84e1c677de54f3e99bc9),
+    (0x20000, 0x5d6af8dedb81196699c329225ee604),
+    (0x40000, 0x2216e584f5fa1ea926041bedfe98),
+    (0x80000, 0x48a170391f7dc42444e8fa2),
+]
+
+_LOG_SQRT_10001 = math.log(math.sqrt(1.0001))
+
+# ---------------------------------------------------------------------------
+# FullMath / TickMath / SqrtPriceMath / SwapMath, ported to Python integers.
+# Rounding follows the Solidity libraries so results match the on-chain Quoter.
+# ---------------------------------------------------------------------------
+
+def mul_div(a: int, b: int, denominator: int) -> int:
+    return a * b // denominator
+
+def mul_div_rounding_up(a: int, b: int, denominator: int) -> int:
+    return -(-(a * b) // denominator)
+
+def div_rounding_up(a: int, b: int) -> int:
+    return -(-a // b)
+
+def get_sqrt_ratio_at_tick(tick: int) -> int:
+    """sqrt(1.0001^tick) * 2^96, rounded up like TickMath.getSqrtRatioAtTick"""
+    abs_tick = abs(tick)
+    if abs_tick > MAX_TICK:
+        raise ValueError(f"Tick {tick} out of range")
+
+    ratio = 0xfffcb933bd6fad37aa2d162d1a594001 if abs_tick & 0x1 else 1 << 128
+    for bit, factor in _TICK_RATIO_FACTORS:
+        if abs_tick & bit:
+            ratio = (ratio * factor) >> 128
+    if tick > 0:
+        ratio = MAX_UINT256 // ratio
+
+    return (ratio >> 32) + (0 if ratio % (1 << 32) == 0 else 1)
+
+def get_tick_at_sqrt_ratio(sqrt_price_x96: int) -> int:
+    """Greatest tick whose sqrt ratio is <= sqrt_price_x96, like TickMath.getTickAtSqrtRatio"""
+    if not MIN_SQRT_RATIO <= sqrt_price_x96 < MAX_SQRT_RATIO:
+        raise ValueError("sqrtPriceX96 out of range")
+
+    # Start from a floating point estimate and settle on the exact tick
+    tick = math.floor(math.log(sqrt_price_x96 / Q96) / _LOG_SQRT_10001)
+    tick = max(MIN_TICK, min(MAX_TICK - 1, tick))
+    while tick > MIN_TICK and get_sqrt_ratio_at_tick(tick) > sqrt_price_x96:
+        tick -= 1
+    while tick < MAX_TICK - 1 and get_sqrt_ratio_at_tick(tick + 1) <= sqrt_price_x96:
+        tick += 1
+    return tick
+
+def get_next_sqrt_price_from_amount0_rounding_up(sqrt_price_x96: int, liquidity: int, amount: int, add: bool) -> int:
+    if amount == 0:
+        return sqrt_price_x96
+    numerator1 = liquidity << 96
+    product = amount * sqrt_price_x96
+
+    if add:
+        denominator = numerator1 + product
+        if product <= MAX_UINT256 and denominator <= MAX_UINT256:
+            return mul_div_rounding_up(numerator1, sqrt_price_x96, denominator)
+        return div_rounding_up(numerator1, numerator1 // sqrt_price_x96 + amount)
+
+    if product > MAX_UINT256 or numerator1 <= product:
+        raise ValueError("Not enough liquidity for the requested output")
+    return mul_div_rounding_up(numerator1, sqrt_price_x96, numerator1 - product)
+
+def get_next_sqrt_price_from_amount1_rounding_down(sqrt_price_x96: int, liquidity: int, amount: int, add: bool) -> int:
+    if add:
+        return sqrt_price_x96 + (amount << 96) // liquidity
+
+    quotient = div_rounding_up(amount << 96, liquidity)
+    if sqrt_price_x96 <= quotient:
+        raise ValueError("Not enough liquidity for the requested output")
+    return sqrt_price_x96 - quotient
+
+def get_next_sqrt_price_from_input(sqrt_price_x96: int, liquidity: int, amount_in: int, zero_for_one: bool) -> int:
+    if zero_for_one:
+        return get_next_sqrt_price_from_amount0_rounding_up(sqrt_price_x96, liquidity, amount_in, True)
+    return get_next_sqrt_price_from_amount1_rounding_down(sqrt_price_x96, liquidity, amount_in, True)
+
+def get_next_sqrt_price_from_output(sqrt_price_x96: int, liquidity: int, amount_out: int, zero_for_one: bool) -> int:
+    if zero_for_one:
+        return get_next_sqrt_price_from_amount1_rounding_down(sqrt_price_x96, liquidity, amount_out, False)
+    return get_next_sqrt_price_from_amount0_rounding_up(sqrt_price_x96, liquidity, amount_out, False)
+
+def get_amount0_delta(sqrt_a: int, sqrt_b: int, liquidity: int, round_up: bool) -> int:
+    if sqrt_a > sqrt_b:
+        sqrt_a, sqrt_b = sqrt_b, sqrt_a
+    numerator1 = liquidity << 96
+    numerator2 = sqrt_b - sqrt_a
+    if round_up:
+        return div_rounding_up(mul_div_rounding_up(numerator1, numerator2, sqrt_b), sqrt_a)
+    return mul_div(numerator1, numerator2, sqrt_b) // sqrt_a
+
+def get_amount1_delta(sqrt_a: int, sqrt_b: int, liquidity: int, round_up: bool) -> int:
+    if sqrt_a > sqrt_b:
+        sqrt_a, sqrt_b = sqrt_b, sqrt_a
+    if round_up:
+        return mul_div_rounding_up(liquidity, sqrt_b - sqrt_a, Q96)
+    return mul_div(liquidity, sqrt_b - sqrt_a, Q96)
+
+def compute_swap_step(sqrt_current: int, sqrt_target: int, liquidity: int, amount_remaining: int,
+                      fee_pips: int) -> Tuple[int, int, int, int]:
+    """
+    One step of a swap within a single liquidity range, like SwapMath.computeSwapStep
+
+    Returns:
+        Tuple of (next sqrt price, amount in, amount out, fee amount)
+    """
+    zero_for_one = sqrt_current >= sqrt_target
+    exact_in = amount_remaining >= 0
+    amount_in = amount_out = 0
+
+    if exact_in:
+        amount_remaining_less_fee = mul_div(amount_remaining, FEE_DENOMINATOR - fee_pips, FEE_DENOMINATOR)
+        if zero_for_one:
+            amount_in = get_amount0_delta(sqrt_target, sqrt_current, liquidity, True)
+        else:
+            amount_in = get_amount1_delta(sqrt_current, sqrt_target, liquidity, True)
+        if amount_remaining_less_fee >= amount_in:
+            sqrt_next = sqrt_target
+        else:
+            sqrt_next = get_next_sqrt_price_from_input(sqrt_current, liquidity, amount_remaining_less_fee, zero_for_one)
+    else:
+        if zero_for_one:
+            amount_out = get_amount1_delta(sqrt_target, sqrt_current, liquidity, False)
+        else:
+            amount_out = get_amount0_delta(sqrt_current, sqrt_target, liquidity, False)
+        if -amount_remaining >= amount_out:
+            sqrt_next = sqrt_target
+        else:
+            sqrt_next = get_next_sqrt_price_from_output(sqrt_current, liquidity, -amount_remaining, zero_for_one)
+
+    reached_target = sqrt_target == sqrt_next
+
+    if zero_for_one:
+        if not (reached_target and exact_in):
+            amount_in = get_amount0_delta(sqrt_next, sqrt_current, liquidity, True)
+        if not (reached_target and not exact_in):
+            amount_out = get_amount1_delta(sqrt_next, sqrt_current, liquidity, False)
+    else:
+        if not (reached_target and exact_in):
+            amount_in = get_amount1_delta(sqrt_current, sqrt_next, liquidity, True)
+        if not (reached_target and not exact_in):
+            amount_out = get_amount0_delta(sqrt_current, sqrt_next, liquidity, False)
+
+    if not exact_in and amount_out > -amount_remaining:
+        amount_out = -amount_remaining
+
+    if exact_in and sqrt_next != sqrt_target:
+        fee_amount = amount_remaining - amount_in
+    else:
+        fee_amount = mul_div_rounding_up(amount_in, fee_pips, FEE_DENOMINATOR - fee_pips)
+
+    return sqrt_next, amount_in, amount_out, fee_amount
+
+@dataclass
+class SwapResult:
+    """Outcome of a simulated swap"""
+    amount_in: int  # Raw units of the input token actually consumed, including fee
+    amount_out: int  # Raw units of the output token received
+    sqrt_price_after: int
+    tick_after: int
+    ticks_crossed: int
+    complete: bool  # False if the swap ran past the loaded tick range or hit the price limit
+
+class V3PoolSimulator:
+    """
+    Local Uniswap V3 swap simulator for one pool
+
+    The tick bitmap words and liquidityNet of initialized ticks are loaded once
+    (see UniswapV3Interface.get_swap_simulator); a quote then runs the exact
+    concentrated-liquidity swap loop across tick boundaries without any RPC call.
+    """
+
+    def __init__(self, fee: int, tick_spacing: int, bitmap: Dict[int, int], liquidity_net: Dict[int, int],
+                 loaded_words: Tuple[int, int]):
+        """
+        Args:
+            fee: Pool fee in hundredths of a bip
+            tick_spacing: Pool tick spacing
+            bitmap: Tick bitmap words keyed by word position
+            liquidity_net: liquidityNet of every initialized tick in the loaded words
+            loaded_words: Inclusive (first, last) word positions that were loaded
+        """
+        self.fee = fee
+        self.tick_spacing = tick_spacing
+        self.bitmap = bitmap
+        self.liquidity_net = liquidity_net
+        self.loaded_words = loaded_words
+
+    def _next_initialized_tick(self, tick: int, lte: bool) -> Optional[Tuple[int, bool]]:
+        """
+        TickBitmap.nextInitializedTickWithinOneWord; None if the word was not loaded
+        """
+        compressed = tick // self.tick_spacing
+        if lte:
+            word_pos, bit_pos = compressed >> 8, compressed % 256
+            if not self.loaded_words[0] <= word_pos <= self.loaded_words[1]:
+                return None
+            mask = (1 << bit_pos) - 1 + (1 << bit_pos)
+            masked = self.bitmap.get(word_pos, 0) & mask
+            if masked:
+                return (compressed - (bit_pos - (masked.bit_length() - 1))) * self.tick_spacing, True
+            return (compressed - bit_pos) * self.tick_spacing, False
+
+        word_pos, bit_pos = (compressed + 1) >> 8, (compressed + 1) % 256
+        if not self.loaded_words[0] <= word_pos <= self.loaded_words[1]:
+            return None
+        mask = MAX_UINT256 ^ ((1 << bit_pos) - 1)
+        masked = self.bitmap.get(word_pos, 0) & mask
+        if masked:
+            lowest_bit = (masked & -masked).bit_length() - 1
+            return (compressed + 1 + (lowest_bit - bit_pos)) * self.tick_spacing, True
+        return (compressed + 1 + (255 - bit_pos)) * self.tick_spacing, False
+
+    def swap(self, sqrt_price_x96: int, tick: int, liquidity: int, zero_for_one: bool, amount_specified: int,
+             sqrt_price_limit_x96: Optional[int] = None) -> SwapResult:
+        """
+        Simulate UniswapV3Pool.swap from the given pool state
+
+        Args:
+            sqrt_price_x96: Current pool sqrtPriceX96
+            tick: Current pool tick
+            liquidity: Current active liquidity
+            zero_for_one: True to swap token0 for token1
+            amount_specified: Positive for exact input, negative for exact output (raw units)
+            sqrt_price_limit_x96: Optional price limit
+
+        Returns:
+            SwapResult with raw input/output amounts
+        """
+        if sqrt_price_limit_x96 is None:
+            sqrt_price_limit_x96 = MIN_SQRT_RATIO + 1 if zero_for_one else MAX_SQRT_RATIO - 1
+
+        exact_input = amount_specified > 0
+        remaining = amount_specified
+        calculated = 0
+        ticks_crossed = 0
+        complete = True
+
+        while remaining != 0 and sqrt_price_x96 != sqrt_price_limit_x96:
+            sqrt_start = sqrt_price_x96
+            next_tick = self._next_initialized_tick(tick, zero_for_one)
+            if next_tick is None:
+                complete = False
+                break
+            tick_next, initialized = next_tick
+            tick_next = max(MIN_TICK, min(MAX_TICK, tick_next))
+            sqrt_price_next = get_sqrt_ratio_at_tick(tick_next)
+
+            if zero_for_one:
+                target = sqrt_price_limit_x96 if sqrt_price_next < sqrt_price_limit_x96 else sqrt_price_next
+            else:
+                target = sqrt_price_limit_x96 if sqrt_price_next > sqrt_price_limit_x96 else sqrt_price_next
+
+            sqrt_price_x96, step_in, step_out, step_fee = compute_swap_step(
+                sqrt_price_x96, target, liquidity, remaining, self.fee)
+
+            if exact_input:
+                remaining -= step_in + step_fee
+                calculated -= step_out
+            else:
+                remaining += step_out
+                calculated += step_in + step_fee
+
+            if sqrt_price_x96 == sqrt_price_next:
+                if initialized:
+                    net = self.liquidity_net.get(tick_next, 0)
+                    liquidity += -net if zero_for_one else net
+                    ticks_crossed += 1
+                tick = tick_next - 1 if zero_for_one else tick_next
+            elif sqrt_price_x96 != sqrt_start:
+                tick = get_tick_at_sqrt_ratio(sqrt_price_x96)
+
+        if remaining != 0:
+            complete = False
+
+        if exact_input:
+            amount_in, amount_out = amount_specified - remaining, -calculated
+        else:
+            amount_in, amount_out = calculated, -(amount_specified - remaining)
+
+        return SwapResult(amount_in, amount_out, sqrt_price_x96, tick, ticks_crossed, complete)
+
+    def quote_exact_input(self, state: Dict[str, Any], zero_for_one: bool, amount_in: int) -> SwapResult:
+        """Quote an exact-input swap from a pool state dict (sqrt_price_x96, tick, liquidity)"""
+        return self.swap(state["sqrt_price_x96"], state["tick"], state["liquidity"], zero_for_one, amount_in)
+
+    def quote_exact_output(self, state: Dict[str, Any], zero_for_one: bool, amount_out: int) -> SwapResult:
+        """Quote an exact-output swap from a pool state dict (sqrt_price_x96, tick, liquidity)"""
+        return self.swap(state["sqrt_price_x96"], state["tick"], state["liquidity"], zero_for_one, -amount_out)